@@ -1,30 +1,120 @@
+import json
 import os
 from decimal import Decimal
+from typing import TYPE_CHECKING
 
-from binance_exchange.exchange import BinanceExchange
-from binance_exchange.market_data import BinanceMarketData
-from bot.trading_bot_builder import trading_bot_builder
+from config.config import MainConfig
 from config.config_builder import config_builder
 from dotenv import load_dotenv
-from utils.utils import get_instance_from_mapping, get_strategy_instances
+from utils.utils import (
+    get_instance_from_mapping,
+    get_strategy_instances,
+    import_strategy,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from interfaces import EventSinkProtocol, MarketDataProtocol
+
+# The modules of the bot are imported by `main` when they are used, and the providers and
+# strategies are registered by import path, so only the selected ones get imported.
+# Startup stays fast for short-lived backtests, see tests/utils/test_startup.py.
 
 load_dotenv()
 
 
-CRYPTO_EXCHANGE_MAPPING = {
-    "BinanceExchange": BinanceExchange,
+CRYPTO_EXCHANGE_MAPPING: dict[str, str | type] = {
+    "BinanceExchange": "binance_exchange.exchange.BinanceExchange",
+    "SimulatedExchange": "simulated_exchange.exchange.SimulatedExchange",
     # Extra crypto exchanges can be added here...
 }
 
 
-MARKET_DATA_PROVIDER_MAPPING = {
-    "BinanceMarketData": BinanceMarketData,
+MARKET_DATA_PROVIDER_MAPPING: dict[str, str | type] = {
+    "BinanceMarketData": "binance_exchange.market_data.BinanceMarketData",
+    "SyntheticMarketData": "market_data.synthetic_market_data.SyntheticMarketData",
     # Extra market data providers can be added here...
 }
 
 
+STRATEGY_MAPPING = {
+    "MACDStrategy": "strategies.example_macd_strategy.MACDStrategy",
+    "SimpleRsiStrategy": "strategies.example_rsi_strategy.SimpleRsiStrategy",
+    # Extra strategies can be added here, the others are given by import path...
+}
+
+
+def trades_several_symbols(config: MainConfig) -> bool:
+    """
+    Whether the multi-symbol bot is built: SYMBOLS lists other symbols than SYMBOL, even a single one.
+    """
+    return bool(config.symbols) and config.symbols != [config.symbol]
+
+
+def run_sweep(
+    config: MainConfig,
+    market_data: "MarketDataProtocol",
+    sweep_grid: str,
+    event_sink: "EventSinkProtocol",
+) -> None:
+    """
+    Runs a parameter sweep, or a walk-forward optimization when WALK_FORWARD_TRAIN_BARS is set,
+    over the parameter grids of SWEEP_GRID, and reports the results to the event sink.
+    """
+    df = market_data.get_klines(
+        symbol=config.symbol,
+        interval=config.market_data_config.interval,
+        limit=config.market_data_config.limit,
+        start_time=config.market_data_config.start_time,
+        end_time=config.market_data_config.end_time,
+    )
+    from backtesting.sweep import run_parameter_sweep
+    from backtesting.walk_forward import run_walk_forward
+    from enums import EventLevel
+
+    grids = {
+        import_strategy(strategy_path, STRATEGY_MAPPING): grid
+        for strategy_path, grid in json.loads(sweep_grid).items()
+    }
+    max_workers = int(os.getenv("MAX_WORKERS", "0")) or None
+
+    if train_bars := int(os.getenv("WALK_FORWARD_TRAIN_BARS", "0")):
+        for strategy_class, grid in grids.items():
+            walk_forward_result = run_walk_forward(
+                config=config,
+                df=df,
+                strategy_class=strategy_class,
+                grid=grid,
+                train_bars=train_bars,
+                test_bars=int(os.getenv("WALK_FORWARD_TEST_BARS", train_bars)),
+                max_workers=max_workers,
+            )
+            event_sink.emit(
+                EventLevel.SUMMARY,
+                "walk_forward_results",
+                {
+                    "Strategy": strategy_class.__name__,
+                    "Windows": "\n" + walk_forward_result.windows.to_string(),
+                    "Out-of-sample final equity": round(
+                        walk_forward_result.equity.iloc[-1], 2
+                    ),
+                },
+            )
+        return
+
+    results = run_parameter_sweep(
+        config=config, df=df, grids=grids, max_workers=max_workers
+    )
+    event_sink.emit(
+        EventLevel.SUMMARY,
+        "parameter_sweep_results",
+        {"Results": "\n" + results.to_string()},
+    )
+
+
 def main() -> None:
-    strategies = get_strategy_instances()
+    strategies = get_strategy_instances(mapping=STRATEGY_MAPPING)
 
     crypto_exchange_instances = get_instance_from_mapping(
         CRYPTO_EXCHANGE_MAPPING, "CRYPTO_EXCHANGE"
@@ -32,9 +122,20 @@ def main() -> None:
     market_data_provider_instances = get_instance_from_mapping(
         MARKET_DATA_PROVIDER_MAPPING, "MARKET_DATA_PROVIDER"
     )
+    if cache_dir := os.getenv("MARKET_DATA_CACHE_DIR"):
+        from market_data.caching_market_data import CachingMarketData
+
+        market_data_provider_instances = CachingMarketData(
+            market_data_provider_instances, cache_dir=cache_dir
+        )
 
     config = config_builder(
         symbol=os.getenv("SYMBOL", "BTCUSDT"),
+        symbols=[
+            symbol.strip()
+            for symbol in os.getenv("SYMBOLS", "").split(",")
+            if symbol.strip()
+        ],
         interval=os.getenv("INTERVAL", "4h"),
         limit=int(os.getenv("LIMIT", "1000")),
         starting_balance=os.getenv("STARTING_BALANCE", "0"),
@@ -44,18 +145,98 @@ def main() -> None:
         polling_interval_weight=float(os.getenv("POLLING_INTERVAL_WEIGHT", "1")),
         start_date=os.getenv("START_DATE", None),
         end_date=os.getenv("END_DATE", None),
+        fixed_point=os.getenv("FIXED_POINT", "False").lower() == "true",
     )
-    trading_bot = trading_bot_builder(
-        config=config,
-        strategies=strategies,
-        crypto_exchange=crypto_exchange_instances,
-        market_data_provider=market_data_provider_instances,
+
+    from events.event_sinks import event_sink_from_settings
+
+    event_sink = event_sink_from_settings(
+        level=os.getenv("LOG_LEVEL", "DEBUG"), path=os.getenv("LOG_FILE", None)
     )
 
-    trading_bot.run()
-    trading_bot.position_manager.print_stats(
-        close_price=Decimal(trading_bot.df["close"].iloc[-1])
+    if sweep_grid := os.getenv("SWEEP_GRID"):
+        try:
+            run_sweep(config, market_data_provider_instances, sweep_grid, event_sink)
+        finally:
+            event_sink.close()
+        return
+
+    from bot.trading_bot_builder import (
+        multi_symbol_trading_bot_builder,
+        trading_bot_builder,
     )
+    from metrics.latency_recorder import LatencyRecorder
+    from position_manager.order_journal import OrderJournal
+    from position_manager.position_store import PositionStore
+
+    latency_recorder = LatencyRecorder(
+        enabled=os.getenv("LATENCY_STATS", "True").lower() == "true"
+    )
+    order_journal = OrderJournal(os.getenv("ORDER_JOURNAL", None))
+    strategy_execution = os.getenv("STRATEGY_EXECUTION", "sequential")
+    strategy_workers = int(os.getenv("STRATEGY_WORKERS", "0")) or None
+    strategy_executor: Executor | None = None
+    if strategy_execution == "thread":
+        from concurrent.futures import ThreadPoolExecutor
+
+        strategy_executor = ThreadPoolExecutor(max_workers=strategy_workers)
+    elif strategy_execution == "process":
+        from concurrent.futures import ProcessPoolExecutor
+
+        strategy_executor = ProcessPoolExecutor(max_workers=strategy_workers)
+    elif strategy_execution != "sequential":
+        raise ValueError(f"Unknown STRATEGY_EXECUTION {strategy_execution}")
+    strategy_timeout = float(os.getenv("STRATEGY_TIMEOUT", "0")) or None
+    position_store = None
+    if position_state_dir := os.getenv("POSITION_STATE_DIR"):
+        position_store = PositionStore(
+            position_state_dir,
+            snapshot_interval=int(os.getenv("POSITION_SNAPSHOT_INTERVAL", "1000")),
+        )
+
+    try:
+        if trades_several_symbols(config):
+            multi_symbol_trading_bot = multi_symbol_trading_bot_builder(
+                config=config,
+                strategies=strategies,
+                crypto_exchange=crypto_exchange_instances,
+                market_data_provider=market_data_provider_instances,
+                max_workers=int(os.getenv("MAX_WORKERS", "0")) or None,
+                event_sink=event_sink,
+                latency_recorder=latency_recorder,
+                order_journal=order_journal,
+                position_store=position_store,
+                strategy_executor=strategy_executor,
+                strategy_timeout=strategy_timeout,
+            )
+            multi_symbol_trading_bot.run()
+            multi_symbol_trading_bot.print_stats()
+            return
+
+        trading_bot = trading_bot_builder(
+            config=config,
+            strategies=strategies,
+            crypto_exchange=crypto_exchange_instances,
+            market_data_provider=market_data_provider_instances,
+            event_sink=event_sink,
+            latency_recorder=latency_recorder,
+            order_journal=order_journal,
+            position_store=position_store,
+            strategy_executor=strategy_executor,
+            strategy_timeout=strategy_timeout,
+        )
+
+        trading_bot.run()
+        trading_bot.position_manager.print_stats(
+            close_price=Decimal(trading_bot.df["close"].iloc[-1])
+        )
+    finally:
+        if strategy_executor is not None:
+            strategy_executor.shutdown(wait=False, cancel_futures=True)
+        if position_store is not None:
+            position_store.close()
+        order_journal.close()
+        event_sink.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,262 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import numpy
+import pandas
+from config.config import MainConfig
+from events.event_sinks import NullEventSink
+from indicators.registry import IndicatorRegistry
+from interfaces import StrategyProtocol
+from market_data.static_market_data import StaticMarketData
+from position_manager.fixed_point_position_manager import FixedPointPositionManager
+from position_manager.position_manager import PositionManager
+from position_manager.trade_executor import TradeExecutor
+from signals.signal_engine import SignalEngine
+from signals.signal_processor import SignalProcessor
+
+ParameterGrid = dict[str, list[Any]]
+
+# The klines of the sweep, set once per worker process by `_initialize_worker`.
+_worker_klines: pandas.DataFrame = pandas.DataFrame()
+# The indicators of the backtests of this worker process, so parameter sets that only differ
+# in their thresholds share them.
+_worker_indicators = IndicatorRegistry()
+
+
+def expand_grid(grid: ParameterGrid) -> list[dict[str, Any]]:
+    """
+    Expands a parameter grid into every combination of its values.
+
+    Args:
+        grid (ParameterGrid): The values to try per parameter name.
+
+    Returns:
+        list[dict[str, Any]]: One dict of parameters per combination.
+    """
+    names = list(grid)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def max_drawdown(equity: pandas.Series) -> float:
+    """
+    Computes the largest relative drop of the equity from its running peak.
+
+    A drop relative to a peak that is not positive is undefined, so the bars before the equity was
+    first positive are ignored, e.g. with a starting balance of zero.
+
+    Args:
+        equity (pandas.Series): The equity per bar.
+
+    Returns:
+        float: The maximum drawdown, between 0 and 1 unless the equity turns negative,
+            0 when the equity was never positive.
+    """
+    values = equity.to_numpy(dtype=float)
+    peak = numpy.maximum.accumulate(values)
+    positive = peak > 0
+    if not positive.any():
+        return 0.0
+    return float(numpy.max((peak[positive] - values[positive]) / peak[positive]))
+
+
+def build_backtest_processor(
+    config: MainConfig,
+    strategies: list[StrategyProtocol],
+    df: pandas.DataFrame,
+    indicators: IndicatorRegistry | None = None,
+) -> SignalProcessor:
+    """
+    Builds a quiet backtest SignalProcessor that trades on already loaded klines.
+
+    Args:
+        config (MainConfig): The configuration of the backtest.
+        strategies (list[StrategyProtocol]): The strategies to backtest.
+        df (pandas.DataFrame): A DataFrame containing klines data.
+        indicators (IndicatorRegistry | None): The registry the strategies share their indicators through.
+            Defaults to a registry of this backtest.
+
+    Returns:
+        SignalProcessor: A processor with its own position manager.
+    """
+    config = config.copy(update={"backtest": True})
+    event_sink = NullEventSink()
+    position_manager_class = (
+        FixedPointPositionManager
+        if config.trading_config.fixed_point
+        else PositionManager
+    )
+    return SignalProcessor(
+        config=config,
+        signal_engine=SignalEngine(
+            config=config, strategies=strategies, indicators=indicators
+        ),
+        market_data=StaticMarketData(df),
+        position_manager=position_manager_class(
+            config=config,
+            trade_executor=TradeExecutor(
+                config=config, crypto_exchange=None, event_sink=event_sink
+            ),
+            event_sink=event_sink,
+        ),
+        event_sink=event_sink,
+    )
+
+
+def run_backtest(
+    config: MainConfig,
+    strategies: list[StrategyProtocol],
+    df: pandas.DataFrame,
+    indicators: IndicatorRegistry | None = None,
+) -> SignalProcessor:
+    """
+    Runs a quiet backtest of the strategies on already loaded klines.
+
+    Args:
+        config (MainConfig): The configuration of the backtest.
+        strategies (list[StrategyProtocol]): The strategies to backtest.
+        df (pandas.DataFrame): A DataFrame containing klines data.
+        indicators (IndicatorRegistry | None): The registry the strategies share their indicators through.
+            Defaults to a registry of this backtest.
+
+    Returns:
+        SignalProcessor: The processor after the backtest, holding the position manager and equity curve.
+    """
+    processor = build_backtest_processor(config, strategies, df, indicators)
+    processor.run()
+    return processor
+
+
+def backtest_metrics(processor: SignalProcessor) -> dict[str, Any]:
+    """
+    Summarizes a finished backtest.
+
+    Args:
+        processor (SignalProcessor): The processor after the backtest.
+
+    Returns:
+        dict[str, Any]: The final balance, total profit, trade count and max drawdown.
+    """
+    position_manager = processor.position_manager
+    final_balance = float(position_manager.balance) + (
+        position_manager.positions.market_value(
+            {processor.config.symbol: float(processor.df["close"].iloc[-1])}
+        )
+    )
+
+    return {
+        "final_balance": final_balance,
+        "total_profit": final_balance
+        - float(processor.config.trading_config.starting_balance),
+        "trade_count": position_manager.trade_executor.order_count,
+        "max_drawdown": max_drawdown(processor.equity_curve()),
+    }
+
+
+def initialize_worker(columns: dict[str, numpy.ndarray]) -> None:
+    """
+    Receives the klines once per worker process, instead of once per task.
+    Used as the initializer of the process pools.
+    """
+    global _worker_klines
+    _worker_klines = pandas.DataFrame(columns, copy=False)
+
+
+def get_worker_klines() -> pandas.DataFrame:
+    """
+    Returns the klines received by `initialize_worker` in this worker process.
+    """
+    return _worker_klines
+
+
+def get_worker_indicators() -> IndicatorRegistry:
+    """
+    Returns the indicator registry of the backtests in this worker process.
+    """
+    return _worker_indicators
+
+
+def shareable_columns(df: pandas.DataFrame) -> dict[str, numpy.ndarray]:
+    """
+    Returns the numeric columns of the klines, to send to the worker processes.
+    """
+    return {
+        column: df[column].to_numpy()
+        for column in df.columns
+        if pandas.api.types.is_numeric_dtype(df[column])
+    }
+
+
+def _run_sweep_task(
+    config: MainConfig, strategy_class: type, params: dict[str, Any]
+) -> dict[str, Any]:
+    processor = run_backtest(
+        config, [strategy_class(**params)], _worker_klines, _worker_indicators
+    )
+    return {
+        "strategy": strategy_class.__name__,
+        "params": params,
+        **backtest_metrics(processor),
+    }
+
+
+def run_parameter_sweep(
+    config: MainConfig,
+    df: pandas.DataFrame,
+    grids: dict[type, ParameterGrid],
+    max_workers: int | None = None,
+) -> pandas.DataFrame:
+    """
+    Backtests every parameter combination of every strategy class on a process pool.
+
+    The klines are loaded once by the caller and sent to each worker process a single time.
+
+    Args:
+        config (MainConfig): The configuration of the backtests.
+        df (pandas.DataFrame): A DataFrame containing klines data.
+        grids (dict[type, ParameterGrid]): The parameter grid per strategy class.
+        max_workers (int | None): The number of worker processes. Defaults to the number of cores.
+
+    Returns:
+        pandas.DataFrame: One row per combination, ranked by final balance.
+    """
+    tasks = [
+        (strategy_class, params)
+        for strategy_class, grid in grids.items()
+        for params in expand_grid(grid)
+    ]
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=initialize_worker,
+        initargs=(shareable_columns(df),),
+    ) as executor:
+        results = list(
+            executor.map(
+                _run_sweep_task,
+                itertools.repeat(config),
+                [strategy_class for strategy_class, _ in tasks],
+                [params for _, params in tasks],
+                chunksize=max(1, len(tasks) // (max_workers * 4)),
+            )
+        )
+
+    return (
+        pandas.DataFrame(
+            results,
+            columns=[
+                "strategy",
+                "params",
+                "final_balance",
+                "total_profit",
+                "trade_count",
+                "max_drawdown",
+            ],
+        )
+        .sort_values(by="final_balance", ascending=False, kind="stable")
+        .reset_index(drop=True)
+    )
@@ -0,0 +1,278 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import pandas
+from backtesting.sweep import (
+    ParameterGrid,
+    backtest_metrics,
+    build_backtest_processor,
+    expand_grid,
+    get_worker_indicators,
+    get_worker_klines,
+    initialize_worker,
+    shareable_columns,
+)
+from config.config import MainConfig
+from pydantic import BaseModel
+from schemas import BatchSignals
+from signals.signal_processor import SignalProcessor
+
+# Per-bar signals over the whole history, per (strategy class, params), in this worker process.
+# Overlapping windows slice these instead of warming up their indicators again.
+_batch_signals_cache: OrderedDict[tuple, list[BatchSignals] | None] = OrderedDict()
+
+
+class WalkForwardWindow(BaseModel):
+    train_start: int  # position of the first training bar
+    test_start: int  # position of the first test bar, right after the training bars
+    test_end: int  # position after the last test bar
+
+
+class WalkForwardResult(BaseModel):
+    windows: pandas.DataFrame  # one row per window, with the chosen params and metrics
+    equity: pandas.Series  # out-of-sample equity of all test windows, stitched together
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+def walk_forward_windows(
+    length: int, train_bars: int, test_bars: int, step: int | None = None
+) -> list[WalkForwardWindow]:
+    """
+    Splits a history into rolling train/test windows.
+
+    Args:
+        length (int): The number of bars in the history.
+        train_bars (int): The number of bars to optimize on.
+        test_bars (int): The number of bars to evaluate on, right after the training bars.
+        step (int | None): The number of bars between windows. Defaults to test_bars.
+
+    Returns:
+        list[WalkForwardWindow]: The windows, in chronological order.
+    """
+    step = step or test_bars
+    if step < test_bars:
+        raise ValueError("step must be at least test_bars, test windows can't overlap")
+    return [
+        WalkForwardWindow(
+            train_start=train_start,
+            test_start=train_start + train_bars,
+            test_end=min(train_start + train_bars + test_bars, length),
+        )
+        for train_start in range(0, length - train_bars, step)
+    ]
+
+
+def _get_batch_signals(
+    config: MainConfig,
+    strategy_class: type,
+    params: dict[str, Any],
+    df: pandas.DataFrame,
+    max_cached: int,
+) -> list[BatchSignals] | None:
+    """
+    Computes the per-bar signals over the whole history once per worker and parameter set.
+    """
+    key = (strategy_class, tuple(sorted(params.items())))
+    if key in _batch_signals_cache:
+        _batch_signals_cache.move_to_end(key)
+        return _batch_signals_cache[key]
+
+    processor = build_backtest_processor(
+        config, [strategy_class(**params)], df, get_worker_indicators()
+    )
+    processor.signal_engine.initialize_strategies()
+    batch_signals = processor.signal_engine.generate_batch_signals(df)
+
+    _batch_signals_cache[key] = batch_signals
+    while len(_batch_signals_cache) > max_cached:
+        _batch_signals_cache.popitem(last=False)
+    return batch_signals
+
+
+def backtest_window(
+    config: MainConfig,
+    strategy_class: type,
+    params: dict[str, Any],
+    df: pandas.DataFrame,
+    start: int,
+    end: int,
+    warmup_bars: int,
+    max_cached: int = 256,
+) -> SignalProcessor:
+    """
+    Backtests the bars [start, end) of the history, with warmed up indicators.
+
+    Strategies that support batch analysis reuse their signals over the whole history, so every
+    window starts with fully warmed up indicators. Other strategies are run bar by bar, with the
+    `warmup_bars` before the window as history.
+
+    Args:
+        config (MainConfig): The configuration of the backtest.
+        strategy_class (type): The strategy class to backtest.
+        params (dict[str, Any]): The parameters of the strategy.
+        df (pandas.DataFrame): A DataFrame containing the whole history of klines.
+        start (int): The position of the first bar to trade.
+        end (int): The position after the last bar to trade.
+        warmup_bars (int): The number of bars before the window used as history, when run bar by bar.
+        max_cached (int): The number of parameter sets whose signals are kept per worker.
+
+    Returns:
+        SignalProcessor: The processor after the backtest, with `df` covering the traded bars.
+    """
+    batch_signals = _get_batch_signals(config, strategy_class, params, df, max_cached)
+
+    if batch_signals is not None:
+        processor = build_backtest_processor(config, [strategy_class(**params)], df)
+        processor.df = df.iloc[start:end].reset_index(drop=True)
+        processor._run_vectorized_backtest(
+            [batch.slice(start, end) for batch in batch_signals],
+            start_index=0 if start > 0 else 1,
+        )
+        return processor
+
+    warmup_length = min(start, warmup_bars)
+    warmup_start = start - warmup_length
+    processor = build_backtest_processor(config, [strategy_class(**params)], df)
+    processor.signal_engine.initialize_strategies()
+    processor.df = df.iloc[warmup_start:end].reset_index(drop=True)
+
+    processor._run_bar_by_bar_backtest(start_index=warmup_length)
+
+    # Drop the warm-up bars, so the equity curve only covers the traded bars.
+    processor.balance_history = [
+        (index - warmup_length, balance, quantity)
+        for index, balance, quantity in processor.balance_history
+    ]
+    processor.df = processor.df.iloc[warmup_length:].reset_index(drop=True)
+    return processor
+
+
+def _run_window_task(
+    config: MainConfig,
+    strategy_class: type,
+    grid: ParameterGrid,
+    window: WalkForwardWindow,
+    warmup_bars: int,
+) -> dict[str, Any]:
+    """
+    Optimizes the parameters on the training bars of a window, then evaluates them on its test bars.
+    """
+    df = get_worker_klines()
+
+    best_params: dict[str, Any] = {}
+    best_train_metrics: dict[str, Any] = {}
+    for params in expand_grid(grid):
+        metrics = backtest_metrics(
+            backtest_window(
+                config,
+                strategy_class,
+                params,
+                df,
+                window.train_start,
+                window.test_start,
+                warmup_bars,
+            )
+        )
+        if (
+            not best_train_metrics
+            or metrics["final_balance"] > best_train_metrics["final_balance"]
+        ):
+            best_params, best_train_metrics = params, metrics
+
+    test_processor = backtest_window(
+        config,
+        strategy_class,
+        best_params,
+        df,
+        window.test_start,
+        window.test_end,
+        warmup_bars,
+    )
+    test_metrics = backtest_metrics(test_processor)
+
+    return {
+        **window.dict(),
+        "params": best_params,
+        "train_final_balance": best_train_metrics["final_balance"],
+        "test_final_balance": test_metrics["final_balance"],
+        "test_trade_count": test_metrics["trade_count"],
+        "test_max_drawdown": test_metrics["max_drawdown"],
+        "test_equity": test_processor.equity_curve().to_numpy(),
+    }
+
+
+def run_walk_forward(
+    config: MainConfig,
+    df: pandas.DataFrame,
+    strategy_class: type,
+    grid: ParameterGrid,
+    train_bars: int,
+    test_bars: int,
+    step: int | None = None,
+    warmup_bars: int = 500,
+    max_workers: int | None = None,
+) -> WalkForwardResult:
+    """
+    Runs a walk-forward optimization of a strategy over rolling train/test windows.
+
+    The parameters are optimized on each training window and evaluated on the test window
+    that follows it. The windows are independent, so they run in parallel on a process pool.
+    The out-of-sample equity of the test windows is compounded into a single curve.
+
+    Args:
+        config (MainConfig): The configuration of the backtests.
+        df (pandas.DataFrame): A DataFrame containing klines data.
+        strategy_class (type): The strategy class to optimize.
+        grid (ParameterGrid): The parameter values to try.
+        train_bars (int): The number of bars of each training window.
+        test_bars (int): The number of bars of each test window.
+        step (int | None): The number of bars between windows. Defaults to test_bars.
+        warmup_bars (int): The bars of history given to strategies that are run bar by bar.
+        max_workers (int | None): The number of worker processes. Defaults to the number of cores.
+
+    Returns:
+        WalkForwardResult: The per-window results and the stitched out-of-sample equity.
+
+    Raises:
+        ValueError: When the starting balance is not positive, since the equity of every test window
+            is compounded relative to it.
+    """
+    if config.trading_config.starting_balance <= 0:
+        raise ValueError(
+            "A walk-forward needs a positive starting balance, "
+            f"not {config.trading_config.starting_balance}"
+        )
+    windows = walk_forward_windows(len(df), train_bars, test_bars, step)
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=initialize_worker,
+        initargs=(shareable_columns(df),),
+    ) as executor:
+        futures = [
+            executor.submit(
+                _run_window_task, config, strategy_class, grid, window, warmup_bars
+            )
+            for window in windows
+        ]
+        results = [future.result() for future in futures]
+
+    starting_balance = float(config.trading_config.starting_balance)
+    capital = starting_balance
+    equity = []
+    for result in results:
+        test_start, test_end = result["test_start"], result["test_end"]
+        window_equity = pandas.Series(
+            result.pop("test_equity") * capital / starting_balance,
+            index=df.index[test_start:test_end],
+        )
+        equity.append(window_equity)
+        capital = float(window_equity.iloc[-1])
+
+    return WalkForwardResult(
+        windows=pandas.DataFrame(results),
+        equity=pandas.concat(equity) if equity else pandas.Series(dtype=float),
+    )
@@ -1,23 +1,425 @@
-from schemas import CreateOrderSchema, OrderSchema
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from decimal import ROUND_DOWN, Decimal
+from typing import Any
+from urllib.parse import urlencode
+
+import requests
+from enums import OrderSide, OrderType, TimeInForce
+from requests.adapters import HTTPAdapter
+from schemas import CreateOrderSchema, OrderRejectedError, OrderSchema
+
+BINANCE_API_URL = "https://api.binance.com"
+RECV_WINDOW = 5000  # milliseconds a signed request stays valid after its timestamp
+TIME_SYNC_INTERVAL = 300  # seconds between two syncs with the server time
+INVALID_TIMESTAMP_CODE = -1021  # the timestamp is outside the receive window
+ORDER_SYMBOLS_SIZE = 10_000  # the most recent orders whose symbol is remembered
+
+# Order types that are placed at a price, and so need a time in force.
+PRICED_ORDER_TYPES = frozenset(
+    {OrderType.LIMIT, OrderType.STOP_LOSS_LIMIT, OrderType.TAKE_PROFIT_LIMIT}
+)
+
+
+def round_down(value: Decimal, size: Decimal) -> Decimal:
+    """
+    Rounds a value down to a multiple of a step or tick size. A size of zero leaves it unchanged,
+    like Binance disables a filter with a zero size.
+
+    Args:
+        value (Decimal): The quantity or price.
+        size (Decimal): The step or tick size.
+
+    Returns:
+        Decimal: The rounded value.
+    """
+    if not size:
+        return value
+    return (value / size).to_integral_value(ROUND_DOWN) * size
+
+
+class BinanceAPIError(Exception):
+    def __init__(self, status: int, code: int | None, message: str) -> None:
+        """
+        An error response of the Binance API.
+
+        Args:
+            status (int): The HTTP status of the response.
+            code (int | None): The Binance error code, if the response has one.
+            message (str): The error message.
+        """
+        super().__init__(f"Binance API error {code} (HTTP {status}): {message}")
+        self.status = status
+        self.code = code
 
 
 class BinanceExchange:
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_secret: str | None = None,
+        base_url: str | None = None,
+        default_symbol: str | None = None,
+        pool_size: int = 4,
+        timeout: float = 10,
+        recv_window: int = RECV_WINDOW,
+    ) -> None:
+        """
+        Places and queries orders through the Binance spot REST API.
+
+        All requests go through one session with a pool of keep-alive connections, so only
+        the first request pays for the TCP and TLS handshakes. Signed requests are built as
+        a single query string, signed with a copy of a prepared HMAC-SHA256 object, and
+        timestamped with the clock offset of the server, which is synced every
+        TIME_SYNC_INTERVAL seconds and again when Binance rejects a timestamp. The lot size
+        and price filters and the assets of a symbol are fetched once, before its first order.
+
+        Nothing is sent until the first request, so the exchange can be created for backtests.
+
+        Args:
+            api_key (str | None): The API key. Defaults to the BINANCE_API_KEY environment variable.
+            api_secret (str | None): The API secret. Defaults to the BINANCE_SECRET environment variable.
+            base_url (str | None): The base url of the API. Defaults to BINANCE_API_URL, or the environment
+                variable of that name.
+            default_symbol (str | None): The symbol of the order queries for orders this exchange did not place,
+                or placed before its last ORDER_SYMBOLS_SIZE orders. Defaults to the SYMBOL environment variable.
+            pool_size (int): The maximum number of connections kept alive.
+            timeout (float): The timeout of a request, in seconds.
+            recv_window (int): The milliseconds a signed request stays valid.
+        """
+        api_key = os.getenv("BINANCE_API_KEY", "") if api_key is None else api_key
+        api_secret = (
+            os.getenv("BINANCE_SECRET", "") if api_secret is None else api_secret
+        )
+        self.base_url = (
+            base_url or os.getenv("BINANCE_API_URL") or BINANCE_API_URL
+        ).rstrip("/")
+        self.default_symbol = default_symbol or os.getenv("SYMBOL")
+        self.timeout = timeout
+        self.recv_window = recv_window
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"X-MBX-APIKEY": api_key})
+
+        self._signer = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+        self._time_offset = 0  # server time minus local time, in milliseconds
+        self._synced_at = float("-inf")
+        self._time_lock = threading.Lock()
+        self._order_symbols: OrderedDict[str, str] = OrderedDict()
+        self._order_symbols_lock = threading.Lock()
+        self._symbol_filters: dict[str, tuple[Decimal, Decimal]] = {}
+        self._symbol_assets: dict[str, tuple[str, str]] = {}
+        self._filters_lock = threading.Lock()
+
+    def _raise_for_error(self, response: requests.Response) -> None:
+        if response.status_code < 400:
+            return
+        try:
+            error = response.json()
+        except ValueError:
+            error = {}
+        raise BinanceAPIError(
+            response.status_code, error.get("code"), error.get("msg", response.text)
+        )
+
+    def sync_time(self) -> None:
+        """
+        Measures the offset of the server clock, assuming the response is sent halfway the round trip.
+        """
+        sent_at = time.time()
+        response = self.session.get(
+            f"{self.base_url}/api/v3/time", timeout=self.timeout
+        )
+        received_at = time.time()
+        self._raise_for_error(response)
+
+        self._time_offset = int(
+            response.json()["serverTime"] - (sent_at + received_at) * 500
+        )
+        self._synced_at = time.monotonic()
+
+    def symbol_filters(self, symbol: str) -> tuple[Decimal, Decimal]:
+        """
+        Gets the step size of the LOT_SIZE filter and the tick size of the PRICE_FILTER filter of a symbol.
+        They are fetched from the exchange info on first use, and cached.
+
+        Args:
+            symbol (str): The symbol.
+
+        Returns:
+            tuple[Decimal, Decimal]: The step size and the tick size, zero when the symbol has no such filter.
+        """
+        if (filters := self._symbol_filters.get(symbol)) is not None:
+            return filters
+        with self._filters_lock:
+            if (filters := self._symbol_filters.get(symbol)) is not None:
+                return filters
+
+            response = self.session.get(
+                f"{self.base_url}/api/v3/exchangeInfo",
+                params={"symbol": symbol},
+                timeout=self.timeout,
+            )
+            self._raise_for_error(response)
+            (symbol_info,) = response.json()["symbols"]
+            sizes = {
+                symbol_filter["filterType"]: symbol_filter
+                for symbol_filter in symbol_info["filters"]
+            }
+            filters = (
+                Decimal(sizes.get("LOT_SIZE", {}).get("stepSize", 0)),
+                Decimal(sizes.get("PRICE_FILTER", {}).get("tickSize", 0)),
+            )
+            self._symbol_assets[symbol] = (
+                symbol_info.get("baseAsset", ""),
+                symbol_info.get("quoteAsset", ""),
+            )
+            self._symbol_filters[symbol] = filters
+            return filters
+
+    def symbol_assets(self, symbol: str) -> tuple[str, str]:
+        """
+        Gets the base and the quote asset of a symbol, fetched with its filters, see symbol_filters.
+
+        Args:
+            symbol (str): The symbol.
+
+        Returns:
+            tuple[str, str]: The base asset and the quote asset.
+        """
+        self.symbol_filters(symbol)
+        return self._symbol_assets[symbol]
+
+    def _timestamp(self) -> int:
+        if time.monotonic() - self._synced_at > TIME_SYNC_INTERVAL:
+            with self._time_lock:
+                if time.monotonic() - self._synced_at > TIME_SYNC_INTERVAL:
+                    self.sync_time()
+        return int(time.time() * 1000) + self._time_offset
+
+    def _send_signed(self, method: str, path: str, query: str) -> requests.Response:
+        signed_query = f"recvWindow={self.recv_window}&timestamp={self._timestamp()}"
+        if query:
+            signed_query = f"{query}&{signed_query}"
+        signer = self._signer.copy()
+        signer.update(signed_query.encode())
+        signed_query = f"{signed_query}&signature={signer.hexdigest()}"
+
+        if method == "POST":
+            return self.session.post(
+                f"{self.base_url}{path}",
+                data=signed_query,
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+                timeout=self.timeout,
+            )
+        return self.session.request(
+            method, f"{self.base_url}{path}?{signed_query}", timeout=self.timeout
+        )
+
+    def _signed_request(self, method: str, path: str, params: dict[str, Any]) -> Any:
+        """
+        Sends a signed request, resyncing the clock and retrying once if the timestamp is rejected.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The path of the endpoint.
+            params (dict[str, Any]): The parameters of the request, without timestamp and signature.
+
+        Returns:
+            Any: The decoded JSON response.
+
+        Raises:
+            BinanceAPIError: When Binance rejects the request.
+        """
+        query = urlencode({k: v for k, v in params.items() if v is not None})
+        response = self._send_signed(method, path, query)
+        try:
+            self._raise_for_error(response)
+        except BinanceAPIError as error:
+            if error.code != INVALID_TIMESTAMP_CODE:
+                raise
+            with self._time_lock:
+                self.sync_time()
+            response = self._send_signed(method, path, query)
+            self._raise_for_error(response)
+        return response.json()
+
+    def _order_from_response(self, response: dict[str, Any]) -> OrderSchema:
+        """
+        Maps an order response of Binance to an OrderSchema.
+
+        The price of a (partially) filled order is its average fill price, and its quote quantity the
+        exact quote amount of its fills. The commissions of its fills are booked in the quote asset.
+        A commission in the base asset is not held after a buy, so it is deducted from the executed
+        quantity, the quote amount paid for it stays booked. After a sell, it is valued at the average
+        price. Commissions in other assets, like BNB, don't change the quote and base balances, and
+        are not booked.
+        """
+        executed_qty = Decimal(response["executedQty"])
+        price: Decimal | None = Decimal(response.get("price") or 0)
+        quote_qty = response.get("cummulativeQuoteQty")
+        if quote_qty is not None:
+            quote_qty = Decimal(quote_qty)
+        if executed_qty and quote_qty is not None:
+            price = quote_qty / executed_qty
+        elif not price:
+            price = None
+
+        commission = Decimal(0)
+        if fills := response.get("fills"):
+            base_asset, quote_asset = self.symbol_assets(response["symbol"])
+            for fill in fills:
+                if fill["commissionAsset"] == quote_asset:
+                    commission += Decimal(fill["commission"])
+                elif fill["commissionAsset"] == base_asset and price is not None:
+                    if response["side"] == OrderSide.BUY:
+                        executed_qty -= Decimal(fill["commission"])
+                    else:
+                        commission += Decimal(fill["commission"]) * price
+
+        return OrderSchema(
+            order_id=str(response["orderId"]),
+            client_order_id=response.get("clientOrderId"),
+            symbol=response["symbol"],
+            status=response["status"],
+            executed_qty=executed_qty,
+            side=response["side"],
+            type=response["type"],
+            time_in_force=response.get("timeInForce") or TimeInForce.GTC,
+            price=price,
+            stop_price=Decimal(response.get("stopPrice") or 0) or None,
+            commission=commission,
+            quote_qty=quote_qty,
+        )
+
+    def _symbol(self, order_id: str, symbol: str | None) -> str:
+        symbol = symbol or self._order_symbols.get(str(order_id)) or self.default_symbol
+        if symbol is None:
+            raise ValueError(f"The symbol of order {order_id} is unknown")
+        return symbol
+
     def create_order(self, payload: CreateOrderSchema) -> OrderSchema:
-        print("Creating order", payload.dict(exclude_none=True))
-        return {}
+        """
+        Places an order and returns it as executed by Binance.
+
+        The quantity is rounded down to the step size of the symbol, and the prices to its tick size,
+        which Binance requires, see symbol_filters.
 
-    def get_order_by_id(self, order_id: str) -> dict:
-        print("Getting order by id", order_id)
-        return {}
+        Args:
+            payload (CreateOrderSchema): The order details.
 
-    def get_all_orders(self) -> list[dict]:
-        print("Getting all orders")
-        return [{}]
+        Returns:
+            OrderSchema: The placed order.
 
-    def cancel_order_by_id(self, order_id: str) -> None:
-        print("Closing order by id", order_id)
-        return
+        Raises:
+            OrderRejectedError: When the quantity is less than the step size, or Binance rejects the order.
+            BinanceAPIError: When Binance fails, and the order may have been placed.
+        """
+        step_size, tick_size = self.symbol_filters(payload.symbol)
+        quantity = round_down(payload.quantity, step_size)
+        if quantity <= 0:
+            raise OrderRejectedError(
+                f"The quantity {payload.quantity} is less than the step size {step_size} of {payload.symbol}"
+            )
+
+        params: dict[str, Any] = {
+            "symbol": payload.symbol,
+            "side": payload.side,
+            "type": payload.type,
+            "quantity": format(quantity, "f"),
+            "newClientOrderId": payload.client_order_id,
+            "newOrderRespType": "FULL",
+        }
+        if payload.type in PRICED_ORDER_TYPES:
+            params["timeInForce"] = payload.time_in_force
+            if payload.price is not None:
+                params["price"] = format(round_down(payload.price, tick_size), "f")
+        if payload.stop_price is not None:
+            params["stopPrice"] = format(round_down(payload.stop_price, tick_size), "f")
+        if payload.trailing_delta is not None:
+            params["trailingDelta"] = format(payload.trailing_delta, "f")
+
+        try:
+            response = self._signed_request("POST", "/api/v3/order", params)
+        except BinanceAPIError as error:
+            # Client errors are rejections, like a failed filter or an insufficient balance.
+            if error.status >= 500:
+                raise
+            raise OrderRejectedError(str(error)) from error
+
+        order = self._order_from_response(response)
+        with self._order_symbols_lock:
+            self._order_symbols[str(order.order_id)] = order.symbol
+            if len(self._order_symbols) > ORDER_SYMBOLS_SIZE:
+                self._order_symbols.popitem(last=False)
+        return order
+
+    def get_order_by_id(self, order_id: str, symbol: str | None = None) -> dict:
+        """
+        Retrieves an order by ID.
+
+        Args:
+            order_id (str): The ID of the order to retrieve.
+            symbol (str | None): The symbol of the order. Defaults to the symbol it was placed for,
+                or the default symbol.
+
+        Returns:
+            dict: The order, as returned by Binance.
+        """
+        return self._signed_request(
+            "GET",
+            "/api/v3/order",
+            {"symbol": self._symbol(order_id, symbol), "orderId": order_id},
+        )
+
+    def get_all_orders(self, symbol: str | None = None) -> list[dict]:
+        """
+        Retrieves the orders of a symbol.
+
+        Args:
+            symbol (str | None): The symbol of the orders. Defaults to the default symbol.
+
+        Returns:
+            list[dict]: The orders, as returned by Binance.
+        """
+        symbol = symbol or self.default_symbol
+        if symbol is None:
+            raise ValueError("A symbol is needed to get all orders")
+        return self._signed_request("GET", "/api/v3/allOrders", {"symbol": symbol})
+
+    def cancel_order_by_id(self, order_id: str, symbol: str | None = None) -> None:
+        """
+        Cancels an order by ID.
+
+        Args:
+            order_id (str): The ID of the order to cancel.
+            symbol (str | None): The symbol of the order. Defaults to the symbol it was placed for,
+                or the default symbol.
+        """
+        self._signed_request(
+            "DELETE",
+            "/api/v3/order",
+            {"symbol": self._symbol(order_id, symbol), "orderId": order_id},
+        )
 
     def get_account(self) -> dict:
-        print("Get account")
-        return {}
+        """
+        Retrieves the account details, including the balances.
+
+        Returns:
+            dict: The account, as returned by Binance.
+        """
+        return self._signed_request("GET", "/api/v3/account", {})
+
+    def close(self) -> None:
+        """
+        Closes the pooled connections.
+        """
+        self.session.close()
@@ -1,16 +1,18 @@
+import json
 import os
-from datetime import datetime
+import queue
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
 import pandas
 from binance import spot
 from enums import INTERVALS
 from ta.utils import dropna
-from utils.utils import datetime_to_timestamp
-
-client = spot.Spot(
-    api_key=os.getenv("BINANCE_API_KEY", None),
-    api_secret=os.getenv("BINANCE_SECRET", None),
-)
+from utils.utils import datetime_to_timestamp, interval_to_seconds
+from websocket import WebSocketApp
 
 BINANCE_KLINE_COLUMNS = [
     "open_time",
@@ -27,8 +29,160 @@ BINANCE_KLINE_COLUMNS = [
     "ignore",
 ]
 
+BINANCE_STREAM_URL = "wss://stream.binance.com:9443"
+STREAM_PING_INTERVAL = 20  # seconds between the pings sent to keep the stream alive
+STREAM_PING_TIMEOUT = 10  # seconds without a pong before the stream counts as lost
+
+MAX_KLINES_PER_REQUEST = 1000  # Binance rejects larger limits
+KLINES_REQUEST_WEIGHT = 2  # request weight of GET /api/v3/klines
+
+
+class RequestWeightLimiter:
+    def __init__(self, weight_per_minute: int) -> None:
+        """
+        Thread-safe token bucket that keeps the used request weight under a budget.
+
+        Args:
+            weight_per_minute (int): The request weight that may be used per minute.
+        """
+        self.weight_per_minute = weight_per_minute
+        self._available = float(weight_per_minute)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, weight: int) -> None:
+        """
+        Blocks until the given request weight fits in the budget, then uses it.
+
+        Args:
+            weight (int): The weight of the request about to be made.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._available = min(
+                    self.weight_per_minute,
+                    self._available
+                    + (now - self._updated_at) * self.weight_per_minute / 60,
+                )
+                self._updated_at = now
+
+                if self._available >= weight:
+                    self._available -= weight
+                    return
+
+                wait = (weight - self._available) * 60 / self.weight_per_minute
+
+            time.sleep(wait)
+
 
 class BinanceMarketData:
+    def __init__(
+        self,
+        binance_client: spot.Spot | None = None,
+        max_workers: int = 8,
+        weight_per_minute: int = 1200,
+        stream_url: str = BINANCE_STREAM_URL,
+    ) -> None:
+        """
+        Args:
+            binance_client (spot.Spot | None): The Binance client to use. Defaults to a client with the
+                BINANCE_API_KEY and BINANCE_SECRET environment variables, created on first use.
+            max_workers (int): The maximum number of pages downloaded concurrently.
+            weight_per_minute (int): The request weight budget used for range downloads.
+            stream_url (str): The base url of the Binance WebSocket streams.
+        """
+        self._client = binance_client
+        self._client_lock = threading.Lock()
+        self.max_workers = max_workers
+        self.limiter = RequestWeightLimiter(weight_per_minute)
+        self.stream_url = stream_url
+
+    @property
+    def client(self) -> spot.Spot:
+        """The Binance client, created on first use, so nothing is set up for providers that are not used."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = spot.Spot(
+                        api_key=os.getenv("BINANCE_API_KEY", None),
+                        api_secret=os.getenv("BINANCE_SECRET", None),
+                    )
+        return self._client
+
+    def _parse_klines(self, klines: list[list]) -> pandas.DataFrame:
+        df = pandas.DataFrame(
+            klines,
+            columns=BINANCE_KLINE_COLUMNS,
+        )
+
+        # Convert values to float
+        df = df.astype(
+            {
+                "open": float,
+                "high": float,
+                "low": float,
+                "close": float,
+                "volume": float,
+                "quote_asset_volume": float,
+                "taker_buy_base_asset_volume": float,
+                "taker_buy_quote_asset_volume": float,
+            }
+        )
+
+        return dropna(df)
+
+    def _get_page(
+        self, symbol: str, interval: INTERVALS, start: int, end: int
+    ) -> list[list]:
+        self.limiter.acquire(KLINES_REQUEST_WEIGHT)
+        return self.client.klines(
+            symbol=symbol,
+            interval=interval,
+            startTime=start,
+            endTime=end,
+            limit=MAX_KLINES_PER_REQUEST,
+        )
+
+    def _get_klines_range(
+        self, symbol: str, interval: INTERVALS, start: int, end: int
+    ) -> pandas.DataFrame:
+        """
+        Downloads all klines that open within [start, end], one page per request.
+
+        The range is split in windows of at most MAX_KLINES_PER_REQUEST klines, which are
+        fetched concurrently and stitched back together in order.
+
+        Args:
+            symbol (str): The symbol to get klines for.
+            interval (INTERVALS): The interval to get klines for.
+            start (int): The start of the range in ms.
+            end (int): The end of the range in ms.
+
+        Returns:
+            pandas.DataFrame: A DataFrame containing klines data.
+        """
+        page_ms = MAX_KLINES_PER_REQUEST * interval_to_seconds(interval) * 1000
+        pages = [
+            (page_start, min(page_start + page_ms - 1, end))
+            for page_start in range(start, end + 1, page_ms)
+        ]
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_workers, len(pages)))
+        ) as executor:
+            results = executor.map(
+                lambda page: self._get_page(symbol, interval, *page), pages
+            )
+            klines = [kline for page_klines in results for kline in page_klines]
+
+        df = self._parse_klines(klines)
+        return (
+            df.drop_duplicates(subset="open_time")
+            .sort_values(by="open_time")
+            .reset_index(drop=True)
+        )
+
     def get_klines(
         self,
         symbol: str,
@@ -37,6 +191,14 @@ class BinanceMarketData:
         start_time: datetime | None = None,
         end_time: datetime | None = None,
     ) -> pandas.DataFrame:
+        """
+        Get klines from Binance.
+
+        With both a start and an end time, all klines in the range are returned.
+        Otherwise at most `limit` klines are returned, counting from the start time,
+        or back from the end time (or now) when no start time is given.
+        Requests that don't fit in a single Binance request are downloaded in pages.
+        """
 
         binance_start_time = None
         if start_time:
@@ -46,31 +208,107 @@ class BinanceMarketData:
         if end_time:
             binance_end_time = datetime_to_timestamp(end_time)
 
-        klines = client.klines(
+        interval_ms = interval_to_seconds(interval) * 1000
+
+        if binance_start_time is not None:
+            if binance_end_time is None:
+                binance_end_time = binance_start_time + limit * interval_ms - 1
+            else:
+                limit = (binance_end_time - binance_start_time) // interval_ms + 1
+
+            if limit > MAX_KLINES_PER_REQUEST:
+                df = self._get_klines_range(
+                    symbol, interval, binance_start_time, binance_end_time
+                )
+                if end_time:
+                    return df
+                return df.head(limit).reset_index(drop=True)
+
+        elif limit > MAX_KLINES_PER_REQUEST:
+            end = binance_end_time or datetime_to_timestamp(
+                datetime.now(tz=timezone.utc)
+            )
+            df = self._get_klines_range(
+                symbol, interval, end - limit * interval_ms + 1, end
+            )
+            return df.tail(limit).reset_index(drop=True)
+
+        klines = self.client.klines(
             symbol=symbol,
             interval=interval,
             startTime=binance_start_time,
             endTime=binance_end_time,
-            limit=limit,
+            limit=min(limit, MAX_KLINES_PER_REQUEST),
         )
 
-        df = pandas.DataFrame(
-            klines,
-            columns=BINANCE_KLINE_COLUMNS,
-        )
+        return self._parse_klines(klines)
 
-        # Convert values to float
-        df = df.astype(
-            {
-                "open": float,
-                "high": float,
-                "low": float,
-                "close": float,
-                "volume": float,
-                "quote_asset_volume": float,
-                "taker_buy_base_asset_volume": float,
-                "taker_buy_quote_asset_volume": float,
-            }
+    def stream_klines(
+        self, symbol: str, interval: INTERVALS
+    ) -> Iterator[pandas.DataFrame]:
+        """
+        Streams klines from the Binance WebSocket kline stream as they close.
+
+        Binance pushes the forming kline every couple of seconds; only the final update
+        of each kline, flagged as closed, is yielded. The socket is read on a daemon
+        thread and closed when the iterator is closed.
+
+        Raises:
+            ConnectionError: When the stream is lost.
+        """
+        events: queue.Queue = queue.Queue()
+
+        def on_message(_: WebSocketApp, message: str) -> None:
+            kline = json.loads(message).get("k")
+            if kline and kline["x"]:
+                events.put(kline)
+
+        def on_error(_: WebSocketApp, error: Exception) -> None:
+            events.put(ConnectionError(f"Kline stream error: {error!r}"))
+
+        def on_close(_: WebSocketApp, *args: object) -> None:
+            events.put(ConnectionError("Kline stream closed"))
+
+        stream = WebSocketApp(
+            f"{self.stream_url}/ws/{symbol.lower()}@kline_{interval}",
+            on_message=on_message,
+            on_error=on_error,
+            on_close=on_close,
+        )
+        thread = threading.Thread(
+            target=stream.run_forever,
+            kwargs={
+                "ping_interval": STREAM_PING_INTERVAL,
+                "ping_timeout": STREAM_PING_TIMEOUT,
+            },
+            daemon=True,
         )
+        thread.start()
 
-        return dropna(df)
+        try:
+            while True:
+                event = events.get()
+                if isinstance(event, ConnectionError):
+                    raise event
+
+                yield self._parse_klines(
+                    [
+                        [
+                            event["t"],
+                            event["o"],
+                            event["h"],
+                            event["l"],
+                            event["c"],
+                            event["v"],
+                            event["T"],
+                            event["q"],
+                            event["n"],
+                            event["V"],
+                            event["Q"],
+                            event["B"],
+                        ]
+                    ]
+                )
+        finally:
+            # The reader thread may sit in select() until its next ping; it exits on its own.
+            stream.close()
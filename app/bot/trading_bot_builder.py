@@ -1,7 +1,21 @@
+from concurrent.futures import Executor
+from copy import deepcopy
+
 from config.config import MainConfig
-from interfaces import CryptoExchangeProtocol, MarketDataProtocol, StrategyProtocol
+from indicators.registry import IndicatorRegistry
+from interfaces import (
+    CryptoExchangeProtocol,
+    EventSinkProtocol,
+    MarketDataProtocol,
+    StrategyProtocol,
+)
+from metrics.latency_recorder import LatencyRecorder
+from position_manager.fixed_point_position_manager import FixedPointPositionManager
+from position_manager.order_journal import OrderJournal
 from position_manager.position_manager import PositionManager
+from position_manager.position_store import PositionStore
 from position_manager.trade_executor import TradeExecutor
+from signals.multi_symbol_signal_processor import MultiSymbolSignalProcessor
 from signals.signal_engine import SignalEngine
 from signals.signal_processor import SignalProcessor
 
@@ -11,15 +25,39 @@ def trading_bot_builder(
     strategies: list[StrategyProtocol],
     market_data_provider: MarketDataProtocol,
     crypto_exchange: CryptoExchangeProtocol | None = None,
+    event_sink: EventSinkProtocol | None = None,
+    latency_recorder: LatencyRecorder | None = None,
+    order_journal: OrderJournal | None = None,
+    position_store: PositionStore | None = None,
+    strategy_executor: Executor | None = None,
+    strategy_timeout: float | None = None,
 ) -> SignalProcessor:
     engine = SignalEngine(
         config=config,
         strategies=strategies,
+        latency_recorder=latency_recorder,
+        executor=strategy_executor,
+        strategy_timeout=strategy_timeout,
+        event_sink=event_sink,
     )
 
-    position_manager = PositionManager(
+    position_manager_class = (
+        FixedPointPositionManager
+        if config.trading_config.fixed_point
+        else PositionManager
+    )
+    position_manager = position_manager_class(
         config=config,
-        trade_executor=TradeExecutor(config=config, crypto_exchange=crypto_exchange),
+        trade_executor=TradeExecutor(
+            config=config,
+            crypto_exchange=crypto_exchange,
+            event_sink=event_sink,
+            latency_recorder=latency_recorder,
+            order_journal=order_journal,
+        ),
+        event_sink=event_sink,
+        latency_recorder=latency_recorder,
+        position_store=position_store,
     )
 
     return SignalProcessor(
@@ -27,4 +65,75 @@ def trading_bot_builder(
         signal_engine=engine,
         market_data=market_data_provider,
         position_manager=position_manager,
+        event_sink=event_sink,
+        latency_recorder=latency_recorder,
+    )
+
+
+def multi_symbol_trading_bot_builder(
+    config: MainConfig,
+    strategies: list[StrategyProtocol],
+    market_data_provider: MarketDataProtocol,
+    crypto_exchange: CryptoExchangeProtocol | None = None,
+    max_workers: int | None = None,
+    event_sink: EventSinkProtocol | None = None,
+    latency_recorder: LatencyRecorder | None = None,
+    order_journal: OrderJournal | None = None,
+    position_store: PositionStore | None = None,
+    strategy_executor: Executor | None = None,
+    strategy_timeout: float | None = None,
+) -> MultiSymbolSignalProcessor:
+    """
+    Builds a bot that trades every symbol in `config.symbols` from a single PositionManager.
+    Each symbol gets its own copy of the strategies, since strategies keep per-symbol state.
+    The signal engines of all symbols share the strategy executor, if any, and one indicator registry.
+    """
+    position_manager_class = (
+        FixedPointPositionManager
+        if config.trading_config.fixed_point
+        else PositionManager
+    )
+    position_manager = position_manager_class(
+        config=config,
+        trade_executor=TradeExecutor(
+            config=config,
+            crypto_exchange=crypto_exchange,
+            event_sink=event_sink,
+            latency_recorder=latency_recorder,
+            order_journal=order_journal,
+        ),
+        event_sink=event_sink,
+        latency_recorder=latency_recorder,
+        position_store=position_store,
+    )
+
+    indicators = IndicatorRegistry()
+    processors = []
+    for symbol in config.symbols:
+        symbol_config = config.copy(update={"symbol": symbol})
+        engine = SignalEngine(
+            config=symbol_config,
+            strategies=[deepcopy(strategy) for strategy in strategies],
+            latency_recorder=latency_recorder,
+            executor=strategy_executor,
+            strategy_timeout=strategy_timeout,
+            event_sink=event_sink,
+            indicators=indicators,
+        )
+        processors.append(
+            SignalProcessor(
+                config=symbol_config,
+                signal_engine=engine,
+                market_data=market_data_provider,
+                position_manager=position_manager,
+                event_sink=event_sink,
+                latency_recorder=latency_recorder,
+            )
+        )
+
+    return MultiSymbolSignalProcessor(
+        config=config,
+        processors=processors,
+        position_manager=position_manager,
+        max_workers=max_workers,
     )
@@ -2,7 +2,7 @@ from datetime import datetime
 from decimal import Decimal
 
 from enums import INTERVALS
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 
 
 class MarketDataConfig(BaseModel):
@@ -18,12 +18,24 @@ class TradingConfig(BaseModel):
     max_amount_open_positions: int = 1  # maximum number of open positions
     stop_loss_percentage: Decimal = Decimal("0.95")  # stop loss percentage
     take_profit_percentage: Decimal = Decimal("1.1")  # take profit percentage
+    fixed_point: bool = False  # account in scaled integers instead of Decimal
+    tick_sizes: dict[str, Decimal] = {}  # price increment per symbol, for fixed point
+    step_sizes: dict[
+        str, Decimal
+    ] = {}  # quantity increment per symbol, for fixed point
 
 
 class MainConfig(BaseModel):
     backtest: bool = False  # whether to run in backtest mode
     symbol: str  # symbol to trade
+    symbols: list[str] = []  # symbols to trade from one bot, defaults to [symbol]
     polling_interval_weight: float = 1
 
     market_data_config: MarketDataConfig  # market data config
     trading_config: TradingConfig  # trading config
+
+    @validator("symbols", always=True)
+    def default_symbols(cls, symbols: list[str], values: dict) -> list[str]:
+        if not symbols and "symbol" in values:
+            return [values["symbol"]]
+        return symbols
@@ -7,6 +7,7 @@ from utils.utils import y_m_d_to_datetime
 
 def config_builder(
     symbol: str = "BTCUSDT",
+    symbols: list[str] | None = None,
     interval: INTERVALS = "1h",
     limit: int = 1000,
     starting_balance: str = "10000",
@@ -16,6 +17,7 @@ def config_builder(
     polling_interval_weight: float = 1.0,
     start_date: str | None = None,
     end_date: str | None = None,
+    fixed_point: bool = False,
 ) -> MainConfig:
     market_data_config = MarketDataConfig(
         interval=interval,
@@ -28,11 +30,13 @@ def config_builder(
         starting_balance=Decimal(starting_balance),
         notional=Decimal(notional),
         max_amount_open_positions=max_amount_open_positions,
+        fixed_point=fixed_point,
     )
 
     return MainConfig(
         backtest=backtest,
         symbol=symbol,
+        symbols=symbols or [symbol],
         polling_interval_weight=polling_interval_weight,
         market_data_config=market_data_config,
         trading_config=trading_config,
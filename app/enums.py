@@ -1,4 +1,4 @@
-from enum import StrEnum
+from enum import IntEnum, StrEnum
 from typing import Literal
 
 
@@ -22,6 +22,14 @@ class TimeInForce(StrEnum):
     FOK = "FOK"  # Fill or Kill
 
 
+class EventLevel(IntEnum):
+    DEBUG = 10  # per kline and per signal details
+    INFO = 20  # orders
+    SUMMARY = 30  # results at the end of a run
+    WARNING = 40
+    ERROR = 50
+
+
 INTERVALS = Literal[
     "1s",
     "1m",
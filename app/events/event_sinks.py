@@ -0,0 +1,145 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+from enums import EventLevel
+from interfaces import EventSinkProtocol
+
+
+class NullEventSink:
+    """
+    Drops every event, for runs that only care about the returned results, such as sweeps.
+    """
+
+    def enabled(self, level: EventLevel) -> bool:
+        return False
+
+    def emit(self, level: EventLevel, event: str, fields: dict[str, Any]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class ConsoleEventSink:
+    def __init__(self, level: EventLevel = EventLevel.DEBUG) -> None:
+        """
+        Prints events to stdout, one "label:  value" line per field.
+
+        Args:
+            level (EventLevel): The lowest level that is printed.
+        """
+        self.level = level
+
+    def enabled(self, level: EventLevel) -> bool:
+        return level >= self.level
+
+    def emit(self, level: EventLevel, event: str, fields: dict[str, Any]) -> None:
+        if level < self.level:
+            return
+
+        print("-" * 50)
+        print(f"[{level.name}] {event}")
+        for label, value in fields.items():
+            print(f"{label}: ", value)
+
+    def close(self) -> None:
+        pass
+
+
+class FileEventSink:
+    def __init__(
+        self,
+        path: str,
+        level: EventLevel = EventLevel.DEBUG,
+        flush_interval: float = 1.0,
+    ) -> None:
+        """
+        Appends events to a file as JSON lines, from a background thread.
+
+        Emitting only puts the event on a queue, so the hot loops never wait for
+        formatting or disk I/O. The thread writes the events in batches.
+
+        Args:
+            path (str): The path of the file to append to.
+            level (EventLevel): The lowest level that is written.
+            flush_interval (float): The maximum number of seconds between two flushes to disk.
+        """
+        self.path = path
+        self.level = level
+        self.flush_interval = flush_interval
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._file = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._write_events, daemon=True)
+        self._thread.start()
+
+    def enabled(self, level: EventLevel) -> bool:
+        return level >= self.level
+
+    def emit(self, level: EventLevel, event: str, fields: dict[str, Any]) -> None:
+        if level < self.level:
+            return
+        self._queue.put((time.time(), level, event, fields))
+
+    def _write_event(self, item: tuple) -> None:
+        timestamp, level, event, fields = item
+        self._file.write(
+            json.dumps(
+                {
+                    "time": datetime.fromtimestamp(
+                        timestamp, tz=timezone.utc
+                    ).isoformat(),
+                    "level": level.name,
+                    "event": event,
+                    "fields": fields,
+                },
+                default=str,
+            )
+        )
+        self._file.write("\n")
+
+    def _write_events(self) -> None:
+        flushed_at = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+
+            if item is None:
+                break
+            if item:
+                self._write_event(item)
+
+            if time.monotonic() - flushed_at >= self.flush_interval:
+                self._file.flush()
+                flushed_at = time.monotonic()
+
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._file.close()
+
+
+def event_sink_from_settings(level: str, path: str | None = None) -> EventSinkProtocol:
+    """
+    Builds the event sink of the bot from its settings.
+
+    Args:
+        level (str): The name of the lowest level to record, e.g. "SUMMARY", or "OFF" to record nothing.
+        path (str | None): The file to write the events to. Defaults to the console.
+
+    Returns:
+        EventSinkProtocol: The event sink.
+    """
+    if level.upper() == "OFF":
+        return NullEventSink()
+    if path:
+        return FileEventSink(path, EventLevel[level.upper()])
+    return ConsoleEventSink(EventLevel[level.upper()])
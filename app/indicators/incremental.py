@@ -0,0 +1,273 @@
+from typing import Any
+
+import numpy
+import pandas
+
+
+class EMA:
+    def __init__(
+        self,
+        window: int,
+        alpha: float | None = None,
+        min_periods: int | None = None,
+    ) -> None:
+        """
+        Exponential moving average that is updated one value at a time.
+
+        Matches `series.ewm(span=window, min_periods=window, adjust=False).mean()`,
+        which is what the `ta` library uses internally.
+
+        Args:
+            window (int): The window of the moving average.
+            alpha (float | None): The smoothing factor. Defaults to 2 / (window + 1).
+            min_periods (int | None): Observations needed before a value is returned. Defaults to window.
+        """
+        self.window = window
+        self.alpha = alpha if alpha is not None else 2 / (window + 1)
+        self.min_periods = min_periods if min_periods is not None else window
+        self.reset()
+
+    def reset(self) -> None:
+        """Clears the running state."""
+        self._count = 0
+        self._mean = 0.0
+        self._prev_count = 0
+        self._prev_mean = 0.0
+
+    @property
+    def value(self) -> float | None:
+        """The current value, or None while warming up."""
+        if self._count < self.min_periods:
+            return None
+        return self._mean
+
+    @property
+    def previous(self) -> float | None:
+        """The value before the last update, or None while warming up."""
+        if self._prev_count < self.min_periods:
+            return None
+        return self._prev_mean
+
+    def update(self, value: float, replace: bool = False) -> float | None:
+        """
+        Feeds a new value to the moving average.
+
+        Args:
+            value (float): The new value.
+            replace (bool): Whether the value replaces the last one instead of being appended.
+
+        Returns:
+            float | None: The updated value, or None while warming up.
+        """
+        if not replace:
+            self._prev_count = self._count
+            self._prev_mean = self._mean
+
+        if self._prev_count == 0:
+            self._mean = value
+        else:
+            self._mean = self._prev_mean + self.alpha * (value - self._prev_mean)
+
+        self._count = self._prev_count + 1
+        return self.value
+
+
+class MACD:
+    def __init__(self, window_fast: int, window_slow: int, window_sign: int) -> None:
+        """
+        MACD line and signal line that are updated one value at a time.
+
+        Matches `ta.trend.MACD(..., fillna=False).macd()` and `.macd_signal()`.
+
+        Args:
+            window_fast (int): The window of the fast moving average.
+            window_slow (int): The window of the slow moving average.
+            window_sign (int): The window of the signal line.
+        """
+        self._fast = EMA(window_fast)
+        self._slow = EMA(window_slow)
+        self._sign = EMA(window_sign)
+        self.reset()
+
+    def reset(self) -> None:
+        """Clears the running state."""
+        self._fast.reset()
+        self._slow.reset()
+        self._sign.reset()
+        self.macd: float | None = None
+        self.previous_macd: float | None = None
+
+    @property
+    def signal(self) -> float | None:
+        """The current signal line value, or None while warming up."""
+        return self._sign.value
+
+    @property
+    def previous_signal(self) -> float | None:
+        """The signal line value before the last update, or None while warming up."""
+        return self._sign.previous
+
+    def update(self, value: float, replace: bool = False) -> float | None:
+        """
+        Feeds a new close price to the MACD.
+
+        Args:
+            value (float): The new close price.
+            replace (bool): Whether the value replaces the last one instead of being appended.
+
+        Returns:
+            float | None: The updated MACD line, or None while warming up.
+        """
+        if not replace:
+            self.previous_macd = self.macd
+
+        fast = self._fast.update(value, replace)
+        slow = self._slow.update(value, replace)
+
+        if fast is None or slow is None:
+            self.macd = None
+            return None
+
+        self.macd = fast - slow
+        self._sign.update(self.macd, replace)
+        return self.macd
+
+
+class RSI:
+    def __init__(self, window: int) -> None:
+        """
+        Relative strength index that is updated one value at a time.
+
+        Matches `ta.momentum.rsi(close, window, fillna=False)`.
+
+        Args:
+            window (int): The window of the RSI.
+        """
+        self.window = window
+        self._up = EMA(window, alpha=1 / window)
+        self._down = EMA(window, alpha=1 / window)
+        self.reset()
+
+    def reset(self) -> None:
+        """Clears the running state."""
+        self._up.reset()
+        self._down.reset()
+        self._last_close: float | None = None
+        self._prev_close: float | None = None
+        self.value: float | None = None
+        self.previous: float | None = None
+
+    def update(self, value: float, replace: bool = False) -> float | None:
+        """
+        Feeds a new close price to the RSI.
+
+        Args:
+            value (float): The new close price.
+            replace (bool): Whether the value replaces the last one instead of being appended.
+
+        Returns:
+            float | None: The updated RSI, or None while warming up.
+        """
+        if not replace:
+            self._prev_close = self._last_close
+            self.previous = self.value
+
+        diff = 0.0 if self._prev_close is None else value - self._prev_close
+        self._last_close = value
+
+        up = self._up.update(diff if diff > 0 else 0.0, replace)
+        down = self._down.update(-diff if diff < 0 else 0.0, replace)
+
+        if up is None or down is None:
+            self.value = None
+        elif down == 0:
+            self.value = 100.0
+        else:
+            self.value = 100 - (100 / (1 + up / down))
+
+        return self.value
+
+
+def find_key(keys: numpy.ndarray, key: Any) -> int | None:
+    """
+    Finds the position of the last fed row in the given keys, looking at the last rows first.
+
+    Args:
+        keys (numpy.ndarray): The ascending row keys of the DataFrame.
+        key (Any): The key of the last fed row, or None if no row was fed.
+
+    Returns:
+        int | None: The position of the last fed row, or None if it is not present.
+    """
+    if key is None or len(keys) == 0:
+        return None
+
+    # Fast paths for the common cases: nothing new, or a single new row.
+    if keys[-1] == key:
+        return len(keys) - 1
+    if len(keys) > 1 and keys[-2] == key:
+        return len(keys) - 2
+
+    position = int(numpy.searchsorted(keys, key))
+    if position < len(keys) and keys[position] == key:
+        return position
+    return None
+
+
+class IndicatorFeed:
+    def __init__(self, *indicators: EMA | MACD | RSI, column: str = "close") -> None:
+        """
+        Keeps a set of incremental indicators in sync with a growing klines DataFrame.
+
+        Each call to `sync` only feeds the rows that were not seen before, so strategies
+        can keep calling `analyze` with the full DataFrame while paying O(1) per new kline.
+        Rows are identified by `open_time` when available, otherwise by the DataFrame index.
+        A still-forming last kline whose value changed is replaced instead of appended.
+
+        Args:
+            indicators (EMA | MACD | RSI): The indicators to feed.
+            column (str): The DataFrame column to feed to the indicators.
+        """
+        self.indicators = indicators
+        self.column = column
+        self.reset()
+
+    def reset(self) -> None:
+        """Clears the running state of the feed and its indicators."""
+        for indicator in self.indicators:
+            indicator.reset()
+        self._last_key: Any = None
+        self._last_value: float | None = None
+
+    def _feed(self, value: float, replace: bool = False) -> None:
+        for indicator in self.indicators:
+            indicator.update(value, replace)
+        self._last_value = value
+
+    def sync(self, df: pandas.DataFrame) -> None:
+        """
+        Feeds the rows of the DataFrame that were not fed before.
+
+        Args:
+            df (pandas.DataFrame): A DataFrame containing klines data.
+        """
+        if df.empty:
+            return
+
+        keys = df["open_time"].to_numpy() if "open_time" in df else df.index.to_numpy()
+        values = df[self.column].to_numpy(dtype=float)
+
+        position = find_key(keys, self._last_key)
+        if position is None:
+            # Unknown or non-contiguous data: warm up from scratch.
+            self.reset()
+            start = 0
+        else:
+            if values[position] != self._last_value:
+                self._feed(float(values[position]), replace=True)
+            start = position + 1
+
+        for value in values[start:]:
+            self._feed(float(value))
+
+        self._last_key = keys[-1]
@@ -0,0 +1,278 @@
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+import numpy
+import pandas
+from enums import INTERVALS
+from indicators.incremental import EMA, MACD, RSI, IndicatorFeed
+from market_data.resampling import TimeframeAggregator
+
+# The batch indicators import `ta` on first use: live bots only need the incremental indicators.
+
+
+def _batch_ema(close: pandas.Series, window: int) -> dict[str, numpy.ndarray]:
+    from ta import trend
+
+    return {"ema": trend.ema_indicator(close, window=window, fillna=False).to_numpy()}
+
+
+def _batch_macd(
+    close: pandas.Series, window_fast: int, window_slow: int, window_sign: int
+) -> dict[str, numpy.ndarray]:
+    from ta import trend
+
+    macd = trend.MACD(
+        close=close,
+        window_fast=window_fast,
+        window_slow=window_slow,
+        window_sign=window_sign,
+        fillna=False,
+    )
+    return {"macd": macd.macd().to_numpy(), "signal": macd.macd_signal().to_numpy()}
+
+
+def _batch_rsi(close: pandas.Series, window: int) -> dict[str, numpy.ndarray]:
+    from ta import momentum
+
+    return {"rsi": momentum.rsi(close=close, window=window, fillna=False).to_numpy()}
+
+
+# The incremental indicators by name, and the functions computing the same indicator over a whole
+# column. Both take the parameters of the indicator as keyword arguments.
+INCREMENTAL_INDICATORS: dict[str, Callable[..., EMA | MACD | RSI]] = {
+    "ema": EMA,
+    "macd": MACD,
+    "rsi": RSI,
+}
+BATCH_INDICATORS: dict[str, Callable[..., dict[str, numpy.ndarray]]] = {
+    "ema": _batch_ema,
+    "macd": _batch_macd,
+    "rsi": _batch_rsi,
+}
+
+
+def data_version(df: pandas.DataFrame, column: str = "close") -> tuple:
+    """
+    Identifies the klines of a DataFrame: their number, the first and the last row key, and a CRC of
+    the values of the column. The CRC tells apart klines that were fetched again with other values,
+    and costs about a millisecond per million klines.
+
+    Args:
+        df (pandas.DataFrame): A DataFrame containing klines data.
+        column (str): The column the indicators are computed over.
+
+    Returns:
+        tuple: The version of the data.
+    """
+    if df.empty:
+        return (0,)
+    keys = df["open_time"].to_numpy() if "open_time" in df else df.index.to_numpy()
+    values = numpy.ascontiguousarray(df[column].to_numpy())
+    return (len(df), keys[0], keys[-1], zlib.crc32(values.data))
+
+
+class SharedIndicatorFeed(IndicatorFeed):
+    def __init__(self, *indicators: EMA | MACD | RSI, column: str = "close") -> None:
+        """
+        An indicator feed shared by the strategies that use the same indicator.
+
+        The strategies of a cycle are handed the same DataFrame, so only the first `sync` of a cycle
+        feeds the new klines, and the others return at once. A DataFrame must not be modified after
+        it was synced. Syncs are serialized, so strategies analyzed concurrently can share a feed.
+
+        Args:
+            indicators (EMA | MACD | RSI): The indicators to feed.
+            column (str): The DataFrame column to feed to the indicators.
+        """
+        self._lock = threading.Lock()
+        super().__init__(*indicators, column=column)
+
+    def reset(self) -> None:
+        """Clears the running state of the feed and its indicators."""
+        super().reset()
+        self._synced_df: pandas.DataFrame | None = None
+
+    def sync(self, df: pandas.DataFrame) -> None:
+        """
+        Feeds the rows of the DataFrame that were not fed before, unless it was the last one synced.
+
+        Args:
+            df (pandas.DataFrame): A DataFrame containing klines data.
+        """
+        if df is self._synced_df:
+            return
+        with self._lock:
+            if df is self._synced_df:
+                return
+            super().sync(df)
+            self._synced_df = df
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Strategies are pickled for process pools, and copied for every symbol.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_synced_df"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class IndicatorRegistry:
+    def __init__(self, max_entries: int = 256) -> None:
+        """
+        Memoizes the indicators of the strategies, so strategies that use the same indicator on the
+        same klines compute it once.
+
+        Klines of higher intervals are built from the klines of the strategies the same way.
+
+        Entries are keyed by indicator, parameters, symbol and interval. Incremental indicators are
+        shared through a SharedIndicatorFeed, which extends with every new kline instead of being
+        computed again. Indicators computed over a whole DataFrame, for vectorized backtests, are
+        also keyed by the version of the data. The least recently used entries are evicted beyond
+        `max_entries`; strategies holding an evicted feed keep using it.
+
+        Args:
+            max_entries (int): The number of entries kept.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get_or_create(self, key: Hashable, create: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        value = create()
+
+        with self._lock:
+            if key in self._entries:
+                # Another thread created it meanwhile, keep the first one so it stays shared.
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def feed(
+        self,
+        name: str,
+        symbol: str,
+        interval: str,
+        column: str = "close",
+        **params: Any,
+    ) -> SharedIndicatorFeed:
+        """
+        Gets the shared feed of an incremental indicator, creating it on first use.
+
+        Args:
+            name (str): The name of the indicator, a key of INCREMENTAL_INDICATORS.
+            symbol (str): The symbol of the klines.
+            interval (str): The interval of the klines.
+            column (str): The DataFrame column to feed to the indicator.
+            params (Any): The parameters of the indicator.
+
+        Returns:
+            SharedIndicatorFeed: The feed, whose only indicator is `feed.indicators[0]`.
+        """
+        key = ("feed", name, tuple(sorted(params.items())), symbol, interval, column)
+        return self._get_or_create(
+            key,
+            lambda: SharedIndicatorFeed(
+                INCREMENTAL_INDICATORS[name](**params), column=column
+            ),
+        )
+
+    def series(
+        self,
+        name: str,
+        df: pandas.DataFrame,
+        symbol: str,
+        interval: str,
+        column: str = "close",
+        **params: Any,
+    ) -> dict[str, numpy.ndarray]:
+        """
+        Gets an indicator computed for every row of the DataFrame, computing it on first use.
+
+        Args:
+            name (str): The name of the indicator, a key of BATCH_INDICATORS.
+            df (pandas.DataFrame): A DataFrame containing klines data.
+            symbol (str): The symbol of the klines.
+            interval (str): The interval of the klines.
+            column (str): The DataFrame column the indicator is computed over.
+            params (Any): The parameters of the indicator.
+
+        Returns:
+            dict[str, numpy.ndarray]: The read-only values of the indicator, by output name.
+        """
+        key = (
+            "series",
+            name,
+            tuple(sorted(params.items())),
+            symbol,
+            interval,
+            column,
+            data_version(df, column),
+        )
+
+        def compute() -> dict[str, numpy.ndarray]:
+            outputs = BATCH_INDICATORS[name](df[column], **params)
+            for values in outputs.values():
+                values.flags.writeable = False
+            return outputs
+
+        return self._get_or_create(key, compute)
+
+    def klines(
+        self,
+        df: pandas.DataFrame,
+        symbol: str,
+        base_interval: INTERVALS,
+        interval: INTERVALS,
+    ) -> pandas.DataFrame:
+        """
+        Gets the klines of a higher interval, built from the klines of the base interval instead of
+        being fetched. They are kept current by a shared TimeframeAggregator, in O(1) per new base kline.
+
+        Args:
+            df (pandas.DataFrame): Klines of the base interval, sorted by open time.
+            symbol (str): The symbol of the klines.
+            base_interval (INTERVALS): The interval of the klines.
+            interval (INTERVALS): The interval to build.
+
+        Returns:
+            pandas.DataFrame: The klines of the interval, the last one possibly still forming.
+                Valid until the next kline is synced.
+        """
+        aggregator = self._get_or_create(
+            ("klines", symbol, base_interval, interval),
+            lambda: TimeframeAggregator(base_interval, interval),
+        )
+        aggregator.sync(df)
+        return aggregator.to_frame()
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __reduce__(self) -> tuple:
+        # Only a cache: a pickled registry, sent along with a strategy to a process pool, starts empty.
+        return (IndicatorRegistry, (self.max_entries,))
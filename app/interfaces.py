@@ -1,10 +1,18 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
 from datetime import datetime
-from typing import Protocol
+from typing import TYPE_CHECKING, Any, Protocol
+
+from enums import INTERVALS, EventLevel
 
-import pandas
-from config.config import MainConfig
-from enums import INTERVALS
-from schemas import CreateOrderSchema, OrderSchema, Signal
+# Only needed by the annotations: importing the protocols stays cheap, see tests/utils/test_startup.py.
+if TYPE_CHECKING:
+    import numpy
+    import pandas
+    from config.config import MainConfig
+    from indicators.registry import IndicatorRegistry
+    from schemas import BatchSignals, CreateOrderSchema, OrderSchema, Signal
 
 
 class MarketDataProtocol(Protocol):
@@ -32,6 +40,26 @@ class MarketDataProtocol(Protocol):
         ...
 
 
+class StreamingMarketDataProtocol(MarketDataProtocol, Protocol):
+    def stream_klines(
+        self, symbol: str, interval: INTERVALS
+    ) -> Iterator[pandas.DataFrame]:
+        """
+        Streams klines from the exchange as they close.
+
+        This method is optional: without it, the signal processor polls `get_klines` instead.
+        The iterator should raise a ConnectionError when the stream is lost, so it can be reopened.
+
+        Args:
+            symbol (str): The symbol to stream klines for.
+            interval (INTERVALS): The interval to stream klines for.
+
+        Returns:
+            Iterator[pandas.DataFrame]: One single-row DataFrame per closed kline, with the columns of `get_klines`.
+        """
+        ...
+
+
 class CryptoExchangeProtocol(Protocol):
     def create_order(self, payload: CreateOrderSchema) -> OrderSchema:
         """
@@ -85,6 +113,32 @@ class CryptoExchangeProtocol(Protocol):
         ...
 
 
+class SimulatedExchangeProtocol(CryptoExchangeProtocol, Protocol):
+    simulated: bool  # orders are filled in process, also when backtesting
+
+    def on_bars(
+        self,
+        symbol: str,
+        opens: numpy.ndarray,
+        highs: numpy.ndarray,
+        lows: numpy.ndarray,
+        closes: numpy.ndarray,
+        volumes: numpy.ndarray | None = None,
+    ) -> None:
+        """
+        Matches the resting orders of a symbol against consecutive bars.
+
+        This method is optional: backtests feed their bars to an exchange that has it, so the orders
+        are filled by the market data, and only hand it their orders otherwise.
+
+        Args:
+            symbol (str): The symbol of the bars.
+            opens, highs, lows, closes (numpy.ndarray): The prices of the bars.
+            volumes (numpy.ndarray | None): The volumes of the bars, which may limit the liquidity.
+        """
+        ...
+
+
 class StrategyProtocol(Protocol):
     def initialize(
         self,
@@ -109,3 +163,66 @@ class StrategyProtocol(Protocol):
             Signal | None: A Signal object if conditions are met, otherwise None.
         """
         ...
+
+
+class BatchStrategyProtocol(StrategyProtocol, Protocol):
+    def analyze_batch(self, df: pandas.DataFrame) -> BatchSignals | None:
+        """
+        Analyzes the whole klines DataFrame at once, for vectorized backtests.
+
+        This method is optional: strategies that don't implement it are analyzed bar by bar.
+        The signal at a row may only depend on that row and the rows before it.
+
+        Args:
+            df (pandas.DataFrame): A DataFrame containing klines data.
+
+        Returns:
+            BatchSignals | None: The per-bar signals, or None if batch analysis is not supported.
+        """
+        ...
+
+
+class IndicatorStrategyProtocol(StrategyProtocol, Protocol):
+    def bind_indicators(self, indicators: IndicatorRegistry) -> None:
+        """
+        Gets the indicators of the strategy from the registry of the signal engine, after `initialize`.
+
+        This method is optional: strategies that don't implement it compute their own indicators.
+        Sharing the indicators through the registry lets strategies that use the same indicator on
+        the same klines compute it once.
+
+        Args:
+            indicators (IndicatorRegistry): The indicator registry.
+        """
+        ...
+
+
+class EventSinkProtocol(Protocol):
+    def enabled(self, level: EventLevel) -> bool:
+        """
+        Checks whether events of a level are recorded, so callers can skip building them.
+
+        Args:
+            level (EventLevel): The level of the event.
+
+        Returns:
+            bool: True if events of this level are recorded.
+        """
+        ...
+
+    def emit(self, level: EventLevel, event: str, fields: dict[str, Any]) -> None:
+        """
+        Records an event. Events below the level of the sink are dropped.
+
+        Args:
+            level (EventLevel): The level of the event.
+            event (str): The name of the event, e.g. "kline" or "order".
+            fields (dict[str, Any]): The values of the event, by label. They should not be mutated afterwards.
+        """
+        ...
+
+    def close(self) -> None:
+        """
+        Writes the pending events and releases the resources of the sink.
+        """
+        ...
@@ -0,0 +1,339 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy
+import pandas
+from enums import INTERVALS
+from interfaces import MarketDataProtocol
+from utils.utils import (
+    datetime_to_timestamp,
+    interval_to_seconds,
+    timestamp_to_utc_datetime,
+)
+
+
+def merge_klines(*frames: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    Merges klines DataFrames, keeping the last version of each kline, sorted by open_time.
+    """
+    frames = tuple(frame for frame in frames if not frame.empty)
+    if not frames:
+        return pandas.DataFrame()
+
+    return (
+        pandas.concat(frames)
+        .drop_duplicates(subset="open_time", keep="last")
+        .sort_values(by="open_time")
+        .reset_index(drop=True)
+    )
+
+
+class KlineCacheEntry:
+    def __init__(
+        self,
+        klines: pandas.DataFrame | None = None,
+        coverage: list[tuple[int, int]] | None = None,
+    ) -> None:
+        """
+        The closed klines cached for a single (symbol, interval).
+
+        Args:
+            klines (pandas.DataFrame | None): The closed klines, sorted by open_time.
+            coverage (list[tuple[int, int]] | None): The sorted, disjoint open_time ranges (in ms) that were fetched.
+        """
+        self.klines = klines if klines is not None else pandas.DataFrame()
+        self.coverage = coverage or []
+
+    def missing_ranges(self, start: int, end: int) -> list[tuple[int, int]]:
+        """
+        Returns the open_time ranges within [start, end] that were never fetched.
+
+        Args:
+            start (int): The start of the range in ms.
+            end (int): The end of the range in ms.
+
+        Returns:
+            list[tuple[int, int]]: The missing ranges.
+        """
+        missing = []
+        cursor = start
+        for covered_start, covered_end in self.coverage:
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start - 1))
+            cursor = max(cursor, covered_end + 1)
+
+        if cursor <= end:
+            missing.append((cursor, end))
+        return missing
+
+    def window(self, start: int, end: int) -> pandas.DataFrame:
+        """
+        Returns the cached klines that opened within [start, end], found by binary search.
+
+        Args:
+            start (int): The start of the range in ms.
+            end (int): The end of the range in ms.
+
+        Returns:
+            pandas.DataFrame: The klines, a slice of the cached klines.
+        """
+        if self.klines.empty:
+            return self.klines
+        open_times = self.klines["open_time"].to_numpy()
+        first = int(numpy.searchsorted(open_times, start, side="left"))
+        last = int(numpy.searchsorted(open_times, end, side="right"))
+        return self.klines.iloc[first:last]
+
+    def add(
+        self, klines: pandas.DataFrame, covered: tuple[int, int] | None = None
+    ) -> None:
+        """
+        Adds fetched closed klines to the entry and marks their range as fetched.
+
+        Klines after the cached ones, like those of a live poll, are appended. Others are merged.
+
+        Args:
+            klines (pandas.DataFrame): The closed klines fetched for the range.
+            covered (tuple[int, int] | None): The open_time range (in ms) that is now fully fetched, if any.
+        """
+        if self.klines.empty:
+            self.klines = klines.reset_index(drop=True)
+        elif not klines.empty:
+            if klines["open_time"].iloc[0] > self.klines["open_time"].iloc[-1]:
+                self.klines = pandas.concat((self.klines, klines), ignore_index=True)
+            else:
+                self.klines = merge_klines(self.klines, klines)
+
+        if covered is None:
+            return
+
+        coverage: list[tuple[int, int]] = []
+        for covered_start, covered_end in sorted([*self.coverage, covered]):
+            if coverage and covered_start <= coverage[-1][1] + 1:
+                coverage[-1] = (coverage[-1][0], max(coverage[-1][1], covered_end))
+            else:
+                coverage.append((covered_start, covered_end))
+        self.coverage = coverage
+
+
+class CachingMarketData:
+    def __init__(
+        self,
+        market_data: MarketDataProtocol,
+        cache_dir: str | Path | None = None,
+        max_memory_entries: int = 32,
+    ) -> None:
+        """
+        Wraps a market data provider with a memory and an on-disk cache of closed klines.
+
+        Closed klines never change, so they are kept per (symbol, interval) and only the
+        time ranges that were never fetched are requested from the wrapped provider.
+        Klines that are still forming are always fetched again.
+
+        The file of an entry is append-only: every request that fetched closed klines appends them
+        with the fetched ranges, so a poll writes only its new klines. The file is rewritten as a
+        whole when it is loaded.
+
+        Closed klines are streamed by the wrapped provider, if it streams: `stream_klines` is only
+        defined then, like the signal processor expects of a provider that can't stream.
+
+        Args:
+            market_data (MarketDataProtocol): The market data provider to wrap.
+            cache_dir (str | Path | None): The directory of the on-disk cache. If None, only the memory cache is used.
+            max_memory_entries (int): The number of (symbol, interval) entries kept in memory.
+        """
+        self.market_data = market_data
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_entries = max_memory_entries
+
+        self._entries: OrderedDict[tuple[str, str], KlineCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: defaultdict[tuple[str, str], threading.Lock] = defaultdict(
+            threading.Lock
+        )
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        if (stream_klines := getattr(market_data, "stream_klines", None)) is not None:
+            self.stream_klines = stream_klines
+
+    def _now(self) -> int:
+        return datetime_to_timestamp(datetime.now(tz=timezone.utc))
+
+    def _cache_path(self, symbol: str, interval: str) -> Path | None:
+        if not self.cache_dir:
+            return None
+        # "1m" and "1M" would clash on case-insensitive file systems.
+        interval_name = interval.replace("M", "mo")
+        return self.cache_dir / f"{symbol}_{interval_name}.pkl"
+
+    def _get_entry(self, symbol: str, interval: str) -> KlineCacheEntry:
+        """
+        Gets the cache entry from memory, falling back to disk.
+        """
+        key = (symbol, interval)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        entry = KlineCacheEntry()
+        path = self._cache_path(symbol, interval)
+        if path and path.exists():
+            entry = self._load_entry(path)
+            self._save_entry(symbol, interval, entry)
+
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_memory_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _load_entry(self, path: Path) -> KlineCacheEntry:
+        """
+        Reads a cache entry from its file: the klines of all its records, and the ranges of the last one.
+        A partially written last record, left by a crash, is dropped.
+        """
+        frames = []
+        coverage: list[tuple[int, int]] = []
+        with path.open("rb") as file:
+            while True:
+                try:
+                    record = pickle.load(file)
+                except (EOFError, pickle.UnpicklingError):
+                    break
+                frames.append(record["klines"])
+                coverage = record["coverage"]
+        return KlineCacheEntry(merge_klines(*frames), coverage)
+
+    def _append_entry(
+        self,
+        symbol: str,
+        interval: str,
+        entry: KlineCacheEntry,
+        klines: pandas.DataFrame,
+    ) -> None:
+        """
+        Appends klines added to the cache entry to its file, with the ranges fetched so far.
+        """
+        path = self._cache_path(symbol, interval)
+        if not path:
+            return
+
+        with path.open("ab") as file:
+            pickle.dump(
+                {"klines": klines, "coverage": entry.coverage},
+                file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+    def _save_entry(self, symbol: str, interval: str, entry: KlineCacheEntry) -> None:
+        """
+        Writes the cache entry to disk as a single record, atomically replacing the previous file.
+        """
+        path = self._cache_path(symbol, interval)
+        if not path:
+            return
+
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("wb") as file:
+            pickle.dump(
+                {"klines": entry.klines, "coverage": entry.coverage},
+                file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, path)
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: INTERVALS,
+        limit: int,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+    ) -> pandas.DataFrame:
+        """
+        Get klines, fetching only the ranges that are not cached from the wrapped provider.
+
+        Args:
+            symbol (str): The symbol to get klines for.
+            interval (INTERVALS): The interval to get klines for.
+            limit (int): The maximum number of klines to return.
+            start_time (datetime | None): The start time for the klines. If None, the latest klines are returned.
+            end_time (datetime | None): The end time for the klines. If None, will use the latest available time.
+
+        Returns:
+            pandas.DataFrame: A DataFrame containing klines data.
+        """
+        now = self._now()
+        interval_ms = interval_to_seconds(interval) * 1000
+
+        if start_time:
+            start = datetime_to_timestamp(start_time)
+            end = (
+                datetime_to_timestamp(end_time)
+                if end_time
+                else start + limit * interval_ms
+            )
+        else:
+            end = datetime_to_timestamp(end_time) if end_time else now
+            start = end - limit * interval_ms
+        end = min(end, now)
+
+        with self._lock:
+            key_lock = self._key_locks[(symbol, interval)]
+
+        forming_klines = []
+        added_klines = []
+        with key_lock:
+            entry = self._get_entry(symbol, interval)
+            missing_ranges = entry.missing_ranges(start, end)
+
+            for missing_start, missing_end in missing_ranges:
+                missing_limit = (missing_end - missing_start) // interval_ms + 2
+                klines = self.market_data.get_klines(
+                    symbol=symbol,
+                    interval=interval,
+                    limit=missing_limit,
+                    start_time=timestamp_to_utc_datetime(missing_start),
+                    end_time=timestamp_to_utc_datetime(missing_end),
+                )
+
+                is_closed = klines["close_time"] < now
+                closed_klines = klines[is_closed]
+                forming_klines.append(klines[~is_closed])
+
+                if len(klines) >= missing_limit and not closed_klines.empty:
+                    # The provider may have truncated the range, only trust what was returned.
+                    covered_end = int(closed_klines["open_time"].iloc[-1])
+                else:
+                    # Klines that opened at least one interval ago are closed.
+                    covered_end = min(missing_end, now - interval_ms)
+
+                if covered_end >= missing_start:
+                    entry.add(closed_klines, covered=(missing_start, covered_end))
+                else:
+                    entry.add(closed_klines)
+                if not closed_klines.empty:
+                    added_klines.append(closed_klines)
+
+            # Live polls mostly fetch the forming kline only, nothing is written then.
+            if added_klines:
+                self._append_entry(symbol, interval, entry, pandas.concat(added_klines))
+
+            cached = entry.window(start, end)
+
+        df = merge_klines(cached, *forming_klines)
+
+        if start_time:
+            return df.head(limit).reset_index(drop=True)
+        return df.tail(limit).reset_index(drop=True)
@@ -0,0 +1,158 @@
+from typing import Any
+
+import numpy
+import pandas
+
+# dtypes of the Binance kline columns, see BINANCE_KLINE_COLUMNS
+KLINE_DTYPES: dict[str, Any] = {
+    "open_time": numpy.int64,
+    "open": numpy.float64,
+    "high": numpy.float64,
+    "low": numpy.float64,
+    "close": numpy.float64,
+    "volume": numpy.float64,
+    "close_time": numpy.int64,
+    "quote_asset_volume": numpy.float64,
+    "number_of_trades": numpy.int64,
+    "taker_buy_base_asset_volume": numpy.float64,
+    "taker_buy_quote_asset_volume": numpy.float64,
+    "ignore": numpy.float64,
+}
+
+
+class KlineRingBuffer:
+    def __init__(self, capacity: int, dtypes: dict[str, Any] | None = None) -> None:
+        """
+        Fixed-capacity, column-oriented buffer of the most recent klines.
+
+        Every column is preallocated twice over and each row is written to both halves,
+        so the last `len(self)` rows are always one contiguous slice. Appending and
+        overwriting the last kline are O(1), reading a column or the whole window never copies.
+
+        Args:
+            capacity (int): The maximum number of klines kept, older klines are dropped.
+            dtypes (dict[str, Any] | None): The columns and their dtypes. Defaults to the Binance kline columns.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.capacity = capacity
+        self.dtypes = dtypes or KLINE_DTYPES
+        self._columns = {
+            name: numpy.zeros(2 * capacity, dtype=dtype)
+            for name, dtype in self.dtypes.items()
+        }
+        self.clear()
+
+    @classmethod
+    def from_frame(cls, df: pandas.DataFrame, capacity: int) -> "KlineRingBuffer":
+        """
+        Creates a buffer with the columns of the given klines, and fills it with them.
+        Non-numeric columns, such as the "ignore" column of Binance, are stored as floats.
+
+        Args:
+            df (pandas.DataFrame): A DataFrame containing klines data.
+            capacity (int): The maximum number of klines kept.
+
+        Returns:
+            KlineRingBuffer: The filled buffer.
+        """
+        buffer = cls(
+            capacity,
+            {
+                name: dtype
+                if pandas.api.types.is_numeric_dtype(dtype)
+                else numpy.float64
+                for name, dtype in df.dtypes.items()
+            },
+        )
+        buffer.extend(df)
+        return buffer
+
+    def clear(self) -> None:
+        """Drops all klines."""
+        self._next = 0  # slot of the next kline, in [0, capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _write(self, slots: numpy.ndarray | int, values: dict[str, Any]) -> None:
+        for name, column in self._columns.items():
+            column[slots] = values[name]
+            column[slots + self.capacity] = values[name]
+
+    def append(self, kline: dict[str, Any]) -> None:
+        """
+        Appends a kline, dropping the oldest one when the buffer is full.
+
+        Args:
+            kline (dict[str, Any]): The values of the kline, per column.
+        """
+        self._write(self._next, kline)
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def overwrite_last(self, kline: dict[str, Any]) -> None:
+        """
+        Replaces the last kline, for example with a newer update of a still-forming kline.
+
+        Args:
+            kline (dict[str, Any]): The values of the kline, per column.
+        """
+        if not self._size:
+            raise IndexError("overwrite_last on an empty KlineRingBuffer")
+        self._write((self._next - 1) % self.capacity, kline)
+
+    def extend(self, df: pandas.DataFrame) -> None:
+        """
+        Adds klines that are newer than or equal to the last one.
+        A kline with the same open time as the last one overwrites it, older klines are ignored.
+
+        Args:
+            df (pandas.DataFrame): A DataFrame containing klines data, sorted by open time.
+        """
+        if self._size:
+            last_open_time = self._columns["open_time"][self._next - 1]
+            df = df[df["open_time"].to_numpy() >= last_open_time]
+            if not df.empty and df["open_time"].iloc[0] == last_open_time:
+                self.overwrite_last({name: df[name].iloc[0] for name in self.dtypes})
+                df = df.iloc[1:]
+
+        df = df.tail(self.capacity)
+        if df.empty:
+            return
+
+        slots = (self._next + numpy.arange(len(df))) % self.capacity
+        self._write(slots, {name: df[name].to_numpy() for name in self.dtypes})
+        self._next = (self._next + len(df)) % self.capacity
+        self._size = min(self._size + len(df), self.capacity)
+
+    def view(self, name: str) -> numpy.ndarray:
+        """
+        Returns a read-only view of a column, from the oldest to the newest kline.
+        The view is not copied, so it changes with the buffer.
+
+        Args:
+            name (str): The name of the column.
+
+        Returns:
+            numpy.ndarray: The values of the column.
+        """
+        end = self._next + self.capacity
+        start = end - self._size
+        view = self._columns[name][start:end]
+        view.flags.writeable = False
+        return view
+
+    def to_frame(self) -> pandas.DataFrame:
+        """
+        Returns the klines as a DataFrame backed by read-only views of the buffer, without copying.
+        The DataFrame changes with the buffer, so it should not be kept after the next write.
+
+        Returns:
+            pandas.DataFrame: A DataFrame containing klines data.
+        """
+        return pandas.DataFrame(
+            {name: self.view(name) for name in self.dtypes}, copy=False
+        )
@@ -0,0 +1,326 @@
+import threading
+from typing import Any
+
+import numpy
+import pandas
+from enums import INTERVALS
+from indicators.incremental import find_key
+from market_data.kline_ring_buffer import KLINE_DTYPES, KlineRingBuffer
+from utils.utils import interval_to_seconds
+
+# Columns that are summed over the base klines of a higher timeframe kline.
+SUM_COLUMNS = frozenset(
+    {
+        "volume",
+        "quote_asset_volume",
+        "number_of_trades",
+        "taker_buy_base_asset_volume",
+        "taker_buy_quote_asset_volume",
+    }
+)
+REQUIRED_COLUMNS = ("open_time", "open", "high", "low", "close")
+
+DAY_MS = 86_400_000
+WEEK_START_MS = 4 * DAY_MS  # Binance weeks open on Monday, 1970-01-05 was the first one
+
+
+def check_resampling(base_interval: INTERVALS, interval: INTERVALS) -> None:
+    """
+    Checks that klines of the interval can be built from klines of the base interval.
+
+    Raises:
+        ValueError: When the interval does not start and end on base klines.
+    """
+    base_seconds = interval_to_seconds(base_interval)
+    if interval == "1M":
+        # Months start at midnight, so any base interval dividing a day fits.
+        fits = base_seconds <= 86_400 and 86_400 % base_seconds == 0
+    else:
+        fits = interval_to_seconds(interval) % base_seconds == 0
+    if not fits:
+        raise ValueError(
+            f"{interval} klines can't be built from {base_interval} klines"
+        )
+
+
+def bucket_open_times(open_times: numpy.ndarray, interval: INTERVALS) -> numpy.ndarray:
+    """
+    Maps open times to the open time of the kline of the interval they fall in, like Binance:
+    weeks open on Monday and months on their first day, other intervals are aligned to the epoch.
+
+    Args:
+        open_times (numpy.ndarray): Open times in milliseconds.
+        interval (INTERVALS): The interval of the klines.
+
+    Returns:
+        numpy.ndarray: The open times of the klines of the interval, in milliseconds.
+    """
+    open_times = numpy.asarray(open_times, dtype=numpy.int64)
+    if interval == "1M":
+        months = open_times.astype("datetime64[ms]").astype("datetime64[M]")
+        return months.astype("datetime64[ms]").astype(numpy.int64)
+
+    size = interval_to_seconds(interval) * 1000
+    offset = WEEK_START_MS if interval == "1w" else 0
+    return (open_times - offset) // size * size + offset
+
+
+def bucket_close_times(
+    bucket_opens: numpy.ndarray, interval: INTERVALS
+) -> numpy.ndarray:
+    """
+    Returns the close times of the klines of the interval opening at the given times.
+
+    Args:
+        bucket_opens (numpy.ndarray): Open times of klines of the interval, in milliseconds.
+        interval (INTERVALS): The interval of the klines.
+
+    Returns:
+        numpy.ndarray: Their close times, the millisecond before the next kline opens.
+    """
+    bucket_opens = numpy.asarray(bucket_opens, dtype=numpy.int64)
+    if interval == "1M":
+        next_months = bucket_opens.astype("datetime64[ms]").astype("datetime64[M]") + 1
+        return next_months.astype("datetime64[ms]").astype(numpy.int64) - 1
+    return bucket_opens + interval_to_seconds(interval) * 1000 - 1
+
+
+def resampled_columns(df: pandas.DataFrame) -> list[str]:
+    """
+    Returns the kline columns of the DataFrame that are kept by resampling, in Binance order.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in df]
+    if missing:
+        raise ValueError(f"Klines can't be resampled without the {missing} columns")
+    # The close time is computed, so it is kept even without a close time column.
+    return [
+        column
+        for column in KLINE_DTYPES
+        if column == "close_time"
+        or (column in df and (column in REQUIRED_COLUMNS or column in SUM_COLUMNS))
+    ]
+
+
+def resample_klines(
+    df: pandas.DataFrame, base_interval: INTERVALS, interval: INTERVALS
+) -> pandas.DataFrame:
+    """
+    Builds klines of a higher interval from klines of the base interval, with one vectorized
+    aggregation per column instead of a group by.
+
+    The last kline is included even while it is still forming, so it stays current. The first one
+    is dropped if the klines start after it opened, since its open, high and low would be wrong.
+
+    Args:
+        df (pandas.DataFrame): Klines of the base interval, sorted by open time.
+        base_interval (INTERVALS): The interval of the klines.
+        interval (INTERVALS): The interval to build.
+
+    Returns:
+        pandas.DataFrame: The klines of the interval, with the open, high, low, close, time and volume columns.
+    """
+    check_resampling(base_interval, interval)
+    columns = resampled_columns(df)
+
+    open_times = df["open_time"].to_numpy(dtype=numpy.int64)
+    buckets = bucket_open_times(open_times, interval)
+    start = 0
+    if len(buckets) and open_times[0] != buckets[0]:
+        start = int(numpy.searchsorted(buckets, buckets[0], side="right"))
+    if start == len(buckets):
+        return pandas.DataFrame(
+            {column: numpy.array([], dtype=KLINE_DTYPES[column]) for column in columns}
+        )
+
+    buckets = buckets[start:]
+    # The first base kline of every higher kline, and the last one.
+    firsts = numpy.flatnonzero(numpy.diff(buckets, prepend=buckets[0] - 1))
+    lasts = numpy.append(firsts[1:], len(buckets)) - 1
+
+    resampled: dict[str, numpy.ndarray] = {}
+    for column in columns:
+        if column == "open_time":
+            resampled[column] = buckets[firsts]
+        elif column == "close_time":
+            resampled[column] = bucket_close_times(buckets[firsts], interval)
+        else:
+            values = df[column].to_numpy()[start:]
+            if column == "open":
+                resampled[column] = values[firsts]
+            elif column == "close":
+                resampled[column] = values[lasts]
+            elif column == "high":
+                resampled[column] = numpy.maximum.reduceat(values, firsts)
+            elif column == "low":
+                resampled[column] = numpy.minimum.reduceat(values, firsts)
+            else:
+                resampled[column] = numpy.add.reduceat(values, firsts)
+    return pandas.DataFrame(resampled)
+
+
+class TimeframeAggregator:
+    def __init__(
+        self, base_interval: INTERVALS, interval: INTERVALS, capacity: int = 1000
+    ) -> None:
+        """
+        Keeps the klines of a higher interval in sync with a growing DataFrame of base klines.
+
+        Like an IndicatorFeed, each call to `sync` only aggregates the base klines that were not seen
+        before, in O(1) per base kline, so the still-forming higher kline stays current. Unknown or
+        non-contiguous klines are resampled again at once with `resample_klines`. Syncs are
+        serialized, so strategies analyzed concurrently can share an aggregator.
+
+        Args:
+            base_interval (INTERVALS): The interval of the synced klines.
+            interval (INTERVALS): The interval to build.
+            capacity (int): The number of klines of the interval kept, older ones are dropped. More are
+                kept when the first synced klines span more.
+        """
+        check_resampling(base_interval, interval)
+        self.base_interval = base_interval
+        self.interval = interval
+        self.capacity = capacity
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drops the klines and the running state."""
+        self.klines: KlineRingBuffer | None = None
+        self._last_key: Any = None
+        self._bucket: int | None = None  # open time of the last kline
+        self._kline: dict[str, Any] = {}  # the last kline, as written to the buffer
+        self._closed: dict[
+            str, Any
+        ] | None = None  # the last kline, without its last base kline
+        self._skipped_bucket: int | None = (
+            None  # the first kline, when the klines start after it opened
+        )
+        self._frame: pandas.DataFrame | None = None
+        self._synced_df: pandas.DataFrame | None = None
+
+    def _aggregate(self, base: dict[str, Any], bucket: int) -> dict[str, Any]:
+        closed = self._closed
+        if closed is None:
+            kline = dict(base)
+            kline["open_time"] = bucket
+            kline["close_time"] = int(
+                bucket_close_times(numpy.array([bucket]), self.interval)[0]
+            )
+            return kline
+
+        kline = dict(closed)
+        kline["high"] = max(closed["high"], base["high"])
+        kline["low"] = min(closed["low"], base["low"])
+        kline["close"] = base["close"]
+        for column in SUM_COLUMNS.intersection(kline):
+            kline[column] = closed[column] + base[column]
+        return kline
+
+    def update(self, base: dict[str, Any], replace: bool = False) -> None:
+        """
+        Aggregates a base kline into the last kline of the interval, or starts the next one.
+
+        Args:
+            base (dict[str, Any]): The values of the base kline, per column.
+            replace (bool): Whether the base kline replaces the last one, while it is still forming.
+        """
+        assert self.klines is not None, "the buffer is created by the first sync"
+        bucket = int(
+            bucket_open_times(numpy.array([base["open_time"]]), self.interval)[0]
+        )
+        if bucket == self._skipped_bucket:
+            return
+
+        if bucket != self._bucket:
+            self._closed = None
+        elif not replace:
+            self._closed = self._kline
+
+        self._kline = self._aggregate(base, bucket)
+        if bucket == self._bucket:
+            self.klines.overwrite_last(self._kline)
+        else:
+            self.klines.append(self._kline)
+            self._bucket = bucket
+
+    def _rebuild(self, df: pandas.DataFrame) -> None:
+        """
+        Resamples all klines but the last one at once, then aggregates the last one, so the state of
+        the last kline of the interval is known.
+        """
+        columns = resampled_columns(df)
+        resampled = resample_klines(df.iloc[:-1], self.base_interval, self.interval)
+        self.klines = KlineRingBuffer(
+            max(self.capacity, len(resampled) + 1),
+            {column: KLINE_DTYPES[column] for column in columns},
+        )
+
+        open_times = df["open_time"].to_numpy(dtype=numpy.int64)
+        first_bucket = int(bucket_open_times(open_times[:1], self.interval)[0])
+        if open_times[0] != first_bucket:
+            self._skipped_bucket = first_bucket
+
+        if not resampled.empty:
+            self.klines.extend(resampled)
+            self._bucket = int(resampled["open_time"].iloc[-1])
+            self._kline = {column: resampled[column].iloc[-1] for column in columns}
+
+        self.update({column: df[column].iloc[-1] for column in columns if column in df})
+
+    def sync(self, df: pandas.DataFrame) -> None:
+        """
+        Aggregates the base klines of the DataFrame that were not aggregated before.
+
+        Args:
+            df (pandas.DataFrame): Klines of the base interval, sorted by open time.
+        """
+        if df is self._synced_df or df.empty:
+            return
+        with self._lock:
+            if df is self._synced_df:
+                return
+
+            keys = df["open_time"].to_numpy()
+            position = find_key(keys, self._last_key)
+            if position is None:
+                self.reset()
+                self._rebuild(df)
+            else:
+                assert self.klines is not None
+                columns = [column for column in self.klines.dtypes if column in df]
+                values = {column: df[column].to_numpy() for column in columns}
+                for index in range(position, len(df)):
+                    self.update(
+                        {column: values[column][index] for column in columns},
+                        replace=index == position,
+                    )
+
+            self._last_key = keys[-1]
+            self._frame = None
+            self._synced_df = df
+
+    def to_frame(self) -> pandas.DataFrame:
+        """
+        Returns the klines of the interval, the last one possibly still forming. The DataFrame is backed
+        by the buffer without copying, so it should not be kept after the next sync.
+
+        Returns:
+            pandas.DataFrame: The klines of the interval.
+        """
+        if self.klines is None:
+            return pandas.DataFrame()
+        if self._frame is None:
+            self._frame = self.klines.to_frame()
+        return self._frame
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Strategies are pickled for process pools, and copied for every symbol.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_frame"] = state["_synced_df"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+import pandas
+from enums import INTERVALS
+
+
+class StaticMarketData:
+    def __init__(self, df: pandas.DataFrame) -> None:
+        """
+        Serves klines that were loaded beforehand, e.g. to run many backtests on the same data.
+
+        Args:
+            df (pandas.DataFrame): A DataFrame containing klines data, sorted by open_time.
+        """
+        self.df = df
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: INTERVALS,
+        limit: int,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+    ) -> pandas.DataFrame:
+        """
+        Get the loaded klines. The symbol, interval, limit and time range are ignored.
+        """
+        return self.df
@@ -0,0 +1,296 @@
+import math
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from typing import Literal, NamedTuple
+
+import numpy
+import pandas
+from enums import INTERVALS
+from utils.utils import datetime_to_timestamp, interval_to_seconds
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+
+# columns and order of BINANCE_KLINE_COLUMNS
+SYNTHETIC_KLINE_COLUMNS = [
+    "open_time",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "close_time",
+    "quote_asset_volume",
+    "number_of_trades",
+    "taker_buy_base_asset_volume",
+    "taker_buy_quote_asset_volume",
+    "ignore",
+]
+
+
+class _ChunkState(NamedTuple):
+    log_price: float  # log of the close before the chunk
+    regime: int  # regime of the bar before the chunk
+    remaining: int  # bars left in that regime
+
+
+class SyntheticMarketData:
+    def __init__(
+        self,
+        model: Literal["gbm", "regime"] = "gbm",
+        seed: int = 42,
+        start_price: float = 10000.0,
+        drift: float = 0.0,
+        volatility: float = 0.6,
+        regimes: list[tuple[float, float]] | None = None,
+        mean_regime_bars: int = 2000,
+        base_volume: float = 100.0,
+        origin: datetime = datetime(2017, 1, 1, tzinfo=timezone.utc),
+        chunk_size: int = 1_000_000,
+    ) -> None:
+        """
+        Seeded, deterministic generator of realistic klines, for offline load and scale tests.
+
+        Prices follow a geometric Brownian motion ("gbm"), or switch between volatility regimes
+        ("regime"), each with its own drift and volatility and a geometric duration. The klines
+        are generated in vectorized chunks of `chunk_size` bars counted from `origin`, each from
+        its own seed, so any range is reproducible and only the state between chunks is kept.
+        The last chunk read per symbol and interval is kept too, so polling the latest klines
+        doesn't generate their chunk again.
+
+        Args:
+            model (Literal["gbm", "regime"]): The price model.
+            seed (int): The seed of the generator. Symbols and intervals get different paths.
+            start_price (float): The price at the origin.
+            drift (float): The annualized drift of the "gbm" model.
+            volatility (float): The annualized volatility of the "gbm" model.
+            regimes (list[tuple[float, float]] | None): The annualized (drift, volatility) of each
+                regime of the "regime" model. Defaults to a calm bull and a volatile bear regime.
+            mean_regime_bars (int): The mean number of bars a regime lasts.
+            base_volume (float): The median volume of a bar.
+            origin (datetime): The open time of the first bar.
+            chunk_size (int): The number of bars generated at once.
+        """
+        if model == "gbm":
+            regimes = [(drift, volatility)]
+        elif regimes is None:
+            regimes = [(0.3, 0.4), (-0.4, 1.2)]
+
+        self.model = model
+        self.seed = seed
+        self.start_price = start_price
+        self.drifts = numpy.array([regime[0] for regime in regimes])
+        self.volatilities = numpy.array([regime[1] for regime in regimes])
+        self.mean_regime_bars = mean_regime_bars
+        self.base_volume = base_volume
+        self.origin = datetime_to_timestamp(origin)
+        self.chunk_size = chunk_size
+
+        # State at the start of each generated chunk, per (symbol, interval).
+        self._chunk_states: dict[tuple[str, str], list[_ChunkState]] = {}
+        # The last chunk read and its columns, read-only, per (symbol, interval).
+        self._last_chunks: dict[
+            tuple[str, str], tuple[int, dict[str, numpy.ndarray]]
+        ] = {}
+
+    def _regime_path(
+        self, rng: numpy.random.Generator, length: int, state: _ChunkState
+    ) -> tuple[numpy.ndarray, int, int]:
+        """
+        Draws the regime of every bar of a chunk.
+
+        Returns:
+            tuple[numpy.ndarray, int, int]: The regime per bar, the last regime and the bars left in it.
+        """
+        regime_count = len(self.drifts)
+        if regime_count == 1:
+            return numpy.zeros(length, dtype=numpy.intp), 0, 0
+
+        path = numpy.empty(length, dtype=numpy.intp)
+        regime, remaining = state.regime, state.remaining
+        filled = 0
+        while filled < length:
+            if remaining == 0:
+                regime = (regime + int(rng.integers(1, regime_count))) % regime_count
+                remaining = int(rng.geometric(1 / self.mean_regime_bars))
+            taken = min(remaining, length - filled)
+            end = filled + taken
+            path[filled:end] = regime
+            filled, remaining = end, remaining - taken
+        return path, regime, remaining
+
+    def _generate_chunk(
+        self, symbol: str, interval: INTERVALS, chunk: int, state: _ChunkState
+    ) -> tuple[dict[str, numpy.ndarray], _ChunkState]:
+        """
+        Generates the klines of a chunk from the state before it.
+
+        Returns:
+            tuple[dict[str, numpy.ndarray], _ChunkState]: The columns of the chunk and the state after it.
+        """
+        rng = numpy.random.default_rng(
+            [self.seed, chunk, *f"{symbol}:{interval}".encode()]
+        )
+        length = self.chunk_size
+        interval_seconds = interval_to_seconds(interval)
+        years_per_bar = interval_seconds / SECONDS_PER_YEAR
+
+        regimes, regime, remaining = self._regime_path(rng, length, state)
+        volatility = self.volatilities[regimes]
+        sigma = volatility * math.sqrt(years_per_bar)
+        log_returns = (
+            self.drifts[regimes] - 0.5 * volatility**2
+        ) * years_per_bar + sigma * rng.standard_normal(length)
+
+        log_close = state.log_price + numpy.cumsum(log_returns)
+        close = numpy.exp(log_close)
+        open_ = numpy.empty(length)
+        open_[0] = math.exp(state.log_price)
+        open_[1:] = close[:-1]
+
+        wicks = numpy.abs(rng.standard_normal((2, length))) * sigma * 0.5
+        high = numpy.maximum(open_, close) * numpy.exp(wicks[0])
+        low = numpy.minimum(open_, close) * numpy.exp(-wicks[1])
+
+        # Volume is lognormal and grows with the size of the move.
+        volume = (
+            self.base_volume
+            * numpy.exp(0.5 * rng.standard_normal(length))
+            * (1 + numpy.abs(log_returns) / sigma)
+        )
+        taker_buy_ratio = rng.uniform(0.3, 0.7, length)
+        quote_asset_volume = volume * (open_ + high + low + close) / 4
+
+        interval_ms = interval_seconds * 1000
+        open_time = (
+            self.origin + (chunk * length + numpy.arange(length)) * interval_ms
+        ).astype(numpy.int64)
+
+        columns = {
+            "open_time": open_time,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+            "close_time": open_time + interval_ms - 1,
+            "quote_asset_volume": quote_asset_volume,
+            "number_of_trades": (volume * 10).astype(numpy.int64) + 1,
+            "taker_buy_base_asset_volume": volume * taker_buy_ratio,
+            "taker_buy_quote_asset_volume": quote_asset_volume * taker_buy_ratio,
+            "ignore": numpy.zeros(length),
+        }
+        return columns, _ChunkState(float(log_close[-1]), regime, remaining)
+
+    def _chunk_state(self, symbol: str, interval: INTERVALS, chunk: int) -> _ChunkState:
+        """
+        Returns the state before a chunk, generating the chunks before it the first time.
+        """
+        states = self._chunk_states.setdefault(
+            (symbol, interval),
+            [_ChunkState(math.log(self.start_price), len(self.drifts) - 1, 0)],
+        )
+        while len(states) <= chunk:
+            _, state = self._generate_chunk(
+                symbol, interval, len(states) - 1, states[-1]
+            )
+            states.append(state)
+        return states[chunk]
+
+    def _chunk(
+        self, symbol: str, interval: INTERVALS, chunk: int
+    ) -> dict[str, numpy.ndarray]:
+        """
+        Returns the columns of a chunk, generated again unless it is the last chunk read.
+        """
+        last_chunk = self._last_chunks.get((symbol, interval))
+        if last_chunk is not None and last_chunk[0] == chunk:
+            return last_chunk[1]
+
+        columns, state = self._generate_chunk(
+            symbol, interval, chunk, self._chunk_state(symbol, interval, chunk)
+        )
+        states = self._chunk_states[(symbol, interval)]
+        if len(states) == chunk + 1:
+            states.append(state)
+        for column in columns.values():
+            # The yielded klines are views of the cached chunk.
+            column.flags.writeable = False
+        self._last_chunks[(symbol, interval)] = (chunk, columns)
+        return columns
+
+    def _iter_bars(
+        self, symbol: str, interval: INTERVALS, first: int, last: int
+    ) -> Iterator[pandas.DataFrame]:
+        """
+        Yields the klines of the bars [first, last], at most one chunk at a time.
+        """
+        for chunk in range(first // self.chunk_size, last // self.chunk_size + 1):
+            columns = self._chunk(symbol, interval, chunk)
+            chunk_start = chunk * self.chunk_size
+            start = max(first - chunk_start, 0)
+            end = min(last - chunk_start + 1, self.chunk_size)
+            yield pandas.DataFrame(
+                {name: columns[name][start:end] for name in SYNTHETIC_KLINE_COLUMNS},
+                copy=False,
+            )
+
+    def _bar(self, value: datetime, interval: INTERVALS) -> int:
+        """The bar that is open at the given time, counted from the origin."""
+        interval_ms = interval_to_seconds(interval) * 1000
+        return max((datetime_to_timestamp(value) - self.origin) // interval_ms, 0)
+
+    def iter_klines(
+        self,
+        symbol: str,
+        interval: INTERVALS,
+        count: int,
+        start_time: datetime | None = None,
+    ) -> Iterator[pandas.DataFrame]:
+        """
+        Yields `count` klines from the start time (or the origin), one chunk at a time,
+        so arbitrarily long histories can be processed in bounded memory.
+
+        Args:
+            symbol (str): The symbol to generate klines for.
+            interval (INTERVALS): The interval of the klines.
+            count (int): The number of klines to generate.
+            start_time (datetime | None): The start time of the klines. Defaults to the origin.
+
+        Returns:
+            Iterator[pandas.DataFrame]: DataFrames of at most `chunk_size` klines, in order.
+        """
+        first = self._bar(start_time, interval) if start_time else 0
+        if count > 0:
+            yield from self._iter_bars(symbol, interval, first, first + count - 1)
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: INTERVALS,
+        limit: int,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+    ) -> pandas.DataFrame:
+        """
+        Get synthetic klines, with the same range semantics as the Binance market data.
+
+        With both a start and an end time, all klines in the range are returned.
+        Otherwise at most `limit` klines are returned, counting from the start time,
+        or back from the end time (or now) when no start time is given.
+        """
+        if start_time:
+            first = self._bar(start_time, interval)
+            if end_time:
+                last = self._bar(end_time, interval)
+            else:
+                last = first + limit - 1
+        else:
+            last = self._bar(end_time or datetime.now(tz=timezone.utc), interval)
+            first = max(last - limit + 1, 0)
+
+        if last < first:
+            return pandas.DataFrame(columns=SYNTHETIC_KLINE_COLUMNS)
+
+        return pandas.concat(
+            list(self._iter_bars(symbol, interval, first, last)), ignore_index=True
+        )
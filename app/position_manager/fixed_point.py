@@ -0,0 +1,153 @@
+from collections.abc import Iterable, Mapping
+from decimal import ROUND_DOWN, ROUND_HALF_EVEN, Decimal
+from typing import NamedTuple
+
+DEFAULT_TICK_SIZE = Decimal("0.01")
+DEFAULT_STEP_SIZE = Decimal("0.00000001")
+
+
+class FixedPointFill(NamedTuple):
+    order_id: str
+    quantity_steps: int  # executed quantity, in steps
+    price_ticks: int  # execution price, in ticks
+    commission: Decimal = Decimal(0)  # fees paid in the quote asset
+    cost: int | None = (
+        None  # exact quote amount of the fills, in money units, when reported
+    )
+
+
+def _power_of_ten_exponent(size: Decimal) -> int | None:
+    """Returns the exponent of a size that is a power of ten, or None."""
+    sign, digits, exponent = size.normalize().as_tuple()
+    if sign or digits != (1,) or not isinstance(exponent, int):
+        return None
+    return exponent
+
+
+class FixedPoint:
+    def __init__(self, tick_size: Decimal, step_size: Decimal, money_size: Decimal):
+        """
+        Converts the prices and quantities of a symbol to and from scaled integers.
+
+        Prices are counted in ticks and quantities in steps, like the PRICE_FILTER and LOT_SIZE
+        filters of an exchange. The value of `ticks` * `steps` is an integer amount of money units.
+
+        Args:
+        - tick_size: Decimal, the price increment of the symbol.
+        - step_size: Decimal, the quantity increment of the symbol.
+        - money_size: Decimal, the money unit of the account, must divide tick_size * step_size.
+        """
+        cost_factor = tick_size * step_size / money_size
+        if cost_factor != cost_factor.to_integral_value() or cost_factor < 1:
+            raise ValueError(
+                f"money size {money_size} does not divide {tick_size} * {step_size}"
+            )
+
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.money_size = money_size
+        self.cost_factor = int(cost_factor)
+        self.tick_float = float(tick_size)
+        self.step_float = float(step_size)
+        self._tick_exponent = _power_of_ten_exponent(tick_size)
+        self._step_exponent = _power_of_ten_exponent(step_size)
+
+    def to_ticks(self, price: Decimal) -> int:
+        """Rounds a price to the nearest tick."""
+        return int((price / self.tick_size).to_integral_value(ROUND_HALF_EVEN))
+
+    def to_steps(self, quantity: Decimal) -> int:
+        """Rounds a quantity down to a whole number of steps."""
+        return int((quantity / self.step_size).to_integral_value(ROUND_DOWN))
+
+    def price(self, ticks: int) -> Decimal:
+        return ticks * self.tick_size
+
+    def quantity(self, steps: int) -> Decimal:
+        return steps * self.step_size
+
+    def price_text(self, ticks: int) -> str:
+        """The exact decimal string of a price, formatted without Decimal arithmetic when possible."""
+        if self._tick_exponent is None:
+            return str(self.price(ticks))
+        return f"{ticks}E{self._tick_exponent}"
+
+    def quantity_text(self, steps: int) -> str:
+        """The exact decimal string of a quantity, formatted without Decimal arithmetic when possible."""
+        if self._step_exponent is None:
+            return str(self.quantity(steps))
+        return f"{steps}E{self._step_exponent}"
+
+    def cost(self, price_ticks: int, quantity_steps: int) -> int:
+        """The value of a quantity at a price, in money units."""
+        return price_ticks * quantity_steps * self.cost_factor
+
+    def fill_cost(self, fill: FixedPointFill) -> int:
+        """
+        The value of a fill, in money units: the quote amount reported by the exchange, or the
+        executed quantity at the execution price.
+        """
+        if fill.cost is not None:
+            return fill.cost
+        return self.cost(fill.price_ticks, fill.quantity_steps)
+
+    def to_money(self, amount: Decimal) -> int:
+        """Rounds an amount of money down to money units."""
+        return int((amount / self.money_size).to_integral_value(ROUND_DOWN))
+
+
+class FixedPointAccounting:
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        tick_sizes: Mapping[str, Decimal] | None = None,
+        step_sizes: Mapping[str, Decimal] | None = None,
+    ):
+        """
+        Scaled integer accounting of an account trading several symbols.
+
+        Money is counted in the smallest `tick_size` * `step_size` of the symbols, so the value
+        of any trade is an exact integer amount of money. Python integers don't overflow, so
+        balances of any size stay exact.
+
+        Args:
+        - symbols: the symbols traded.
+        - tick_sizes: Mapping or None, the price increment per symbol. Defaults to 0.01.
+        - step_sizes: Mapping or None, the quantity increment per symbol. Defaults to 0.00000001.
+        """
+        self.tick_sizes = dict(tick_sizes or {})
+        self.step_sizes = dict(step_sizes or {})
+        symbols = list(symbols)
+        self.money_size = min(
+            (self._tick_size(symbol) * self._step_size(symbol) for symbol in symbols),
+            default=DEFAULT_TICK_SIZE * DEFAULT_STEP_SIZE,
+        )
+        self._symbols = {
+            symbol: FixedPoint(
+                self._tick_size(symbol), self._step_size(symbol), self.money_size
+            )
+            for symbol in symbols
+        }
+
+    def _tick_size(self, symbol: str) -> Decimal:
+        return self.tick_sizes.get(symbol, DEFAULT_TICK_SIZE)
+
+    def _step_size(self, symbol: str) -> Decimal:
+        return self.step_sizes.get(symbol, DEFAULT_STEP_SIZE)
+
+    def __getitem__(self, symbol: str) -> FixedPoint:
+        """
+        Returns the scales of a symbol. Symbols that were not configured get the default sizes.
+        """
+        if (fixed_point := self._symbols.get(symbol)) is None:
+            fixed_point = self._symbols[symbol] = FixedPoint(
+                self._tick_size(symbol), self._step_size(symbol), self.money_size
+            )
+        return fixed_point
+
+    def to_money(self, amount: Decimal) -> int:
+        """Rounds an amount of money down to money units."""
+        return int((amount / self.money_size).to_integral_value(ROUND_DOWN))
+
+    def to_decimal(self, units: int) -> Decimal:
+        return units * self.money_size
@@ -0,0 +1,266 @@
+from decimal import Decimal
+
+from config.config import MainConfig
+from enums import OrderSide
+from interfaces import EventSinkProtocol
+from metrics.latency_recorder import LatencyRecorder
+from position_manager.fixed_point import FixedPointAccounting
+from position_manager.position_book import Position, PositionBook
+from position_manager.position_manager import PositionManager
+from position_manager.position_store import PositionStore
+from position_manager.trade_executor import TradeExecutor
+from schemas import Signal
+
+
+class FixedPointPositionManager(PositionManager):
+    def __init__(
+        self,
+        config: MainConfig,
+        trade_executor: TradeExecutor,
+        event_sink: EventSinkProtocol | None = None,
+        latency_recorder: LatencyRecorder | None = None,
+        position_store: PositionStore | None = None,
+    ):
+        """
+        A PositionManager that accounts in scaled integers instead of Decimal.
+
+        The balance is kept in money units, quantities in steps and prices in ticks of the
+        tick and step sizes of the trading config, see FixedPointAccounting. All arithmetic is
+        exact integer arithmetic, signal prices are rounded to the tick once, and bought quantities
+        are rounded down to the step. `balance` and `portfolio` are converted back to Decimal
+        when they are read, for reporting.
+
+        Unlike the Decimal accounting, which spends exactly the notional, a buy spends the value
+        of the whole number of steps that the notional buys.
+
+        Args:
+        - config: MainConfig instance, containing the main configuration.
+        - trade_executor: TradeExecutor instance, which is responsible for executing trades.
+        - event_sink: EventSinkProtocol or None, where the events are reported. Defaults to the console.
+        - latency_recorder: LatencyRecorder or None, records the latency of the signal handling. Defaults to disabled.
+        - position_store: PositionStore or None, where the positions are persisted, and restored from on creation.
+          Defaults to no persistence.
+        """
+        self.accounting = FixedPointAccounting(
+            config.symbols,
+            tick_sizes=config.trading_config.tick_sizes,
+            step_sizes=config.trading_config.step_sizes,
+        )
+        self._balance_units = 0
+        self._portfolio_steps: dict[str, int] = {}
+        self._notional_units = self.accounting.to_money(config.trading_config.notional)
+
+        super().__init__(
+            config, trade_executor, event_sink, latency_recorder, position_store
+        )
+
+    def _new_position_book(self) -> PositionBook:
+        """
+        Returns an empty book for the open positions, storing ticks and steps.
+        """
+        return PositionBook(accounting=self.accounting)
+
+    def _restore_position(self, position_id: str, position: Position) -> int:
+        """
+        Adds a restored position to the position book, in ticks and steps.
+
+        Args:
+        - position_id: str, the ID of the position.
+        - position: Position instance, the restored position.
+
+        Returns:
+        - The slot of the position in the position book.
+        """
+        fixed_point = self.accounting[position.symbol]
+        return self.positions.open(
+            position_id,
+            symbol=position.symbol,
+            entry_price=fixed_point.to_ticks(position.entry_price),
+            quantity=fixed_point.to_steps(position.quantity),
+            order_id=position.order_id,
+            stop_loss_price=None
+            if position.stop_loss_price is None
+            else fixed_point.to_ticks(position.stop_loss_price),
+            take_profit_price=None
+            if position.take_profit_price is None
+            else fixed_point.to_ticks(position.take_profit_price),
+        )
+
+    @property
+    def balance(self) -> Decimal:
+        return self.accounting.to_decimal(self._balance_units)
+
+    @balance.setter
+    def balance(self, balance: Decimal) -> None:
+        self._balance_units = self.accounting.to_money(balance)
+
+    @property
+    def portfolio(self) -> dict[str, Decimal]:
+        return {
+            symbol: self.accounting[symbol].quantity(steps)
+            for symbol, steps in self._portfolio_steps.items()
+        }
+
+    @portfolio.setter
+    def portfolio(self, portfolio: dict[str, Decimal]) -> None:
+        self._portfolio_steps = {
+            symbol: self.accounting[symbol].to_steps(quantity)
+            for symbol, quantity in portfolio.items()
+        }
+
+    def _close_position(self, position_id: str, signal: Signal) -> None:
+        """
+        Closes an active position.
+
+        Args:
+        - position_id: str, the ID of the position to be closed.
+        - signal: Signal instance, the signal that triggered the closing of the position.
+        """
+        if position_id not in self.positions:
+            return
+
+        symbol = self.positions.symbol(position_id)
+        fixed_point = self.accounting[symbol]
+        quantity_steps = int(self.positions.exact_quantity(position_id))
+
+        client_order_id = self._persist_order(
+            symbol, OrderSide.SELL, fixed_point.quantity(quantity_steps)
+        )
+        fill = self.trade_executor.submit_fixed_point_order(
+            symbol=symbol,
+            side=OrderSide.SELL,
+            quantity_steps=quantity_steps,
+            price_ticks=fixed_point.to_ticks(signal.price),
+            fixed_point=fixed_point,
+            client_order_id=client_order_id,
+        )
+        if not fill.quantity_steps:
+            self._persist_unfilled(client_order_id)
+            return
+
+        balance_units = (
+            self._balance_units
+            + fixed_point.fill_cost(fill)
+            - self.accounting.to_money(fill.commission)
+        )
+        holding_steps = self._portfolio_steps[symbol] - fill.quantity_steps
+        remaining_steps = quantity_steps - fill.quantity_steps
+        if self.store is not None:
+            balance = self.accounting.to_decimal(balance_units)
+            holding = fixed_point.quantity(holding_steps)
+            if remaining_steps:
+                position = self.positions[position_id].copy(
+                    update={"quantity": fixed_point.quantity(remaining_steps)}
+                )
+                self._persist_open(
+                    position_id, position, balance, holding, client_order_id
+                )
+            else:
+                self._persist_close(
+                    position_id, symbol, balance, holding, client_order_id
+                )
+
+        self._balance_units = balance_units
+        self._portfolio_steps[symbol] = holding_steps
+        if remaining_steps:
+            self._reduce_position(position_id, symbol, remaining_steps)
+            return
+
+        self.open_positions -= 1
+        self.positions.close(position_id)
+        self.triggers.remove(position_id)
+
+    def _handle_buy_signal(self, signal: Signal, notional: Decimal) -> None:
+        """
+        Handles a new buy signal.
+
+        Args:
+        - signal: Signal instance, the buy signal to be handled.
+        - notional: Decimal, unused, the notional of the trading config is used in money units.
+        """
+        if (
+            self.open_positions >= self.config.trading_config.max_amount_open_positions
+            or self._notional_units > self._balance_units
+        ):
+            return
+
+        fixed_point = self.accounting[signal.symbol]
+        price_ticks = fixed_point.to_ticks(signal.price)
+        if price_ticks <= 0:
+            return
+
+        quantity_steps = self._notional_units // (price_ticks * fixed_point.cost_factor)
+        if not quantity_steps:
+            return
+
+        client_order_id = self._persist_order(
+            signal.symbol, OrderSide.BUY, fixed_point.quantity(quantity_steps)
+        )
+        fill = self.trade_executor.submit_fixed_point_order(
+            symbol=signal.symbol,
+            side=OrderSide.BUY,
+            quantity_steps=quantity_steps,
+            price_ticks=price_ticks,
+            fixed_point=fixed_point,
+            client_order_id=client_order_id,
+        )
+        if not fill.quantity_steps:
+            self._persist_unfilled(client_order_id)
+            return
+
+        holding_steps = (
+            self._portfolio_steps.get(signal.symbol, 0) + fill.quantity_steps
+        )
+        balance_units = (
+            self._balance_units
+            - fixed_point.fill_cost(fill)
+            - self.accounting.to_money(fill.commission)
+        )
+        stop_loss_ticks = (
+            None
+            if signal.stop_price is None
+            else fixed_point.to_ticks(signal.stop_price)
+        )
+        take_profit_ticks = (
+            None
+            if signal.take_profit_price is None
+            else fixed_point.to_ticks(signal.take_profit_price)
+        )
+
+        position_id = self.generate_position_id()
+        if self.store is not None:
+            position = Position.construct(
+                symbol=signal.symbol,
+                entry_price=fixed_point.price(fill.price_ticks),
+                quantity=fixed_point.quantity(fill.quantity_steps),
+                order_id=fill.order_id,
+                stop_loss_price=None
+                if stop_loss_ticks is None
+                else fixed_point.price(stop_loss_ticks),
+                take_profit_price=None
+                if take_profit_ticks is None
+                else fixed_point.price(take_profit_ticks),
+            )
+            self._persist_open(
+                position_id,
+                position,
+                self.accounting.to_decimal(balance_units),
+                fixed_point.quantity(holding_steps),
+                client_order_id,
+            )
+
+        self._portfolio_steps[signal.symbol] = holding_steps
+        self._balance_units = balance_units
+
+        slot = self.positions.open(
+            position_id,
+            symbol=signal.symbol,
+            entry_price=fill.price_ticks,
+            quantity=fill.quantity_steps,
+            order_id=fill.order_id,
+            stop_loss_price=stop_loss_ticks,
+            take_profit_price=take_profit_ticks,
+        )
+        self._index_triggers(position_id, signal.symbol, slot)
+
+        self.open_positions += 1
@@ -0,0 +1,368 @@
+import io
+import os
+import struct
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from decimal import Decimal
+from typing import BinaryIO
+
+import numpy
+from enums import OrderSide, OrderType, TimeInForce
+from schemas import OrderSchema
+
+JOURNAL_MAGIC = b"TBORDERS"
+JOURNAL_VERSION = 1
+
+# One fixed-size record per order. Decimals are stored as their exact string representation.
+ORDER_RECORD_DTYPE = numpy.dtype(
+    [
+        (
+            "timestamp",
+            "<i8",
+        ),  # milliseconds since the epoch, when the order was journaled
+        ("order_id", "S40"),
+        ("client_order_id", "S40"),
+        ("symbol", "S16"),
+        ("side", "S4"),
+        ("type", "S20"),
+        ("time_in_force", "S3"),
+        ("status", "S16"),
+        ("executed_qty", "S40"),
+        ("price", "S40"),
+        ("stop_price", "S40"),
+    ]
+)
+_RECORD = struct.Struct("<q40s40s16s4s20s3s16s40s40s40s")
+_HEADER = struct.Struct("<8sII")  # magic, version, record size
+# The size of the text fields, which are not bounded by an enum.
+_FIELD_SIZES = {
+    name: ORDER_RECORD_DTYPE[name].itemsize
+    for name in (
+        "order_id",
+        "client_order_id",
+        "symbol",
+        "status",
+        "executed_qty",
+        "price",
+        "stop_price",
+    )
+}
+DEFAULT_MAX_RECORDS = 100_000  # records kept by an in-memory journal, about 27 MB
+
+# Orders in any other status are still open, and kept in the index until they are journaled again.
+FINAL_ORDER_STATUSES = frozenset({"FILLED", "CANCELED", "REJECTED", "EXPIRED"})
+
+
+class OrderSummary:
+    def __init__(self) -> None:
+        """
+        Running aggregates of the journaled orders.
+        """
+        self.count = 0
+        self.by_side: dict[OrderSide, int] = {OrderSide.BUY: 0, OrderSide.SELL: 0}
+        self.by_symbol: dict[str, int] = {}
+
+    def add(self, symbol: str, side: OrderSide) -> None:
+        self.count += 1
+        self.by_side[side] += 1
+        self.by_symbol[symbol] = self.by_symbol.get(symbol, 0) + 1
+
+    def add_records(self, records: numpy.ndarray) -> None:
+        """
+        Adds journal records at once.
+
+        Args:
+        - records: numpy.ndarray, records of ORDER_RECORD_DTYPE.
+        """
+        self.count += len(records)
+        for side, count in zip(*numpy.unique(records["side"], return_counts=True)):
+            self.by_side[OrderSide(side.decode())] += int(count)
+        for symbol, count in zip(*numpy.unique(records["symbol"], return_counts=True)):
+            self.by_symbol[symbol.decode()] = self.by_symbol.get(
+                symbol.decode(), 0
+            ) + int(count)
+
+
+def _encode(name: str, value: str) -> bytes:
+    encoded = value.encode()
+    if len(encoded) > _FIELD_SIZES[name]:
+        raise ValueError(
+            f"The {name} {value} does not fit in an order journal record, "
+            f"which holds {_FIELD_SIZES[name]} bytes"
+        )
+    return encoded
+
+
+class OrderJournal:
+    def __init__(
+        self,
+        path: str | None = None,
+        recent: int = 1000,
+        max_records: int = DEFAULT_MAX_RECORDS,
+    ) -> None:
+        """
+        Append-only journal of the executed orders, in fixed-size binary records.
+
+        The journal is a file that can be memory-mapped, or an in-memory buffer without a path.
+        Only the last `recent` orders and the orders that are still open are kept as objects,
+        for lookups. Counts come from a running summary, and the full history can be read back
+        as a NumPy array or replayed as OrderSchema objects.
+
+        The in-memory buffer is capped: once it holds `max_records` records, the oldest half is
+        dropped, so only the recent history can be read back, while the summary counts every order.
+
+        A journal file is reopened where it ended, a partially written last record is dropped.
+
+        Args:
+        - path: str or None, the journal file. Defaults to an in-memory journal.
+        - recent: int, the number of recent orders kept for lookups.
+        - max_records: int, the number of records an in-memory journal holds at most.
+        """
+        self.path = path
+        self.recent = recent
+        self.max_records = max_records
+        self.summary = OrderSummary()
+        self._recent: OrderedDict[str, bytes] = OrderedDict()
+        self._open: dict[str, bytes] = {}
+        self._count = 0
+        self._buffered = 0  # the records in the in-memory buffer
+
+        self._file: BinaryIO
+        if path is None:
+            self._file = io.BytesIO()
+            self._file.write(_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, _RECORD.size))
+            return
+
+        self._file = open(path, "a+b")
+        size = self._file.seek(0, os.SEEK_END)
+        if size < _HEADER.size:
+            self._file.truncate(0)
+            self._file.write(_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, _RECORD.size))
+            self._file.flush()
+            return
+
+        self._file.seek(0)
+        magic, version, record_size = _HEADER.unpack(self._file.read(_HEADER.size))
+        if (magic, version, record_size) != (
+            JOURNAL_MAGIC,
+            JOURNAL_VERSION,
+            _RECORD.size,
+        ):
+            self._file.close()
+            raise ValueError(f"{path} is not an order journal of this version")
+
+        self._count = (size - _HEADER.size) // _RECORD.size
+        end = _HEADER.size + self._count * _RECORD.size
+        if end != size:
+            self._file.truncate(end)
+        self._file.seek(end)
+
+        records = self.records()
+        self.summary.add_records(records)
+
+        # Only the last records and the last record of the orders that are still open are indexed.
+        _, last = numpy.unique(records["order_id"][::-1], return_index=True)
+        last = len(records) - 1 - last
+        still_open = last[
+            ~numpy.isin(
+                records["status"][last],
+                [status.encode() for status in FINAL_ORDER_STATUSES],
+            )
+        ]
+        indexed = numpy.union1d(
+            still_open, numpy.arange(max(0, len(records) - recent), len(records))
+        )
+        for record in records[indexed].tolist():
+            self._index(_RECORD.pack(*record), record[1].decode(), record[7].decode())
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _index(self, record: bytes, order_id: str, status: str) -> None:
+        if status in FINAL_ORDER_STATUSES:
+            self._open.pop(order_id, None)
+        else:
+            self._open[order_id] = record
+
+        if self.recent:
+            self._recent[order_id] = record
+            self._recent.move_to_end(order_id)
+            if len(self._recent) > self.recent:
+                self._recent.popitem(last=False)
+
+    def append_fields(
+        self,
+        order_id: str,
+        client_order_id: str | None,
+        symbol: str,
+        side: OrderSide,
+        order_type: OrderType,
+        time_in_force: TimeInForce,
+        status: str,
+        executed_qty: str,
+        price: str,
+        stop_price: str = "",
+    ) -> None:
+        """
+        Appends an order from its fields, without building an OrderSchema.
+
+        Args:
+        - order_id: str, the id of the order.
+        - client_order_id: str or None, the client id of the order.
+        - symbol: str, the symbol of the order.
+        - side: OrderSide instance, the order side.
+        - order_type: OrderType instance, the order type.
+        - time_in_force: TimeInForce instance, the time in force.
+        - status: str, the status of the order.
+        - executed_qty: str, the executed quantity, as a decimal string.
+        - price: str, the price, as a decimal string, or "" for none.
+        - stop_price: str, the stop price, as a decimal string, or "" for none.
+
+        Raises:
+        - ValueError: when a field does not fit in its fixed-size field of the record.
+        """
+        record = _RECORD.pack(
+            time.time_ns() // 1_000_000,
+            _encode("order_id", order_id),
+            _encode("client_order_id", client_order_id or ""),
+            _encode("symbol", symbol),
+            side.encode(),
+            order_type.encode(),
+            time_in_force.encode(),
+            _encode("status", status),
+            _encode("executed_qty", executed_qty),
+            _encode("price", price),
+            _encode("stop_price", stop_price),
+        )
+        if self.path is not None:
+            self._file.write(record)
+            self._file.flush()
+        else:
+            if self._buffered >= self.max_records:
+                self._drop_oldest_records()
+            self._file.write(record)
+            self._buffered += 1
+
+        self._count += 1
+        self.summary.add(symbol, side)
+        self._index(record, order_id, status)
+
+    def _drop_oldest_records(self) -> None:
+        """
+        Keeps the newest half of the records of the in-memory buffer. Copying them once every
+        max_records / 2 appends keeps appending O(1) on average.
+        """
+        assert isinstance(self._file, io.BytesIO)
+        kept = self.max_records // 2
+        records = self._file.getvalue()
+        start = len(records) - kept * _RECORD.size
+        newest = records[start:]
+
+        self._file = io.BytesIO()
+        self._file.write(_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, _RECORD.size))
+        self._file.write(newest)
+        self._buffered = kept
+
+    def append(self, order: OrderSchema) -> None:
+        """
+        Appends an executed order.
+
+        Args:
+        - order: OrderSchema instance, the order.
+        """
+        self.append_fields(
+            order_id=str(order.order_id),
+            client_order_id=order.client_order_id,
+            symbol=order.symbol,
+            side=order.side,
+            order_type=order.type,
+            time_in_force=order.time_in_force,
+            status=order.status,
+            executed_qty=str(order.executed_qty),
+            price="" if order.price is None else str(order.price),
+            stop_price="" if order.stop_price is None else str(order.stop_price),
+        )
+
+    @staticmethod
+    def _order(record: tuple) -> OrderSchema:
+        """Builds the order of a record, as returned by numpy or struct."""
+        (
+            _,
+            order_id,
+            client_order_id,
+            symbol,
+            side,
+            order_type,
+            time_in_force,
+            status,
+            executed_qty,
+            price,
+            stop_price,
+        ) = (
+            value.rstrip(b"\0").decode() if isinstance(value, bytes) else value
+            for value in record
+        )
+        return OrderSchema.construct(
+            order_id=order_id,
+            client_order_id=client_order_id or None,
+            symbol=symbol,
+            status=status,
+            executed_qty=Decimal(executed_qty),
+            side=OrderSide(side),
+            type=OrderType(order_type),
+            time_in_force=TimeInForce(time_in_force),
+            price=Decimal(price) if price else None,
+            stop_price=Decimal(stop_price) if stop_price else None,
+        )
+
+    def get(self, order_id: str) -> OrderSchema | None:
+        """
+        Returns a recent or open order, or None if it is not indexed anymore.
+        """
+        record = self._recent.get(order_id) or self._open.get(order_id)
+        return None if record is None else self._order(_RECORD.unpack(record))
+
+    @property
+    def open_orders(self) -> list[OrderSchema]:
+        """The orders that are not in a final status yet."""
+        return [self._order(_RECORD.unpack(record)) for record in self._open.values()]
+
+    def records(self) -> numpy.ndarray:
+        """
+        Returns all the journaled orders as a structured array of ORDER_RECORD_DTYPE,
+        memory-mapped from the journal file, or copied from the in-memory journal, which
+        only holds the most recent orders, see max_records.
+        """
+        if not self._count:
+            return numpy.zeros(0, dtype=ORDER_RECORD_DTYPE)
+        if self.path is None:
+            assert isinstance(self._file, io.BytesIO)
+            return numpy.frombuffer(
+                self._file.getvalue(),
+                dtype=ORDER_RECORD_DTYPE,
+                count=self._buffered,
+                offset=_HEADER.size,
+            )
+
+        self._file.flush()
+        return numpy.memmap(
+            self.path,
+            dtype=ORDER_RECORD_DTYPE,
+            mode="r",
+            offset=_HEADER.size,
+            shape=(self._count,),
+        )
+
+    def replay(self, chunk_size: int = 10_000) -> Iterator[OrderSchema]:
+        """
+        Yields every journaled order, in order, reading the records a chunk at a time.
+        """
+        records = self.records()
+        for start in range(0, len(records), chunk_size):
+            end = start + chunk_size
+            for record in records[start:end].tolist():
+                yield self._order(record)
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,304 @@
+from collections import deque
+from collections.abc import Iterator, Mapping
+from decimal import Decimal
+from uuid import UUID
+
+import numpy
+from position_manager.fixed_point import FixedPointAccounting
+from pydantic import BaseModel
+
+
+class Position(BaseModel):
+    symbol: str
+    entry_price: Decimal
+    quantity: Decimal
+    order_id: str | UUID | int
+    stop_loss_price: Decimal | None = None
+    take_profit_price: Decimal | None = None
+
+
+class PositionBook(Mapping[str, Position]):
+    def __init__(
+        self, capacity: int = 16, accounting: FixedPointAccounting | None = None
+    ) -> None:
+        """
+        Array-backed book of the open positions, keyed by position id.
+
+        Every position lives in a slot of a set of columns: numeric float64 columns for vectorized
+        valuation, and the exact Decimal values for the accounting. Closed slots go on a free-list
+        and are reused, the columns double when they are full. Each symbol keeps its positions
+        in opening order, so finding the oldest position of a symbol is O(1).
+
+        Reading a position builds a Position model from its slot, without validation.
+        With fixed point accounting, the exact values are ticks and steps, converted to
+        Decimal only when a position is read.
+
+        Args:
+        - capacity: int, the number of slots allocated up front.
+        - accounting: FixedPointAccounting or None, the scales of the exact values, if they are scaled integers.
+        """
+        self.accounting = accounting
+        self.symbols: list[str] = []
+        self._symbol_ids: dict[str, int] = {}
+
+        self.symbol_ids = numpy.zeros(capacity, dtype=numpy.int32)
+        self.entry_prices = numpy.zeros(capacity)
+        self.quantities = numpy.zeros(capacity)
+        self.stop_loss_prices = numpy.full(capacity, numpy.nan)
+        self.take_profit_prices = numpy.full(capacity, numpy.nan)
+        self.is_open = numpy.zeros(capacity, dtype=bool)
+
+        self._entry_price: list[Decimal | int] = [0] * capacity
+        self._quantity: list[Decimal | int] = [0] * capacity
+        self._stop_loss_price: list[Decimal | int | None] = [None] * capacity
+        self._take_profit_price: list[Decimal | int | None] = [None] * capacity
+        self._order_id: list[str | UUID | int] = [""] * capacity
+        self._position_id: list[str | None] = [None] * capacity
+
+        self._free_slots = list(range(capacity - 1, -1, -1))
+        self._slots: dict[str, int] = {}  # slot per position id, in opening order
+        self._by_symbol: dict[int, deque[tuple[int, str]]] = {}
+
+    @property
+    def capacity(self) -> int:
+        return len(self.is_open)
+
+    def _grow(self) -> None:
+        capacity = self.capacity
+        self.symbol_ids = numpy.concatenate(
+            (self.symbol_ids, numpy.zeros(capacity, dtype=numpy.int32))
+        )
+        self.entry_prices = numpy.concatenate(
+            (self.entry_prices, numpy.zeros(capacity))
+        )
+        self.quantities = numpy.concatenate((self.quantities, numpy.zeros(capacity)))
+        self.stop_loss_prices = numpy.concatenate(
+            (self.stop_loss_prices, numpy.full(capacity, numpy.nan))
+        )
+        self.take_profit_prices = numpy.concatenate(
+            (self.take_profit_prices, numpy.full(capacity, numpy.nan))
+        )
+        self.is_open = numpy.concatenate(
+            (self.is_open, numpy.zeros(capacity, dtype=bool))
+        )
+
+        self._entry_price.extend([0] * capacity)
+        self._quantity.extend([0] * capacity)
+        self._stop_loss_price.extend([None] * capacity)
+        self._take_profit_price.extend([None] * capacity)
+        self._order_id.extend([""] * capacity)
+        self._position_id.extend([None] * capacity)
+        self._free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def symbol_id(self, symbol: str) -> int:
+        """Returns the id of a symbol, registering it the first time."""
+        if (symbol_id := self._symbol_ids.get(symbol)) is None:
+            symbol_id = self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def open(
+        self,
+        position_id: str,
+        symbol: str,
+        entry_price: Decimal | int,
+        quantity: Decimal | int,
+        order_id: str | UUID | int,
+        stop_loss_price: Decimal | int | None = None,
+        take_profit_price: Decimal | int | None = None,
+    ) -> int:
+        """
+        Adds a position to a free slot.
+
+        Args:
+        - position_id: str, the unique id of the position.
+        - symbol: str, the symbol of the position.
+        - entry_price: Decimal, or ticks with fixed point accounting, the price the position was opened at.
+        - quantity: Decimal, or steps with fixed point accounting, the quantity held.
+        - order_id: str, UUID or int, the id of the order that opened the position.
+        - stop_loss_price: Decimal, ticks or None, the stop loss price.
+        - take_profit_price: Decimal, ticks or None, the take profit price.
+
+        Returns:
+        - The slot of the position.
+        """
+        if position_id in self._slots:
+            raise KeyError(f"position {position_id} is already open")
+        if not self._free_slots:
+            self._grow()
+
+        slot = self._free_slots.pop()
+        symbol_id = self.symbol_id(symbol)
+
+        tick_size, step_size = 1.0, 1.0
+        if self.accounting is not None:
+            fixed_point = self.accounting[symbol]
+            tick_size, step_size = fixed_point.tick_float, fixed_point.step_float
+
+        self.symbol_ids[slot] = symbol_id
+        self.entry_prices[slot] = float(entry_price) * tick_size
+        self.quantities[slot] = float(quantity) * step_size
+        self.stop_loss_prices[slot] = (
+            numpy.nan if stop_loss_price is None else float(stop_loss_price) * tick_size
+        )
+        self.take_profit_prices[slot] = (
+            numpy.nan
+            if take_profit_price is None
+            else float(take_profit_price) * tick_size
+        )
+        self.is_open[slot] = True
+
+        self._entry_price[slot] = entry_price
+        self._quantity[slot] = quantity
+        self._stop_loss_price[slot] = stop_loss_price
+        self._take_profit_price[slot] = take_profit_price
+        self._order_id[slot] = order_id
+        self._position_id[slot] = position_id
+
+        self._slots[position_id] = slot
+        self._by_symbol.setdefault(symbol_id, deque()).append((slot, position_id))
+        return slot
+
+    def close(self, position_id: str) -> Position:
+        """
+        Removes a position and frees its slot.
+
+        Args:
+        - position_id: str, the id of the position.
+
+        Returns:
+        - The closed Position.
+        """
+        slot = self._slots.pop(position_id)
+        position = self._position_at(slot)
+
+        self.is_open[slot] = False
+        self.quantities[slot] = 0.0
+        self._position_id[slot] = None
+        self._free_slots.append(slot)
+
+        # Positions are mostly closed oldest first, the others are skipped in oldest().
+        queue = self._by_symbol[self.symbol_ids[slot]]
+        if queue and queue[0] == (slot, position_id):
+            queue.popleft()
+        return position
+
+    def reduce(self, position_id: str, quantity: Decimal | int) -> None:
+        """
+        Sets the quantity of an open position, when it was closed partially.
+
+        Args:
+        - position_id: str, the id of the position.
+        - quantity: Decimal, or steps with fixed point accounting, the quantity still held.
+        """
+        slot = self._slots[position_id]
+        step_size = 1.0
+        if self.accounting is not None:
+            step_size = self.accounting[self.symbol(position_id)].step_float
+
+        self.quantities[slot] = float(quantity) * step_size
+        self._quantity[slot] = quantity
+
+    def oldest(self, symbol: str) -> str | None:
+        """
+        Returns the id of the oldest open position of a symbol, or None.
+        """
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            return None
+
+        queue = self._by_symbol[symbol_id]
+        while queue:
+            slot, position_id = queue[0]
+            if self._position_id[slot] == position_id:
+                return position_id
+            queue.popleft()
+        return None
+
+    def _position_at(self, slot: int) -> Position:
+        symbol = self.symbols[self.symbol_ids[slot]]
+        entry_price = self._entry_price[slot]
+        quantity = self._quantity[slot]
+        stop_loss_price = self._stop_loss_price[slot]
+        take_profit_price = self._take_profit_price[slot]
+
+        if self.accounting is not None:
+            fixed_point = self.accounting[symbol]
+            entry_price = fixed_point.price(int(entry_price))
+            quantity = fixed_point.quantity(int(quantity))
+            if stop_loss_price is not None:
+                stop_loss_price = fixed_point.price(int(stop_loss_price))
+            if take_profit_price is not None:
+                take_profit_price = fixed_point.price(int(take_profit_price))
+
+        return Position.construct(
+            symbol=symbol,
+            entry_price=entry_price,
+            quantity=quantity,
+            order_id=self._order_id[slot],
+            stop_loss_price=stop_loss_price,
+            take_profit_price=take_profit_price,
+        )
+
+    def exact_quantity(self, position_id: str) -> Decimal | int:
+        """
+        Returns the quantity of an open position as stored: a Decimal, or steps with fixed point accounting.
+        """
+        return self._quantity[self._slots[position_id]]
+
+    def __getitem__(self, position_id: str) -> Position:
+        return self._position_at(self._slots[position_id])
+
+    def __contains__(self, position_id: object) -> bool:
+        return position_id in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def slot(self, position_id: str) -> int:
+        """Returns the slot of an open position."""
+        return self._slots[position_id]
+
+    def symbol(self, position_id: str) -> str:
+        """Returns the symbol of an open position."""
+        return self.symbols[self.symbol_ids[self._slots[position_id]]]
+
+    def position_id(self, slot: int) -> str | None:
+        """Returns the id of the position in a slot, or None if the slot is free."""
+        return self._position_id[slot]
+
+    def mark_to_market(
+        self, prices: Mapping[str, float], default: float | None = None
+    ) -> numpy.ndarray:
+        """
+        Values every slot at the given prices, at once.
+
+        Args:
+        - prices: Mapping, the price per symbol.
+        - default: float or None, the price of the symbols missing from `prices`.
+          Without a default, the positions of those symbols are valued NaN.
+
+        Returns:
+        - The value of the position in each slot, zero for free slots.
+        """
+        missing = numpy.nan if default is None else default
+        symbol_prices = numpy.array(
+            [prices.get(symbol, missing) for symbol in self.symbols], dtype=float
+        )
+        if not len(symbol_prices):
+            return numpy.zeros(self.capacity)
+        return numpy.where(
+            self.is_open, self.quantities * symbol_prices[self.symbol_ids], 0.0
+        )
+
+    def market_value(
+        self, prices: Mapping[str, float], default: float | None = None
+    ) -> float:
+        """
+        Returns the total value of the open positions at the given prices.
+        See mark_to_market for the arguments.
+        """
+        return float(self.mark_to_market(prices, default).sum())
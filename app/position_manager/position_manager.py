@@ -1,41 +1,196 @@
 from collections import defaultdict
 from decimal import Decimal
-from uuid import UUID, uuid4
+from itertools import count
+from time import perf_counter_ns
+from uuid import uuid4
 
 from config.config import MainConfig
-from enums import OrderSide
+from enums import EventLevel, OrderSide, OrderType
+from events.event_sinks import ConsoleEventSink
+from interfaces import EventSinkProtocol
+from metrics.latency_recorder import LatencyRecorder
+from position_manager.position_book import Position, PositionBook
+from position_manager.position_store import PositionState, PositionStore
 from position_manager.trade_executor import TradeExecutor
-from pydantic import BaseModel
+from position_manager.trigger_engine import TriggerEngine
 from schemas import OrderSchema, Signal
 
 
-class Position(BaseModel):
-    symbol: str
-    entry_price: Decimal
-    quantity: Decimal
-    order_id: str | UUID | int
-    stop_loss_price: Decimal | None = None
-    take_profit_price: Decimal | None = None
-
-
 class PositionManager:
-    def __init__(self, config: MainConfig, trade_executor: TradeExecutor):
+    def __init__(
+        self,
+        config: MainConfig,
+        trade_executor: TradeExecutor,
+        event_sink: EventSinkProtocol | None = None,
+        latency_recorder: LatencyRecorder | None = None,
+        position_store: PositionStore | None = None,
+    ):
         """
         Initializes a new PositionManager instance.
 
         Args:
         - config: MainConfig instance, containing the main configuration.
         - trade_executor: TradeExecutor instance, which is responsible for executing trades.
+        - event_sink: EventSinkProtocol or None, where the events are reported. Defaults to the console.
+        - latency_recorder: LatencyRecorder or None, records the latency of the signal handling. Defaults to disabled.
+        - position_store: PositionStore or None, where the positions are persisted, and restored from on creation.
+          Defaults to no persistence.
         """
         self.config = config
         self.trade_executor = trade_executor
+        self.events = event_sink or ConsoleEventSink()
+        self.latency = latency_recorder or LatencyRecorder(enabled=False)
 
-        self.positions: dict[str, Position] = defaultdict()
+        self.store = position_store
+
+        self.positions = self._new_position_book()
+        self.triggers = TriggerEngine()
+        self._position_ids = count(1)
         self.portfolio: dict[str, Decimal] = defaultdict(Decimal)
         self.balance = self.config.trading_config.starting_balance
 
         self.open_positions: int = 0
 
+        if self.store is not None:
+            self._restore(self.store.load(self.balance))
+
+    def _new_position_book(self) -> PositionBook:
+        """
+        Returns an empty book for the open positions.
+        """
+        return PositionBook()
+
+    def _restore(self, state: PositionState) -> None:
+        """
+        Restores the balance, the portfolio and the open positions of a stored state.
+
+        Args:
+        - state: PositionState instance, the state loaded from the position store.
+        """
+        self.balance = state.balance
+        self.portfolio = defaultdict(Decimal, state.portfolio)
+        for position_id, position in state.restored_positions():
+            slot = self._restore_position(position_id, position)
+            self._index_triggers(position_id, position.symbol, slot)
+        self.open_positions = len(self.positions)
+        self._position_ids = count(state.next_position_id)
+
+        if self.open_positions and self.events.enabled(EventLevel.INFO):
+            self.events.emit(
+                EventLevel.INFO,
+                "positions_restored",
+                {
+                    "Open positions count": self.open_positions,
+                    "Current balance": self.balance,
+                },
+            )
+        if state.pending_orders:
+            # Submitted before a crash, they may have been filled: compare with the orders of the exchange.
+            self.events.emit(
+                EventLevel.WARNING,
+                "unconfirmed_orders",
+                {"Orders": state.pending_orders},
+            )
+
+    def _restore_position(self, position_id: str, position: Position) -> int:
+        """
+        Adds a restored position to the position book.
+
+        Args:
+        - position_id: str, the ID of the position.
+        - position: Position instance, the restored position.
+
+        Returns:
+        - The slot of the position in the position book.
+        """
+        return self.positions.open(
+            position_id,
+            symbol=position.symbol,
+            entry_price=position.entry_price,
+            quantity=position.quantity,
+            order_id=position.order_id,
+            stop_loss_price=position.stop_loss_price,
+            take_profit_price=position.take_profit_price,
+        )
+
+    def _persist_order(
+        self, symbol: str, side: OrderSide, quantity: Decimal
+    ) -> str | None:
+        """
+        Logs an order to the position store, if any, before it is submitted.
+
+        Args:
+        - symbol: str, the symbol of the order.
+        - side: OrderSide instance, the side of the order.
+        - quantity: Decimal, the quantity of the order.
+
+        Returns:
+        - The client order ID to submit the order with, or None without a position store.
+        """
+        if self.store is None:
+            return None
+        client_order_id = str(uuid4())
+        self.store.log_order(client_order_id, symbol, side, quantity)
+        return client_order_id
+
+    def _persist_unfilled(self, client_order_id: str | None) -> None:
+        """
+        Logs to the position store, if any, that nothing of an order was filled.
+
+        Args:
+        - client_order_id: str or None, the client order ID returned by _persist_order.
+        """
+        if self.store is not None and client_order_id is not None:
+            self.store.log_unfilled(client_order_id)
+
+    def _persist_open(
+        self,
+        position_id: str,
+        position: Position,
+        balance: Decimal,
+        holding: Decimal,
+        client_order_id: str | None,
+    ) -> None:
+        """
+        Logs an opened position, or the rest of a partially closed one, to the position store, if any.
+        It is logged before the balance, the portfolio and the positions are changed, so a failed
+        write leaves them as logged.
+
+        Args:
+        - position_id: str, the ID of the position.
+        - position: Position instance, the position as opened.
+        - balance: Decimal, the balance afterwards.
+        - holding: Decimal, the portfolio quantity of the symbol afterwards.
+        - client_order_id: str or None, the client order ID of the filled order.
+        """
+        if self.store is not None:
+            self.store.log_open(
+                position_id, position, balance, holding, order_id=client_order_id
+            )
+
+    def _persist_close(
+        self,
+        position_id: str,
+        symbol: str,
+        balance: Decimal,
+        holding: Decimal,
+        client_order_id: str | None,
+    ) -> None:
+        """
+        Logs a closed position to the position store, if any, before it is closed.
+
+        Args:
+        - position_id: str, the ID of the closed position.
+        - symbol: str, the symbol of the position.
+        - balance: Decimal, the balance afterwards.
+        - holding: Decimal, the portfolio quantity of the symbol afterwards.
+        - client_order_id: str or None, the client order ID of the filled order.
+        """
+        if self.store is not None:
+            self.store.log_close(
+                position_id, symbol, balance, holding, order_id=client_order_id
+            )
+
     def _close_position(self, position_id: str, signal: Signal) -> None:
         """
         Closes an active position.
@@ -49,39 +204,101 @@ class PositionManager:
 
         position = self.positions[position_id]
 
+        client_order_id = self._persist_order(
+            position.symbol, OrderSide.SELL, position.quantity
+        )
         sell_order = self.trade_executor.submit_order(
             symbol=position.symbol,
             side=OrderSide.SELL,
             quantity=position.quantity,
             price=signal.price,
+            client_order_id=client_order_id,
         )
+        if not sell_order.executed_qty:
+            self._persist_unfilled(client_order_id)
+            return
+
+        balance, holding = self._after_sell(position, sell_order)
+        remaining = position.quantity - sell_order.executed_qty
+        if remaining > 0:
+            self._persist_open(
+                position_id,
+                position.copy(update={"quantity": remaining}),
+                balance,
+                holding,
+                client_order_id,
+            )
+        else:
+            self._persist_close(
+                position_id, position.symbol, balance, holding, client_order_id
+            )
+
+        self.balance, self.portfolio[position.symbol] = balance, holding
+        if remaining > 0:
+            self._reduce_position(position_id, position.symbol, remaining)
+            return
 
-        self._update_balance_and_portfolio(position, sell_order)
         self.open_positions -= 1
-        del self.positions[position_id]
+        self.positions.close(position_id)
+        self.triggers.remove(position_id)
+
+    def _reduce_position(
+        self, position_id: str, symbol: str, quantity: Decimal | int
+    ) -> None:
+        """
+        Keeps the rest of a partially closed position open, watching its levels again.
+        It must have been persisted with _persist_open.
+
+        Args:
+        - position_id: str, the ID of the position.
+        - symbol: str, the symbol of the position.
+        - quantity: Decimal, or steps with fixed point accounting, the quantity still held.
+        """
+        self.positions.reduce(position_id, quantity)
+        self.triggers.remove(position_id)
+        self._index_triggers(position_id, symbol, self.positions.slot(position_id))
+
+    def _after_sell(
+        self, position: Position, sell_order: OrderSchema
+    ) -> tuple[Decimal, Decimal]:
+        """
+        Returns the balance and the portfolio quantity of the symbol once the fills of a sell order are booked:
+        their quote amount as reported by the exchange, or the value of the executed quantity, less the commission.
+
+        Args:
+        - position: Position instance, the position data.
+        - sell_order: OrderSchema instance, the sell order as reported by the exchange.
+        """
+        balance = self.balance
+        if sell_order.quote_qty is not None:
+            balance += sell_order.quote_qty
+        elif sell_order.executed_qty and sell_order.price is not None:
+            balance += sell_order.executed_qty * sell_order.price
+        balance -= sell_order.commission
+        return balance, self.portfolio[position.symbol] - sell_order.executed_qty
 
     def _update_balance_and_portfolio(
         self, position: Position, sell_order: OrderSchema
     ) -> None:
         """
-        Updates the balance and the portfolio of the PositionManager.
+        Books the fills of a sell order, see _after_sell.
 
         Args:
-        - position: dict, the position data.
-        - sell_order: Any, the sell order data.
+        - position: Position instance, the position data.
+        - sell_order: OrderSchema instance, the sell order as reported by the exchange.
         """
-        sell_value = sell_order.executed_qty * sell_order.price
-        self.balance += sell_value
-        self.portfolio[position.symbol] -= position.quantity
+        self.balance, self.portfolio[position.symbol] = self._after_sell(
+            position, sell_order
+        )
 
     def generate_position_id(self) -> str:
         """
         Generates a new position ID.
 
         Returns:
-        - A string representing a new UUID.
+        - A string representing the next number of the position counter.
         """
-        return str(uuid4())
+        return str(next(self._position_ids))
 
     def handle_signal(self, signal: Signal) -> None:
         """
@@ -90,6 +307,7 @@ class PositionManager:
         Args:
         - signal: Signal instance, the signal to be handled.
         """
+        started_at = perf_counter_ns() if self.latency.enabled else 0
 
         notional = self.config.trading_config.notional
 
@@ -98,9 +316,19 @@ class PositionManager:
         elif signal.action == OrderSide.SELL:
             self._handle_sell_signal(signal)
 
-        print(f"Current balance: {self.balance}")
-        print(f"Current portfolio: {self.portfolio}")
-        print(f"Current positions: {self.positions}")
+        if self.events.enabled(EventLevel.DEBUG):
+            self.events.emit(
+                EventLevel.DEBUG,
+                "positions",
+                {
+                    "Current balance": self.balance,
+                    "Current portfolio": dict(self.portfolio),
+                    "Current positions": dict(self.positions),
+                },
+            )
+
+        if self.latency.enabled:
+            self.latency.record("handle_signal", perf_counter_ns() - started_at)
 
     def _handle_buy_signal(self, signal: Signal, notional: Decimal) -> None:
         """
@@ -119,31 +347,119 @@ class PositionManager:
         # Calculate the quantity to buy
         quantity = notional / signal.price
 
+        client_order_id = self._persist_order(signal.symbol, OrderSide.BUY, quantity)
         buy_order = self.trade_executor.submit_order(
             symbol=signal.symbol,
             side=OrderSide.BUY,
             quantity=quantity,
             price=signal.price,
+            client_order_id=client_order_id,
         )
 
-        # Update the portfolio
-        self.portfolio[signal.symbol] += quantity
-
-        # Update the balance
-        self.balance -= notional
+        # Book the fills reported by the exchange, which may be partial
+        if not buy_order.executed_qty or buy_order.price is None:
+            self._persist_unfilled(client_order_id)
+            return
+        if buy_order.executed_qty == quantity and buy_order.price == signal.price:
+            # Exactly the notional, without the rounding of quantity * price
+            cost = notional
+        elif buy_order.quote_qty is not None:
+            # The exact amount paid, also for a quantity less a commission in the base asset
+            cost = buy_order.quote_qty
+        else:
+            cost = buy_order.executed_qty * buy_order.price
+
+        position_id = self.generate_position_id()
+        balance = self.balance - (cost + buy_order.commission)
+        holding = self.portfolio[signal.symbol] + buy_order.executed_qty
+        if self.store is not None:
+            position = Position.construct(
+                symbol=signal.symbol,
+                entry_price=buy_order.price,
+                quantity=buy_order.executed_qty,
+                order_id=buy_order.order_id,
+                stop_loss_price=signal.stop_price,
+                take_profit_price=signal.take_profit_price,
+            )
+            self._persist_open(position_id, position, balance, holding, client_order_id)
+
+        # Update the portfolio and the balance
+        self.portfolio[signal.symbol] = holding
+        self.balance = balance
 
         # Add the position to active_positions
-        self.positions[self.generate_position_id()] = Position(
+        slot = self.positions.open(
+            position_id,
             symbol=signal.symbol,
-            entry_price=signal.price,
+            entry_price=buy_order.price,
             stop_loss_price=signal.stop_price,
             take_profit_price=signal.take_profit_price,
-            quantity=quantity,
+            quantity=buy_order.executed_qty,
             order_id=buy_order.order_id,
         )
+        self._index_triggers(position_id, signal.symbol, slot)
 
         self.open_positions += 1
 
+    def _index_triggers(self, position_id: str, symbol: str, slot: int) -> None:
+        """
+        Watches the stop loss and take profit levels of a new position.
+
+        Args:
+        - position_id: str, the ID of the position.
+        - symbol: str, the symbol of the position.
+        - slot: int, the slot of the position in the position book.
+        """
+        self.triggers.add(
+            position_id,
+            symbol,
+            stop_loss_price=float(self.positions.stop_loss_prices[slot]),
+            take_profit_price=float(self.positions.take_profit_prices[slot]),
+        )
+
+    def trigger_bounds(self, symbol: str) -> tuple[float, float]:
+        """
+        Returns the highest stop loss and the lowest take profit level of the open positions of a symbol,
+        -inf and inf when there are none. A bar that stays between them triggers nothing.
+
+        Args:
+        - symbol: str, the symbol.
+        """
+        return self.triggers.bounds(symbol)
+
+    def check_triggers(self, symbol: str, high: float, low: float) -> int:
+        """
+        Closes the positions of a symbol whose stop loss or take profit level was reached by a bar.
+        The positions are closed at their level, like a resting stop or limit order would be.
+
+        Args:
+        - symbol: str, the symbol of the bar.
+        - high: float, the highest price of the bar.
+        - low: float, the lowest price of the bar.
+
+        Returns:
+        - The number of closed positions.
+        """
+        triggered = self.triggers.triggered(symbol, high, low)
+        for position_id, order_type in triggered:
+            position = self.positions[position_id]
+            price = (
+                position.stop_loss_price
+                if order_type == OrderType.STOP_LOSS
+                else position.take_profit_price
+            )
+            self._close_position(
+                position_id,
+                Signal(
+                    name="trigger_engine",
+                    reason=order_type.lower(),
+                    symbol=symbol,
+                    action=OrderSide.SELL,
+                    price=price,
+                ),
+            )
+        return len(triggered)
+
     def _handle_sell_signal(self, signal: Signal) -> None:
         """
         Handles a new sell signal.
@@ -151,40 +467,49 @@ class PositionManager:
         Args:
         - signal: Signal instance, the sell signal to be handled.
         """
-        if len(self.positions.keys()) == 0:
-            return
-
-        if positions_for_symbol := list(self.positions.items()):
-            oldest_position_id, _ = positions_for_symbol[0]
+        oldest_position_id = self.positions.oldest(signal.symbol)
+        if oldest_position_id is not None:
             self._close_position(position_id=oldest_position_id, signal=signal)
 
     def print_stats(
         self,
         close_price: Decimal,
+        close_prices: dict[str, Decimal] | None = None,
     ) -> None:
         """
-        Prints the statistics for the PositionManager.
+        Reports the statistics for the PositionManager.
 
         Args:
         - close_price: Decimal, the closing price of the asset.
+        - close_prices: dict or None, the closing price per symbol, when trading several symbols.
         """
+        # The portfolio holds the quantity of the open positions per symbol.
+        close_prices = close_prices or {}
         final_portfolio_value = sum(
-            position.quantity * close_price for position in self.positions.values()
+            (
+                quantity * close_prices.get(symbol, close_price)
+                for symbol, quantity in self.portfolio.items()
+            ),
+            Decimal(0),
         )
         balance_plus_portfolio_value = self.balance + final_portfolio_value
         total_profit = (
             balance_plus_portfolio_value - self.config.trading_config.starting_balance
         )
 
-        print("POSITION MANAGER STATS:")
-        print(f"Sum open positions Value: {round(final_portfolio_value,2)}")
-        print(f"Open positions count: {self.open_positions}")
-
-        print(f"Final cash balance: {self.balance}")
-        print(
-            f"Final cash balance + sum open positions value: {round(balance_plus_portfolio_value,2)}"
+        self.events.emit(
+            EventLevel.SUMMARY,
+            "position_manager_stats",
+            {
+                "Sum open positions Value": round(final_portfolio_value, 2),
+                "Open positions count": self.open_positions,
+                "Final cash balance": self.balance,
+                "Final cash balance + sum open positions value": round(
+                    balance_plus_portfolio_value, 2
+                ),
+                "Total profit": round(total_profit, 2),
+            },
         )
 
-        print(f"Total profit: {round(total_profit,2)}")
-
         self.trade_executor.print_stats()
+        self.latency.print_stats(self.events)
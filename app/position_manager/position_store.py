@@ -0,0 +1,319 @@
+import json
+import os
+from decimal import Decimal
+from typing import Any, BinaryIO
+
+from position_manager.position_book import Position
+
+STATE_VERSION = 1
+SNAPSHOT_FILE = "positions.snapshot.json"
+LOG_FILE = "positions.wal"
+
+
+def _encode_position(position: Position) -> dict[str, str | None]:
+    return {
+        "symbol": position.symbol,
+        "entry_price": str(position.entry_price),
+        "quantity": str(position.quantity),
+        "order_id": str(position.order_id),
+        "stop_loss_price": None
+        if position.stop_loss_price is None
+        else str(position.stop_loss_price),
+        "take_profit_price": None
+        if position.take_profit_price is None
+        else str(position.take_profit_price),
+    }
+
+
+class PositionState:
+    def __init__(self, balance: Decimal) -> None:
+        """
+        The durable state of a PositionManager: the balance, the portfolio and the open positions.
+
+        Decimals are kept as their exact strings, so the state does not depend on the accounting
+        of the PositionManager that wrote it.
+
+        Args:
+        - balance: Decimal, the balance before any position was opened.
+        """
+        self.sequence = 0  # sequence number of the last applied log record
+        self.balance = balance
+        self.portfolio: dict[str, Decimal] = {}
+        self.positions: dict[str, dict[str, str | None]] = {}  # in opening order
+        self.next_position_id = 1
+        # orders that were submitted, without a record of their fills, by client order id
+        self.pending_orders: dict[str, dict[str, str]] = {}
+
+    def apply(self, record: dict[str, Any]) -> None:
+        """
+        Applies a log record.
+
+        Args:
+        - record: dict, an "order", "unfilled", "open" or "close" record of the write-ahead log.
+        """
+        self.sequence = record["sequence"]
+        if record["op"] == "order":
+            self.pending_orders[record["order_id"]] = {
+                "symbol": record["symbol"],
+                "side": record["side"],
+                "quantity": record["quantity"],
+            }
+            return
+
+        if (order_id := record.get("order_id")) is not None:
+            self.pending_orders.pop(order_id, None)
+        if record["op"] == "unfilled":
+            return
+
+        self.balance = Decimal(record["balance"])
+        self.portfolio[record["symbol"]] = Decimal(record["holding"])
+
+        position_id = record["position_id"]
+        if record["op"] == "open":
+            self.positions[position_id] = record["position"]
+            if position_id.isdigit():
+                self.next_position_id = max(self.next_position_id, int(position_id) + 1)
+        else:
+            self.positions.pop(position_id, None)
+
+    def restored_positions(self) -> list[tuple[str, Position]]:
+        """
+        Returns the open positions, in opening order.
+        """
+        return [
+            (position_id, Position(**fields))
+            for position_id, fields in self.positions.items()
+        ]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": STATE_VERSION,
+            "sequence": self.sequence,
+            "balance": str(self.balance),
+            "portfolio": {
+                symbol: str(quantity) for symbol, quantity in self.portfolio.items()
+            },
+            "positions": self.positions,
+            "next_position_id": self.next_position_id,
+            "pending_orders": self.pending_orders,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "PositionState":
+        if data.get("version") != STATE_VERSION:
+            raise ValueError("unsupported position snapshot version")
+
+        state = cls(Decimal(data["balance"]))
+        state.sequence = data["sequence"]
+        state.portfolio = {
+            symbol: Decimal(quantity) for symbol, quantity in data["portfolio"].items()
+        }
+        state.positions = data["positions"]
+        state.next_position_id = data["next_position_id"]
+        state.pending_orders = data.get("pending_orders", {})
+        return state
+
+
+class PositionStore:
+    def __init__(
+        self, directory: str, snapshot_interval: int = 1000, sync: bool = False
+    ) -> None:
+        """
+        Durable state of a PositionManager, as a snapshot plus a write-ahead log.
+
+        Every opened and closed position is appended to the log, one JSON line per mutation,
+        holding the position and the balance and holding of its symbol afterwards. The orders are
+        logged before they are submitted, and their fills before they change the PositionManager,
+        so orders that may have filled before a crash are known after a restart. Every
+        `snapshot_interval` records the whole state is written to a snapshot file, atomically,
+        and the log is truncated. Loading reads the snapshot and replays the records after it,
+        so a restarted bot recovers without the order history of the exchange.
+
+        A partially written last record, left by a crash, is dropped when the log is loaded.
+
+        Args:
+        - directory: str, the directory of the snapshot and log files, created if missing.
+        - snapshot_interval: int, the number of log records between snapshots.
+        - sync: bool, whether every record is fsynced to disk, instead of only flushed to the OS.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.log_path = os.path.join(directory, LOG_FILE)
+        self.snapshot_interval = snapshot_interval
+        self.sync = sync
+
+        self.state: PositionState | None = None
+        self._log: BinaryIO | None = None
+        self._since_snapshot = 0
+
+    def load(self, starting_balance: Decimal) -> PositionState:
+        """
+        Recovers the state from the latest snapshot and the log records after it.
+
+        Args:
+        - starting_balance: Decimal, the balance when nothing was stored yet.
+
+        Returns:
+        - The recovered PositionState.
+        """
+        state = PositionState(starting_balance)
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "rb") as snapshot:
+                state = PositionState.from_dict(json.load(snapshot))
+
+        replayed = 0
+        end = 0
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "rb") as log:
+                for line in log:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    end += len(line)
+                    # Records up to the snapshot remain if the bot stopped before truncating the log.
+                    if record["sequence"] > state.sequence:
+                        state.apply(record)
+                        replayed += 1
+
+        self._log = open(self.log_path, "ab")
+        self._log.truncate(end)
+        self._since_snapshot = replayed
+        self.state = state
+        return state
+
+    def _append(self, record: dict[str, Any]) -> None:
+        if self.state is None or self._log is None:
+            raise RuntimeError("the position store must be loaded before it is written")
+
+        # The record is written before the state changes, so a failed write leaves the state as logged.
+        record["sequence"] = self.state.sequence + 1
+        self._log.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+        self._log.flush()
+        if self.sync:
+            os.fsync(self._log.fileno())
+        self.state.apply(record)
+
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_interval:
+            self.snapshot()
+
+    def log_order(
+        self, order_id: str, symbol: str, side: str, quantity: Decimal
+    ) -> None:
+        """
+        Logs an order about to be submitted, pending until its fills are logged.
+
+        Args:
+        - order_id: str, the client order ID of the order.
+        - symbol: str, the symbol of the order.
+        - side: str, the side of the order.
+        - quantity: Decimal, the quantity of the order.
+        """
+        self._append(
+            {
+                "op": "order",
+                "order_id": order_id,
+                "symbol": symbol,
+                "side": str(side),
+                "quantity": str(quantity),
+            }
+        )
+
+    def log_unfilled(self, order_id: str) -> None:
+        """
+        Logs that nothing of a pending order was filled.
+
+        Args:
+        - order_id: str, the client order ID of the order.
+        """
+        self._append({"op": "unfilled", "order_id": order_id})
+
+    def log_open(
+        self,
+        position_id: str,
+        position: Position,
+        balance: Decimal,
+        holding: Decimal,
+        order_id: str | None = None,
+    ) -> None:
+        """
+        Logs an opened position, or the rest of a partially closed position.
+
+        Args:
+        - position_id: str, the ID of the position.
+        - position: Position instance, the opened position.
+        - balance: Decimal, the balance after the position was opened.
+        - holding: Decimal, the portfolio quantity of the symbol after the position was opened.
+        - order_id: str or None, the client order ID of the pending order that was filled.
+        """
+        self._append(
+            {
+                "op": "open",
+                "position_id": position_id,
+                "symbol": position.symbol,
+                "position": _encode_position(position),
+                "balance": str(balance),
+                "holding": str(holding),
+                "order_id": order_id,
+            }
+        )
+
+    def log_close(
+        self,
+        position_id: str,
+        symbol: str,
+        balance: Decimal,
+        holding: Decimal,
+        order_id: str | None = None,
+    ) -> None:
+        """
+        Logs a closed position.
+
+        Args:
+        - position_id: str, the ID of the position.
+        - symbol: str, the symbol of the position.
+        - balance: Decimal, the balance after the position was closed.
+        - holding: Decimal, the portfolio quantity of the symbol after the position was closed.
+        - order_id: str or None, the client order ID of the pending order that was filled.
+        """
+        self._append(
+            {
+                "op": "close",
+                "position_id": position_id,
+                "symbol": symbol,
+                "balance": str(balance),
+                "holding": str(holding),
+                "order_id": order_id,
+            }
+        )
+
+    def snapshot(self) -> None:
+        """
+        Writes the state to the snapshot file, atomically, and truncates the log.
+        """
+        if self.state is None or self._log is None:
+            raise RuntimeError("the position store must be loaded before it is written")
+
+        temporary_path = f"{self.snapshot_path}.tmp"
+        with open(temporary_path, "wb") as snapshot:
+            snapshot.write(json.dumps(self.state.to_dict()).encode())
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temporary_path, self.snapshot_path)
+
+        self._log.truncate(0)
+        self._since_snapshot = 0
+
+    def close(self) -> None:
+        """
+        Snapshots the state if the log is not empty, so the next start only reads the snapshot.
+        """
+        if self._log is None:
+            return
+        if self._since_snapshot:
+            self.snapshot()
+        self._log.close()
+        self._log = None
@@ -1,49 +1,71 @@
-from collections import defaultdict
 from decimal import Decimal
+from itertools import count
+from time import perf_counter_ns
 from uuid import uuid4
 
 from config.config import MainConfig
-from enums import OrderSide, OrderType, TimeInForce
-from interfaces import CryptoExchangeProtocol
-from schemas import CreateOrderSchema, OrderSchema
+from enums import EventLevel, OrderSide, OrderType, TimeInForce
+from events.event_sinks import ConsoleEventSink
+from interfaces import CryptoExchangeProtocol, EventSinkProtocol
+from metrics.latency_recorder import LatencyRecorder
+from position_manager.fixed_point import FixedPoint, FixedPointFill
+from position_manager.order_journal import OrderJournal
+from schemas import CreateOrderSchema, OrderRejectedError, OrderSchema
 
 
 class TradeExecutor:
     def __init__(
-        self, config: MainConfig, crypto_exchange: CryptoExchangeProtocol | None
+        self,
+        config: MainConfig,
+        crypto_exchange: CryptoExchangeProtocol | None,
+        event_sink: EventSinkProtocol | None = None,
+        latency_recorder: LatencyRecorder | None = None,
+        order_journal: OrderJournal | None = None,
     ):
         """
         Initializes a new TradeExecutor instance.
 
         Args:
         - config: MainConfig instance, containing the main configuration.
-        - crypto_exchange: CryptoExchangeProtocol instance, the crypto exchange to use.
+        - crypto_exchange: CryptoExchangeProtocol instance, the crypto exchange to use. When backtesting, orders are
+          only sent to it if it is simulated in process, and filled at the order price otherwise.
+        - event_sink: EventSinkProtocol or None, where the events are reported. Defaults to the console.
+        - latency_recorder: LatencyRecorder or None, records the latency of the orders. Defaults to disabled.
+        - order_journal: OrderJournal or None, where the executed orders are recorded. Defaults to an in-memory journal.
         """
         self.config = config
         self.crypto_exchange = crypto_exchange
-        self.orders: dict[str, OrderSchema] = defaultdict()
+        self.events = event_sink or ConsoleEventSink()
+        self.latency = latency_recorder or LatencyRecorder(enabled=False)
+        self.journal = order_journal or OrderJournal()
+        self._fixed_point_order_ids = count(1)
+        self._simulated = getattr(crypto_exchange, "simulated", False)
+        self._fake_fills = crypto_exchange is None or (
+            config.backtest and not self._simulated
+        )
+
+    @property
+    def order_count(self) -> int:
+        """The number of executed orders."""
+        return len(self.journal)
 
     def print_stats(
         self,
     ) -> None:
         """
-        Prints the statistics for the TradeExecutor.
+        Reports the statistics for the TradeExecutor.
         """
+        summary = self.journal.summary
 
-        print("TradeExecutor stats:")
-        print(f"Total orders: {len(self.orders)}")
-
-        sell_orders = 0
-        buy_orders = 0
-
-        for order in self.orders.values():
-            if order.side == OrderSide.SELL:
-                sell_orders += 1
-            else:
-                buy_orders += 1
-
-        print(f"Total sell orders: {sell_orders}")
-        print(f"Total buy orders: {buy_orders}")
+        self.events.emit(
+            EventLevel.SUMMARY,
+            "trade_executor_stats",
+            {
+                "Total orders": summary.count,
+                "Total sell orders": summary.by_side[OrderSide.SELL],
+                "Total buy orders": summary.by_side[OrderSide.BUY],
+            },
+        )
 
     def submit_order(
         self,
@@ -53,6 +75,7 @@ class TradeExecutor:
         price: Decimal,
         stop_price: Decimal | None = None,
         trailing_delta: Decimal | None = None,
+        client_order_id: str | None = None,
     ) -> OrderSchema:
         """
         Submits an order to the crypto exchange.
@@ -64,11 +87,15 @@ class TradeExecutor:
         - price: Decimal, the order price.
         - stop_price: Decimal or None, the stop price for the order.
         - trailing_delta: Decimal or None, the trailing delta for the order.
+        - client_order_id: str or None, the client order ID of the order. Defaults to a new UUID.
 
         Returns:
-        - An OrderSchema instance representing the executed order.
+        - An OrderSchema instance representing the executed order. Its executed quantity, average price and
+          commission are the fills reported by the exchange, and may be less than the order quantity.
+          An order rejected by the exchange is reported, and returned REJECTED without any fill.
         """
-        client_order_id = str(uuid4())
+        started_at = perf_counter_ns() if self.latency.enabled else 0
+        client_order_id = client_order_id or str(uuid4())
         payload = CreateOrderSchema(
             symbol=symbol,
             side=side,
@@ -81,8 +108,8 @@ class TradeExecutor:
             trailing_delta=trailing_delta,
         )
 
-        # Return fake order if backtesting or crypto_exchange is None
-        if self.config.backtest or self.crypto_exchange is None:
+        # Return fake order if backtesting without a simulated exchange, or crypto_exchange is None
+        if self._fake_fills or self.crypto_exchange is None:
             order = OrderSchema(
                 order_id=str(uuid4()),
                 client_order_id=payload.client_order_id,
@@ -95,10 +122,148 @@ class TradeExecutor:
                 price=payload.price,
                 stop_price=payload.stop_price,
             )
-            self.orders[str(order.order_id)] = order
-            return order
+        else:
+            try:
+                order = self.crypto_exchange.create_order(payload)
+            except OrderRejectedError as error:
+                return self._rejected_order(payload, error)
+            if self._simulated and order.status in ("NEW", "PARTIALLY_FILLED"):
+                # Like Binance expires what the book can't fill of a market order, the remainder that
+                # the liquidity of the bar could not fill is cancelled, so only the fills are booked.
+                self.crypto_exchange.cancel_order_by_id(str(order.order_id))
+                order = order.copy(update={"status": "CANCELED"})
 
-        # Assumes order is filled immediately
-        order = self.crypto_exchange.create_order(payload)
-        self.orders[str(order.order_id)] = order
+        self._record_order(order)
+        if self.latency.enabled:
+            self.latency.record("submit_order", perf_counter_ns() - started_at)
         return order
+
+    def submit_fixed_point_order(
+        self,
+        symbol: str,
+        side: OrderSide,
+        quantity_steps: int,
+        price_ticks: int,
+        fixed_point: FixedPoint,
+        client_order_id: str | None = None,
+    ) -> FixedPointFill:
+        """
+        Submits an order of a fixed point account.
+
+        Simulated orders are filled as integers and journaled without building an order model. Live orders are converted to Decimal and submitted with submit_order, their fills are valued at the quote amount reported by the exchange, not at the average price rounded to ticks.
+
+        Args:
+        - symbol: str, the symbol to trade.
+        - side: OrderSide instance, the order side.
+        - quantity_steps: int, the order quantity, in steps.
+        - price_ticks: int, the order price, in ticks.
+        - fixed_point: FixedPoint instance, the scales of the symbol.
+        - client_order_id: str or None, the client order ID of the order.
+
+        Returns:
+        - A FixedPointFill with the order id and the executed quantity and price.
+        """
+        if not self._fake_fills and self.crypto_exchange is not None:
+            order = self.submit_order(
+                symbol=symbol,
+                side=side,
+                quantity=fixed_point.quantity(quantity_steps),
+                price=fixed_point.price(price_ticks),
+                client_order_id=client_order_id,
+            )
+            return FixedPointFill(
+                str(order.order_id),
+                fixed_point.to_steps(order.executed_qty),
+                0 if order.price is None else fixed_point.to_ticks(order.price),
+                order.commission,
+                None
+                if order.quote_qty is None
+                else fixed_point.to_money(order.quote_qty),
+            )
+
+        started_at = perf_counter_ns() if self.latency.enabled else 0
+        order_id = f"fixed-point-{next(self._fixed_point_order_ids)}"
+        self.journal.append_fields(
+            order_id=order_id,
+            client_order_id=client_order_id,
+            symbol=symbol,
+            side=side,
+            order_type=OrderType.MARKET,
+            time_in_force=TimeInForce.GTC,
+            status="FILLED",
+            executed_qty=fixed_point.quantity_text(quantity_steps),
+            price=fixed_point.price_text(price_ticks),
+        )
+        if self.events.enabled(EventLevel.INFO):
+            self.events.emit(
+                EventLevel.INFO,
+                "order",
+                {
+                    "Symbol": symbol,
+                    "Side": side,
+                    "Quantity": fixed_point.quantity(quantity_steps),
+                    "Price": fixed_point.price(price_ticks),
+                    "Order id": order_id,
+                },
+            )
+        if self.latency.enabled:
+            self.latency.record("submit_order", perf_counter_ns() - started_at)
+        return FixedPointFill(order_id, quantity_steps, price_ticks)
+
+    def _rejected_order(
+        self, payload: CreateOrderSchema, error: OrderRejectedError
+    ) -> OrderSchema:
+        """
+        Reports an order rejected by the exchange, which is not journaled.
+
+        Args:
+        - payload: CreateOrderSchema instance, the rejected order.
+        - error: OrderRejectedError instance, the reason of the rejection.
+
+        Returns:
+        - The order, REJECTED without any fill.
+        """
+        if self.events.enabled(EventLevel.WARNING):
+            self.events.emit(
+                EventLevel.WARNING,
+                "order_rejected",
+                {
+                    "Symbol": payload.symbol,
+                    "Side": payload.side,
+                    "Quantity": payload.quantity,
+                    "Price": payload.price,
+                    "Reason": error,
+                },
+            )
+        return OrderSchema(
+            order_id=payload.client_order_id,
+            client_order_id=payload.client_order_id,
+            symbol=payload.symbol,
+            status="REJECTED",
+            side=payload.side,
+            type=payload.type,
+            time_in_force=payload.time_in_force,
+            price=None,
+            stop_price=payload.stop_price,
+        )
+
+    def _record_order(self, order: OrderSchema) -> None:
+        """
+        Journals an executed order and reports it.
+
+        Args:
+        - order: OrderSchema instance, the executed order.
+        """
+        self.journal.append(order)
+        if self.events.enabled(EventLevel.INFO):
+            self.events.emit(
+                EventLevel.INFO,
+                "order",
+                {
+                    "Symbol": order.symbol,
+                    "Side": order.side,
+                    "Quantity": order.executed_qty,
+                    "Price": order.price,
+                    "Order id": order.order_id,
+                },
+            )
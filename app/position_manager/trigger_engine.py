@@ -0,0 +1,156 @@
+import heapq
+import math
+from itertools import count
+
+from enums import OrderType
+
+# An index entry: (sort key, insertion order, position id). The stops are keyed by their negated
+# price, so the top of both heaps is the level that the price reaches first. The insertion order
+# also tells the entries of the current levels of a position from those of its earlier levels.
+_Entry = tuple[float, int, str]
+
+
+class TriggerEngine:
+    def __init__(self) -> None:
+        """
+        Index of the stop loss and take profit levels of the open positions, per symbol.
+
+        Stops sit in a max-heap and targets in a min-heap, so checking a bar against all the
+        levels of a symbol costs O(log n) per triggered level instead of a scan of the positions.
+        Removed positions are dropped lazily when they reach the top of a heap; the heaps are
+        rebuilt when they mostly hold removed entries. A position that is indexed again only
+        matches the entries of its last add.
+        """
+        self._stops: dict[str, list[_Entry]] = {}
+        self._targets: dict[str, list[_Entry]] = {}
+        # symbol and insertion order of the entries of every indexed position id
+        self._symbols: dict[str, tuple[str, int]] = {}
+        self._entries: dict[str, int] = {}  # entries in the heaps of every symbol
+        self._live: dict[str, int] = {}  # indexed positions of every symbol
+        self._sequence = count()
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, position_id: object) -> bool:
+        return position_id in self._symbols
+
+    def add(
+        self,
+        position_id: str,
+        symbol: str,
+        stop_loss_price: float,
+        take_profit_price: float,
+    ) -> None:
+        """
+        Indexes the levels of a position, replacing its earlier levels. A NaN level is not indexed.
+
+        Args:
+        - position_id: str, the id of the position.
+        - symbol: str, the symbol of the position.
+        - stop_loss_price: float, the price at or below which the position is stopped out.
+        - take_profit_price: float, the price at or above which the profit is taken.
+        """
+        self.remove(position_id)
+        has_stop = not math.isnan(stop_loss_price)
+        has_target = not math.isnan(take_profit_price)
+        if not (has_stop or has_target):
+            return
+
+        sequence = next(self._sequence)
+        if has_stop:
+            heapq.heappush(
+                self._stops.setdefault(symbol, []),
+                (-stop_loss_price, sequence, position_id),
+            )
+        if has_target:
+            heapq.heappush(
+                self._targets.setdefault(symbol, []),
+                (take_profit_price, sequence, position_id),
+            )
+        self._symbols[position_id] = (symbol, sequence)
+        self._entries[symbol] = self._entries.get(symbol, 0) + has_stop + has_target
+        self._live[symbol] = self._live.get(symbol, 0) + 1
+
+    def remove(self, position_id: str) -> None:
+        """
+        Stops watching the levels of a position, e.g. when it was closed by a signal.
+        """
+        if (indexed := self._symbols.pop(position_id, None)) is None:
+            return
+
+        symbol = indexed[0]
+        self._live[symbol] -= 1
+        if self._entries[symbol] > 4 * self._live[symbol] + 64:
+            self._compact(symbol)
+
+    def _is_live(self, entry: _Entry) -> bool:
+        """Whether an entry holds a current level of an indexed position."""
+        indexed = self._symbols.get(entry[2])
+        return indexed is not None and indexed[1] == entry[1]
+
+    def _compact(self, symbol: str) -> None:
+        stops = [entry for entry in self._stops.get(symbol, []) if self._is_live(entry)]
+        targets = [
+            entry for entry in self._targets.get(symbol, []) if self._is_live(entry)
+        ]
+        heapq.heapify(stops)
+        heapq.heapify(targets)
+        self._stops[symbol] = stops
+        self._targets[symbol] = targets
+        self._entries[symbol] = len(stops) + len(targets)
+
+    def _top(self, heap: list[_Entry], symbol: str) -> _Entry | None:
+        """Returns the top entry of a heap, dropping the removed entries above it."""
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+            self._entries[symbol] -= 1
+        return heap[0] if heap else None
+
+    def bounds(self, symbol: str) -> tuple[float, float]:
+        """
+        Returns the highest stop and the lowest target of a symbol, which the next trigger
+        has to reach. Without stops or targets, they are -inf and inf.
+        """
+        stop = self._top(self._stops.get(symbol, []), symbol)
+        target = self._top(self._targets.get(symbol, []), symbol)
+        return (
+            -math.inf if stop is None else -stop[0],
+            math.inf if target is None else target[0],
+        )
+
+    def triggered(
+        self, symbol: str, high: float, low: float
+    ) -> list[tuple[str, OrderType]]:
+        """
+        Removes and returns the positions whose levels the price range of a bar reached.
+
+        When a bar reaches both levels of a position, the order within the bar is unknown
+        and the stop loss is assumed to have triggered first.
+
+        Args:
+        - symbol: str, the symbol of the bar.
+        - high: float, the highest price of the bar.
+        - low: float, the lowest price of the bar.
+
+        Returns:
+        - The (position id, OrderType.STOP_LOSS or OrderType.TAKE_PROFIT) of the triggered positions,
+          stops first, each in the order the price reaches them.
+        """
+        triggered = []
+        stops = self._stops.get(symbol, [])
+        while (stop := self._top(stops, symbol)) is not None and -stop[0] >= low:
+            heapq.heappop(stops)
+            self._entries[symbol] -= 1
+            self._live[symbol] -= 1
+            del self._symbols[stop[2]]
+            triggered.append((stop[2], OrderType.STOP_LOSS))
+
+        targets = self._targets.get(symbol, [])
+        while (target := self._top(targets, symbol)) is not None and target[0] <= high:
+            heapq.heappop(targets)
+            self._entries[symbol] -= 1
+            self._live[symbol] -= 1
+            del self._symbols[target[2]]
+            triggered.append((target[2], OrderType.TAKE_PROFIT))
+        return triggered
@@ -1,10 +1,15 @@
 from decimal import Decimal
 from uuid import UUID
 
+import numpy
 from enums import OrderSide, OrderType, TimeInForce
 from pydantic import BaseModel, Field
 
 
+class OrderRejectedError(ValueError):
+    """Raised by an exchange that rejects an order: nothing of it was executed."""
+
+
 class Signal(BaseModel):
     name: str
     reason: str
@@ -15,6 +20,86 @@ class Signal(BaseModel):
     take_profit_price: Decimal | None = None
 
 
+class BatchSignals(BaseModel):
+    """
+    Per-bar signals of a strategy for a whole klines DataFrame.
+
+    The arrays are aligned with the rows of the DataFrame. `action` holds 1 for a buy,
+    -1 for a sell and 0 for no signal. Prices are raw floats, `stop_price` and
+    `take_profit_price` use NaN where the signal has none.
+    """
+
+    name: str
+    buy_reason: str
+    sell_reason: str
+    action: numpy.ndarray
+    price: numpy.ndarray
+    stop_price: numpy.ndarray | None = None
+    take_profit_price: numpy.ndarray | None = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def slice(self, start: int, end: int) -> "BatchSignals":
+        """
+        Returns the signals of the rows [start, end), e.g. for a window of the backtest.
+
+        Args:
+            start (int): The position of the first row.
+            end (int): The position after the last row.
+
+        Returns:
+            BatchSignals: The signals of the window, without copying the arrays.
+        """
+        return self.copy(
+            update={
+                "action": self.action[start:end],
+                "price": self.price[start:end],
+                "stop_price": None
+                if self.stop_price is None
+                else self.stop_price[start:end],
+                "take_profit_price": None
+                if self.take_profit_price is None
+                else self.take_profit_price[start:end],
+            }
+        )
+
+    def signal_at(self, index: int, symbol: str) -> Signal | None:
+        """
+        Builds the Signal for a single bar.
+
+        Args:
+            index (int): The position of the bar in the DataFrame.
+            symbol (str): The symbol of the signal.
+
+        Returns:
+            Signal | None: A Signal object if the bar has an action, otherwise None.
+        """
+        action = self.action[index]
+        if action == 0:
+            return None
+
+        stop_price = None
+        if self.stop_price is not None and not numpy.isnan(self.stop_price[index]):
+            stop_price = round(Decimal(self.stop_price[index]), 2)
+
+        take_profit_price = None
+        if self.take_profit_price is not None and not numpy.isnan(
+            self.take_profit_price[index]
+        ):
+            take_profit_price = round(Decimal(self.take_profit_price[index]), 2)
+
+        return Signal(
+            name=self.name,
+            reason=self.buy_reason if action > 0 else self.sell_reason,
+            action=OrderSide.BUY if action > 0 else OrderSide.SELL,
+            symbol=symbol,
+            price=round(Decimal(self.price[index]), 2),
+            stop_price=stop_price,
+            take_profit_price=take_profit_price,
+        )
+
+
 class CreateOrderSchema(BaseModel):
     client_order_id: str | None = Field(..., example="my_order_id_1")
     symbol: str = Field(..., example="BTCUSDT")
@@ -41,3 +126,7 @@ class OrderSchema(BaseModel):
     time_in_force: TimeInForce = Field(..., example="GTC")
     price: Decimal | None = Field(..., example=Decimal("400.12"))
     stop_price: Decimal | None = Field(..., example=Decimal("400.12"))
+    # The fees paid in the quote asset, when the exchange reports them.
+    commission: Decimal = Field(default=Decimal("0.0"), example=Decimal("0.4"))
+    # The quote amount of the fills, without the fees, when the exchange reports it.
+    quote_qty: Decimal | None = Field(default=None, example=Decimal("400.12"))
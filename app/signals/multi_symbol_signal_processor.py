@@ -0,0 +1,170 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from time import monotonic, sleep
+
+import numpy
+from config.config import MainConfig
+from position_manager.position_manager import PositionManager
+from schemas import BatchSignals, Signal
+from signals.signal_processor import SignalProcessor
+from utils.utils import interval_to_seconds
+
+
+class MultiSymbolSignalProcessor:
+    def __init__(
+        self,
+        config: MainConfig,
+        processors: list[SignalProcessor],
+        position_manager: PositionManager,
+        max_workers: int | None = None,
+    ) -> None:
+        """
+        Constructor for the MultiSymbolSignalProcessor class.
+
+        Runs one SignalProcessor per symbol. Market data is fetched and strategies are evaluated
+        concurrently per symbol, while the signals are handled one by one, in symbol order,
+        by a single PositionManager shared by all symbols.
+
+        Args:
+            config (MainConfig): An instance of MainConfig class.
+            processors (list[SignalProcessor]): One SignalProcessor per symbol, sharing the position manager.
+            position_manager (PositionManager): The PositionManager shared by all processors.
+            max_workers (int | None): The number of symbols processed concurrently. Defaults to one per symbol.
+        """
+        self.config = config
+        self.processors = processors
+        self.position_manager = position_manager
+        self.max_workers = max_workers or max(1, len(processors))
+
+    def _evaluate(self, processor: SignalProcessor) -> list[Signal]:
+        """
+        Fetches the new klines of a single symbol and generates its signals.
+
+        Args:
+            processor (SignalProcessor): The processor of the symbol.
+
+        Returns:
+            list[Signal]: A list of Signal objects.
+        """
+        processor.df = processor._refresh_df()
+        return processor.signal_engine.generate_signals(processor.df)
+
+    def _prepare_backtest(
+        self, processor: SignalProcessor
+    ) -> list[BatchSignals] | None:
+        """
+        Fetches the klines of a single symbol and generates its per-bar signals when supported.
+
+        Args:
+            processor (SignalProcessor): The processor of the symbol.
+
+        Returns:
+            list[BatchSignals] | None: The per-bar signals, or None if the strategies don't support batch analysis.
+        """
+        processor.df = processor._get_df()
+        return processor.signal_engine.generate_batch_signals(processor.df)
+
+    def _run_backtest(self, executor: ThreadPoolExecutor) -> None:
+        """
+        Backtest mode:
+            The klines of all symbols are merged on open_time, so the shared position manager
+            sees the signals in the same order as it would have live. Before the signals of a bar,
+            the stop losses and take profits reached by the earlier bars of every symbol are triggered.
+        """
+        all_batch_signals = list(executor.map(self._prepare_backtest, self.processors))
+
+        open_times, symbol_indexes, bar_indexes = [], [], []
+        for symbol_index, (processor, batch_signals) in enumerate(
+            zip(self.processors, all_batch_signals)
+        ):
+            if batch_signals:
+                bars = processor._active_bars(batch_signals)
+            else:
+                bars = numpy.arange(1, len(processor.df))
+
+            open_times.append(processor.df["open_time"].to_numpy()[bars])
+            symbol_indexes.append(numpy.full(len(bars), symbol_index))
+            bar_indexes.append(bars)
+
+        open_time = numpy.concatenate(open_times)
+        symbol_index = numpy.concatenate(symbol_indexes)
+        bar_index = numpy.concatenate(bar_indexes)
+
+        all_open_times = [
+            processor.df["open_time"].to_numpy() for processor in self.processors
+        ]
+        for event in numpy.lexsort((symbol_index, open_time)):
+            for other, other_open_times in zip(self.processors, all_open_times):
+                end = int(numpy.searchsorted(other_open_times, open_time[event]))
+                other._feed_exchange(end)
+                other._check_triggers(end)
+
+            processor = self.processors[symbol_index[event]]
+            batch_signals = all_batch_signals[symbol_index[event]]
+            index = int(bar_index[event])
+            processor._feed_exchange(index + 1)
+            processor._check_triggers(index + 1)
+
+            if batch_signals:
+                signals = processor._batch_signals_at(batch_signals, index)
+            else:
+                signals = processor.signal_engine.generate_signals(
+                    processor.df.iloc[: index + 1]
+                )
+            processor._handle_signals(signals)
+
+        for processor in self.processors:
+            processor._feed_exchange(len(processor.df))
+            processor._check_triggers(len(processor.df))
+        for processor in self.processors:
+            processor._print_backtest_stats()
+
+    def _run_standard(self, executor: ThreadPoolExecutor) -> None:
+        """
+        Standard mode:
+            Every cycle, all symbols are fetched and evaluated concurrently, then their signals are handled.
+        """
+        interval = self.config.polling_interval_weight * interval_to_seconds(
+            self.config.market_data_config.interval
+        )
+
+        while True:
+            started_at = monotonic()
+
+            for processor, signals in zip(
+                self.processors, executor.map(self._evaluate, self.processors)
+            ):
+                processor._check_live_triggers(processor.df, closed=False)
+                processor._handle_signals(signals)
+                processor._print_stats(processor.df)
+
+            sleep(max(0.0, interval - (monotonic() - started_at)))
+
+    def run(self) -> None:
+        """
+        Runs the MultiSymbolSignalProcessor in either backtest or standard mode.
+        """
+
+        for processor in self.processors:
+            processor.signal_engine.initialize_strategies()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            if self.config.backtest:
+                self._run_backtest(executor)
+                return
+
+            self._run_standard(executor)
+
+    def print_stats(self) -> None:
+        """
+        Prints the statistics of the shared position manager, valued at the last close of each symbol.
+        """
+        close_prices = {
+            processor.config.symbol: Decimal(processor.df["close"].iloc[-1])
+            for processor in self.processors
+            if not processor.df.empty
+        }
+        self.position_manager.print_stats(
+            close_price=next(iter(close_prices.values()), Decimal("0")),
+            close_prices=close_prices,
+        )
@@ -1,7 +1,23 @@
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from time import perf_counter_ns
+
 import pandas
 from config.config import MainConfig
-from interfaces import StrategyProtocol
-from schemas import Signal
+from enums import EventLevel
+from events.event_sinks import ConsoleEventSink
+from indicators.registry import IndicatorRegistry
+from interfaces import EventSinkProtocol, StrategyProtocol
+from metrics.latency_recorder import LatencyRecorder
+from schemas import BatchSignals, Signal
+
+
+def _analyze(
+    strategy: StrategyProtocol, df: pandas.DataFrame
+) -> tuple[Signal | None, int]:
+    """Runs a strategy on a worker, returning its signal and how long it took, in nanoseconds."""
+    started_at = perf_counter_ns()
+    return strategy.analyze(df), perf_counter_ns() - started_at
 
 
 class SignalEngine:
@@ -9,22 +25,65 @@ class SignalEngine:
         self,
         config: MainConfig,
         strategies: list[StrategyProtocol],
+        latency_recorder: LatencyRecorder | None = None,
+        executor: Executor | None = None,
+        strategy_timeout: float | None = None,
+        event_sink: EventSinkProtocol | None = None,
+        indicators: IndicatorRegistry | None = None,
     ) -> None:
         """
         Constructor for the SignalEngine class.
 
+        With an executor, the strategies of a cycle are analyzed concurrently on it, so a cycle takes
+        about as long as its slowest strategy. The signals keep the order of the strategies. Every
+        strategy must return within its deadline, `strategy_timeout` seconds after the start of the
+        cycle, or its own `timeout` attribute. A late result is dropped and reported, and the strategy
+        is skipped by the next cycles until it returns, so it never runs twice at once.
+
+        The strategies share the DataFrame and must not modify it. On a process pool, the strategy
+        and the DataFrame are sent to a worker on every call, so only strategies that keep no state
+        between calls can run there. On a thread pool with a deadline, the strategies are handed a
+        copy of the DataFrame: a late strategy keeps running after the cycle, while the DataFrame of
+        a live signal processor is a view of its ring buffer, overwritten by the next klines.
+
+        Strategies with a `bind_indicators` method get their indicators from the indicator registry,
+        so strategies that use the same indicator on the same klines compute it once.
+
         Args:
             config (MainConfig): An instance of MainConfig class.
             strategies (list[StrategyProtocol]): A list of StrategyProtocol objects.
+            latency_recorder (LatencyRecorder | None): Records the latency of the strategies. Defaults to disabled.
+            executor (Executor | None): The thread or process pool that analyzes the strategies.
+                Defaults to analyzing them one after another, on the calling thread.
+            strategy_timeout (float | None): The seconds a strategy may take, with an executor. Defaults to no deadline.
+            event_sink (EventSinkProtocol | None): Where late strategies are reported. Defaults to the console.
+            indicators (IndicatorRegistry | None): The registry the strategies share their indicators through.
+                Defaults to a registry of this engine.
         """
         self.config = config
         self.strategies = strategies
+        self.latency = latency_recorder or LatencyRecorder(enabled=False)
+        self.executor = executor
+        self.strategy_timeout = strategy_timeout
+        self.events = event_sink or ConsoleEventSink()
+        self.indicators = indicators if indicators is not None else IndicatorRegistry()
+
+        self.late_results: dict[
+            str, int
+        ] = {}  # the number of dropped results per strategy
+        self._running: dict[int, Future] = {}  # the last call per strategy index
+
+    @staticmethod
+    def _strategy_name(strategy: StrategyProtocol) -> str:
+        return getattr(strategy, "name", None) or type(strategy).__name__
 
     def initialize_strategies(self) -> None:
-        """Initializes the strategies."""
+        """Initializes the strategies, and binds them to the indicator registry."""
 
         for strategy in self.strategies:
             strategy.initialize(self.config)
+            if bind_indicators := getattr(strategy, "bind_indicators", None):
+                bind_indicators(self.indicators)
 
     def generate_signals(self, df: pandas.DataFrame) -> list[Signal]:
         """
@@ -37,8 +96,143 @@ class SignalEngine:
             list[Signal]: A list of Signal objects.
         """
 
+        if self.executor is not None:
+            return self._generate_concurrent_signals(df, self.executor)
+        if self.latency.enabled:
+            return self._generate_timed_signals(df)
+
         signals = []
         for strategy in self.strategies:
             if trade_signal := strategy.analyze(df):
                 signals.append(trade_signal)
         return signals
+
+    def _generate_timed_signals(self, df: pandas.DataFrame) -> list[Signal]:
+        """
+        Generates signals from the strategies, recording the latency of every strategy
+        and of the whole generation.
+
+        Args:
+            df (pandas.DataFrame): A DataFrame containing klines data.
+
+        Returns:
+            list[Signal]: A list of Signal objects.
+        """
+        signals = []
+        started_at = perf_counter_ns()
+        for strategy in self.strategies:
+            analyzed_at = perf_counter_ns()
+            trade_signal = strategy.analyze(df)
+            self.latency.record(
+                "analyze",
+                perf_counter_ns() - analyzed_at,
+                self._strategy_name(strategy),
+            )
+            if trade_signal:
+                signals.append(trade_signal)
+        self.latency.record("generate_signals", perf_counter_ns() - started_at)
+        return signals
+
+    def _strategy_timeout(self, strategy: StrategyProtocol) -> float | None:
+        return getattr(strategy, "timeout", None) or self.strategy_timeout
+
+    def _report_late(self, strategy: StrategyProtocol, reason: str) -> None:
+        name = self._strategy_name(strategy)
+        self.late_results[name] = self.late_results.get(name, 0) + 1
+        if self.events.enabled(EventLevel.WARNING):
+            self.events.emit(
+                EventLevel.WARNING,
+                "late_strategy",
+                {
+                    "Strategy": name,
+                    "Symbol": self.config.symbol,
+                    "Reason": reason,
+                    "Timeout": self._strategy_timeout(strategy),
+                },
+            )
+
+    def _generate_concurrent_signals(
+        self, df: pandas.DataFrame, executor: Executor
+    ) -> list[Signal]:
+        """
+        Generates signals from the strategies analyzed concurrently on the executor,
+        dropping the results that miss their deadline.
+
+        Args:
+            df (pandas.DataFrame): A DataFrame containing klines data.
+            executor (Executor): The pool that analyzes the strategies.
+
+        Returns:
+            list[Signal]: A list of Signal objects, in strategy order.
+        """
+        started_at = perf_counter_ns()
+        cycle_started_at = time.monotonic()
+
+        if not isinstance(executor, ProcessPoolExecutor) and any(
+            self._strategy_timeout(strategy) is not None for strategy in self.strategies
+        ):
+            # Late strategies may read the DataFrame after the caller wrote to its buffer.
+            df = df.copy()
+
+        futures: list[Future | None] = []
+        for index, strategy in enumerate(self.strategies):
+            running = self._running.get(index)
+            if running is not None and not running.done():
+                self._report_late(strategy, "still running")
+                futures.append(None)
+                continue
+            future = executor.submit(_analyze, strategy, df)
+            self._running[index] = future
+            futures.append(future)
+
+        signals = []
+        for strategy, future in zip(self.strategies, futures):
+            if future is None:
+                continue
+
+            timeout = self._strategy_timeout(strategy)
+            try:
+                trade_signal, analyze_ns = future.result(
+                    timeout=None
+                    if timeout is None
+                    else max(0.0, cycle_started_at + timeout - time.monotonic())
+                )
+            except TimeoutError:
+                self._report_late(strategy, "deadline missed")
+                continue
+
+            if self.latency.enabled:
+                self.latency.record(
+                    "analyze", analyze_ns, self._strategy_name(strategy)
+                )
+            if trade_signal:
+                signals.append(trade_signal)
+
+        if self.latency.enabled:
+            self.latency.record("generate_signals", perf_counter_ns() - started_at)
+        return signals
+
+    def generate_batch_signals(self, df: pandas.DataFrame) -> list[BatchSignals] | None:
+        """
+        Generates per-bar signals for the whole DataFrame at once.
+
+        Args:
+            df (pandas.DataFrame): A DataFrame containing klines data.
+
+        Returns:
+            list[BatchSignals] | None: One BatchSignals object per strategy, in strategy order,
+                or None if any strategy does not support batch analysis.
+        """
+
+        batch_signals = []
+        for strategy in self.strategies:
+            analyze_batch = getattr(strategy, "analyze_batch", None)
+            if analyze_batch is None:
+                return None
+
+            with self.latency.measure("analyze_batch", self._strategy_name(strategy)):
+                strategy_signals = analyze_batch(df)
+            if strategy_signals is None:
+                return None
+            batch_signals.append(strategy_signals)
+        return batch_signals
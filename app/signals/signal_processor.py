@@ -1,13 +1,26 @@
+from datetime import datetime, timezone
 from decimal import Decimal
-from time import sleep
+from time import perf_counter_ns, sleep
 
+import numpy
 import pandas
 from config.config import MainConfig
-from interfaces import MarketDataProtocol
+from enums import EventLevel
+from events.event_sinks import ConsoleEventSink
+from interfaces import EventSinkProtocol, MarketDataProtocol, SimulatedExchangeProtocol
+from market_data.kline_ring_buffer import KlineRingBuffer
+from metrics.latency_recorder import LatencyRecorder
 from position_manager.position_manager import PositionManager
-from schemas import Signal
+from schemas import BatchSignals, Signal
 from signals.signal_engine import SignalEngine
-from utils.utils import interval_to_seconds, timestamp_to_datetime
+from utils.utils import (
+    datetime_to_timestamp,
+    interval_to_seconds,
+    timestamp_to_datetime,
+    timestamp_to_utc_datetime,
+)
+
+STREAM_RECONNECT_DELAY = 1  # seconds to wait before reopening a lost kline stream
 
 
 class SignalProcessor:
@@ -17,6 +30,8 @@ class SignalProcessor:
         signal_engine: SignalEngine,
         market_data: MarketDataProtocol,
         position_manager: PositionManager,
+        event_sink: EventSinkProtocol | None = None,
+        latency_recorder: LatencyRecorder | None = None,
     ) -> None:
         """
         Constructor for the SignalProcessor class.
@@ -26,49 +41,180 @@ class SignalProcessor:
             signal_engine (SignalEngine): An instance of SignalEngine class.
             market_data (MarketDataProtocol): An object implementing the MarketDataProtocol interface.
             position_manager (PositionManager): An object implementing the PositionManager
+            event_sink (EventSinkProtocol | None): Where the events are reported. Defaults to the console.
+            latency_recorder (LatencyRecorder | None): Records the latency of the kline fetches. Defaults to disabled.
         """
         self.config = config
         self.signal_engine = signal_engine
         self.market_data = market_data
         self.position_manager = position_manager
+        self.events = event_sink or ConsoleEventSink()
+        self.latency = latency_recorder or LatencyRecorder(enabled=False)
         self.df: pandas.DataFrame = pandas.DataFrame()
 
+        # the live klines window, see _refresh_df
+        self.klines: KlineRingBuffer | None = None
+
+        # (bar index, balance, quantity held) after every backtest bar that had signals or triggers
+        self.balance_history: list[tuple[int, Decimal, Decimal]] = []
+
+        # the first backtest bar that was not checked for stop loss and take profit triggers yet
+        self._next_trigger_bar = 0
+
+        # the simulated exchange the orders go to, if any, and the first backtest bar not fed to it yet
+        exchange = position_manager.trade_executor.crypto_exchange
+        self.exchange: SimulatedExchangeProtocol | None = None
+        if getattr(exchange, "simulated", False) and hasattr(exchange, "on_bars"):
+            self.exchange = exchange
+        self._next_exchange_bar = 0
+
     def _print_backtest_stats(self) -> None:
-        print("BACKTESTING RESULTS:")
-        print("Asset: ", self.config.symbol)
-        print("Length of the dataframe: ", len(self.df))
-        print("Timeframe: ", self.config.market_data_config.interval)
-        print("Last close price: ", round(Decimal(str(self.df["close"].iloc[-1])), 2))
-        print(
-            "Last close date: ", timestamp_to_datetime(self.df["close_time"].iloc[-1])
+        self.events.emit(
+            EventLevel.SUMMARY,
+            "backtest_results",
+            {
+                "Asset": self.config.symbol,
+                "Length of the dataframe": len(self.df),
+                "Timeframe": self.config.market_data_config.interval,
+                "Last close price": round(Decimal(str(self.df["close"].iloc[-1])), 2),
+                "Last close date": timestamp_to_datetime(
+                    self.df["close_time"].iloc[-1]
+                ),
+            },
         )
 
     def _print_stats(self, df: pandas.DataFrame) -> None:
         """
-        Prints the statistics of the last kline in the given DataFrame.
+        Reports the statistics of the last kline in the given DataFrame.
+        Nothing is built when the event sink drops debug events, since this runs for every kline.
 
         Args:
             df (pandas.DataFrame): A DataFrame containing klines data.
         """
-        print("-" * 50)
-        print("Open Time: ", timestamp_to_datetime(df["open_time"].iloc[-1]))
-        print("Open: ", df["open"].iloc[-1])
-        print("Close: ", df["close"].iloc[-1])
-        print("High: ", df["high"].iloc[-1])
-        print("Low: ", df["low"].iloc[-1])
-        print("Volume: ", df["volume"].iloc[-1])
-        print("-" * 50)
+        if not self.events.enabled(EventLevel.DEBUG):
+            return
 
-    def _handle_signals(self, signals: list[Signal]) -> None:
+        self.events.emit(
+            EventLevel.DEBUG,
+            "kline",
+            {
+                "Open Time": timestamp_to_datetime(df["open_time"].iloc[-1]),
+                "Open": df["open"].iloc[-1],
+                "Close": df["close"].iloc[-1],
+                "High": df["high"].iloc[-1],
+                "Low": df["low"].iloc[-1],
+                "Volume": df["volume"].iloc[-1],
+            },
+        )
+
+    def _handle_signals(self, signals: list[Signal], index: int | None = None) -> None:
         """
         Handles the signals.
 
         Args:
             signals (list[Signal]): A list of Signal objects.
+            index (int | None): The position of the bar in the backtest, to record the balance history.
         """
         for signal in signals:
             self.position_manager.handle_signal(signal)
 
+        if signals and index is not None:
+            self._record_balance(index)
+
+    def _record_balance(self, index: int) -> None:
+        self.balance_history.append(
+            (
+                index,
+                self.position_manager.balance,
+                self.position_manager.portfolio.get(self.config.symbol, Decimal(0)),
+            )
+        )
+
+    def _feed_exchange(self, end: int) -> None:
+        """
+        Feeds the backtest bars from the first bar that was not fed yet up to `end` to the simulated
+        exchange, if the orders go to one. Its resting orders are matched against the bars, and the
+        orders placed next take the liquidity of the last bar, at its close.
+
+        Args:
+            end (int): The position after the last bar to feed.
+        """
+        start, self._next_exchange_bar = self._next_exchange_bar, max(
+            self._next_exchange_bar, end
+        )
+        if self.exchange is None or start >= end:
+            return
+
+        self.exchange.on_bars(
+            self.config.symbol,
+            *(
+                self.df[column].to_numpy(dtype=float)[start:end]
+                for column in ("open", "high", "low", "close")
+            ),
+            self.df["volume"].to_numpy(dtype=float)[start:end]
+            if "volume" in self.df
+            else None,
+        )
+
+    def _check_triggers(self, end: int) -> None:
+        """
+        Closes the positions whose stop loss or take profit was reached by the backtest bars
+        from the first unchecked bar up to `end`.
+
+        Only the bars that reach the highest stop or the lowest take profit can trigger anything,
+        so the next one is searched with NumPy, and the bars in between are skipped.
+
+        Args:
+            end (int): The position after the last bar to check.
+        """
+        start, self._next_trigger_bar = self._next_trigger_bar, max(
+            self._next_trigger_bar, end
+        )
+        while start < end:
+            stop, target = self.position_manager.trigger_bounds(self.config.symbol)
+            if stop == -numpy.inf and target == numpy.inf:
+                return
+
+            high = self.df["high"].to_numpy(dtype=float)
+            low = self.df["low"].to_numpy(dtype=float)
+            reached = (low[start:end] <= stop) | (high[start:end] >= target)
+            if not (hits := numpy.flatnonzero(reached)).size:
+                return
+
+            index = start + int(hits[0])
+            self.position_manager.check_triggers(
+                self.config.symbol, high[index], low[index]
+            )
+            self._record_balance(index)
+            start = index + 1
+
+    def equity_curve(self) -> pandas.Series:
+        """
+        Computes the backtest equity per bar: the balance plus the value of the quantity held at the close.
+
+        Returns:
+            pandas.Series: The equity per bar, aligned with the klines DataFrame.
+        """
+        close = self.df["close"].to_numpy(dtype=float)
+        balance = numpy.full(
+            len(close), float(self.config.trading_config.starting_balance)
+        )
+        quantity = numpy.zeros(len(close))
+
+        if self.balance_history:
+            indexes, balances, quantities = zip(*self.balance_history)
+            # Each bar takes the balance recorded at or before it.
+            record = numpy.searchsorted(indexes, numpy.arange(len(close)), side="right")
+            has_record = record > 0
+            balance[has_record] = numpy.array(balances, dtype=float)[
+                record[has_record] - 1
+            ]
+            quantity[has_record] = numpy.array(quantities, dtype=float)[
+                record[has_record] - 1
+            ]
+
+        return pandas.Series(balance + quantity * close, index=self.df.index)
+
     def _get_df(self) -> pandas.DataFrame:
         """
         Gets the klines from the market data.
@@ -76,26 +222,145 @@ class SignalProcessor:
         Returns:
             pandas.DataFrame: A DataFrame containing klines data.
         """
-        return self.market_data.get_klines(
+        started_at = perf_counter_ns() if self.latency.enabled else 0
+        df = self.market_data.get_klines(
             symbol=self.config.symbol,
             interval=self.config.market_data_config.interval,
             limit=self.config.market_data_config.limit,
             start_time=self.config.market_data_config.start_time,
             end_time=self.config.market_data_config.end_time,
         )
+        if self.latency.enabled:
+            self.latency.record("get_df", perf_counter_ns() - started_at)
+        return df
+
+    def _refresh_df(self) -> pandas.DataFrame:
+        """
+        Updates the klines in memory with the klines that opened since the last one.
+
+        Only the last kline, which may still have been forming, and the klines after it are
+        fetched. They are written to a ring buffer holding the configured limit of klines, which
+        replaces the last kline and drops the oldest ones without building a new DataFrame.
+        Without klines in memory, when more klines opened since the last one than the limit, or when
+        the new klines don't connect to them, all klines are fetched again.
+
+        Returns:
+            pandas.DataFrame: A DataFrame backed by the ring buffer, valid until the next refresh.
+        """
+        limit = self.config.market_data_config.limit
+        if self.klines is None or not len(self.klines):
+            self.klines = KlineRingBuffer.from_frame(self._get_df(), limit)
+            return self.klines.to_frame()
+
+        interval_ms = (
+            interval_to_seconds(self.config.market_data_config.interval) * 1000
+        )
+        last_open_time = int(self.klines.view("open_time")[-1])
+        now = datetime_to_timestamp(datetime.now(tz=timezone.utc))
+        missed = max(0, now - last_open_time) // interval_ms + 2
+        if missed > limit:
+            # Fetching from the last kline would stop short of the current one, leaving a gap.
+            self.klines = KlineRingBuffer.from_frame(self._get_df(), limit)
+            return self.klines.to_frame()
+
+        started_at = perf_counter_ns() if self.latency.enabled else 0
+        new_klines = self.market_data.get_klines(
+            symbol=self.config.symbol,
+            interval=self.config.market_data_config.interval,
+            limit=missed,
+            start_time=timestamp_to_utc_datetime(last_open_time),
+        )
+        if self.latency.enabled:
+            self.latency.record("refresh_df", perf_counter_ns() - started_at)
+        if not new_klines.empty and new_klines["open_time"].iloc[0] > last_open_time:
+            self.klines = KlineRingBuffer.from_frame(self._get_df(), limit)
+        else:
+            self.klines.extend(new_klines)
+        return self.klines.to_frame()
+
+    def _batch_signals_at(
+        self, batch_signals: list[BatchSignals], index: int
+    ) -> list[Signal]:
+        """
+        Builds the signals of a single bar from precomputed per-bar signals.
+
+        Args:
+            batch_signals (list[BatchSignals]): One BatchSignals object per strategy.
+            index (int): The position of the bar in the DataFrame.
+
+        Returns:
+            list[Signal]: The signals of the bar, in strategy order.
+        """
+        signals = []
+        for batch in batch_signals:
+            if signal := batch.signal_at(index, self.config.symbol):
+                signals.append(signal)
+        return signals
+
+    def _active_bars(
+        self, batch_signals: list[BatchSignals], start_index: int = 1
+    ) -> numpy.ndarray:
+        """
+        Returns the positions of the bars that have at least one signal.
+        The bar by bar loop starts at the second kline, so do we by default.
+
+        Args:
+            batch_signals (list[BatchSignals]): One BatchSignals object per strategy.
+            start_index (int): The position of the first bar that may trade.
+        """
+        actions = numpy.vstack([batch.action for batch in batch_signals])
+        return numpy.flatnonzero(actions[:, start_index:].any(axis=0)) + start_index
+
+    def _run_vectorized_backtest(
+        self, batch_signals: list[BatchSignals], start_index: int = 1
+    ) -> None:
+        """
+        Runs the backtest from precomputed per-bar signals.
+        Only the bars that have a signal are visited, in the same order as the bar by bar loop.
+        The bars in between are fed to the simulated exchange at once, see _feed_exchange.
+
+        Args:
+            batch_signals (list[BatchSignals]): One BatchSignals object per strategy.
+            start_index (int): The position of the first bar that may trade.
+        """
+        self._next_trigger_bar = self._next_exchange_bar = start_index
+        for index in self._active_bars(batch_signals, start_index):
+            self._feed_exchange(index + 1)
+            self._check_triggers(index + 1)
+            self._handle_signals(self._batch_signals_at(batch_signals, index), index)
+        self._feed_exchange(len(self.df))
+        self._check_triggers(len(self.df))
+
+    def _run_bar_by_bar_backtest(self, start_index: int = 1) -> None:
+        """
+        Runs the backtest by handing every growing slice of the klines to the strategies.
+        The bars before `start_index` are only used as history, no strategy is evaluated on them.
+        Every bar is fed to the simulated exchange before its signals are handled, see _feed_exchange.
+
+        Args:
+            start_index (int): The position of the first bar that may trade.
+        """
+        self._next_trigger_bar = self._next_exchange_bar = start_index
+        for index in range(max(1, start_index), len(self.df)):
+            self._feed_exchange(index + 1)
+            self._check_triggers(index + 1)
+            df_slice = self.df.iloc[: index + 1]
+            self._handle_signals(self.signal_engine.generate_signals(df_slice), index)
+            self._print_stats(df_slice)
 
     def _run_backtest(self) -> None:
         """
         Backtest mode:
             With backtest mode enabled, the signal processor will loop through the klines returned by the market data.
             This way, we can test our strategies on historical data.
+            When every strategy supports batch analysis, the per-bar loop is replaced by a vectorized run.
         """
         self.df = self._get_df()
 
-        for index in range(1, len(self.df)):
-            df_slice = self.df.iloc[: index + 1]
-            self._handle_signals(self.signal_engine.generate_signals(df_slice))
-            self._print_stats(df_slice)
+        if batch_signals := self.signal_engine.generate_batch_signals(self.df):
+            self._run_vectorized_backtest(batch_signals)
+        else:
+            self._run_bar_by_bar_backtest()
 
         self._print_backtest_stats()
 
@@ -110,11 +375,97 @@ class SignalProcessor:
         )
 
         while True:
-            self.df = self._get_df()
+            self.df = self._refresh_df()
+            self._check_live_triggers(self.df, closed=False)
             self._handle_signals(self.signal_engine.generate_signals(self.df))
             self._print_stats(self.df)
             sleep(interval)
 
+    def _check_live_triggers(self, df: pandas.DataFrame, closed: bool) -> None:
+        """
+        Closes the positions whose stop loss or take profit was reached by the last kline.
+
+        The range of a kline that is still forming may include prices from before the last
+        positions were opened, so only its close, the current price, is checked.
+
+        Args:
+            df (pandas.DataFrame): A DataFrame containing klines data.
+            closed (bool): Whether the last kline is closed.
+        """
+        if df.empty:
+            return
+
+        if closed:
+            high, low = float(df["high"].iloc[-1]), float(df["low"].iloc[-1])
+        else:
+            high = low = float(df["close"].iloc[-1])
+        self.position_manager.check_triggers(self.config.symbol, high, low)
+
+    def _closed_klines(self, df: pandas.DataFrame, open_time: int) -> pandas.DataFrame:
+        """
+        Drops the klines after the closed kline, such as the one that opened since,
+        so the strategies are evaluated on the closed kline.
+        """
+        end = int(numpy.searchsorted(df["open_time"].to_numpy(), open_time, "right"))
+        return df.iloc[:end]
+
+    def _handle_closed_kline(self, kline: pandas.DataFrame) -> None:
+        """
+        Appends a closed kline to the klines and evaluates the strategies on it.
+        A closed kline with the open time of the last kline replaces it, since the klines
+        fetched at startup or after a gap end with the kline that was still forming.
+        Older klines are ignored. When klines were missed, for example while the stream
+        was reconnecting, the missed klines are fetched instead.
+
+        Args:
+            kline (pandas.DataFrame): A single-row DataFrame containing the closed kline.
+        """
+        interval_ms = (
+            interval_to_seconds(self.config.market_data_config.interval) * 1000
+        )
+        open_time = kline["open_time"].iloc[-1]
+
+        if self.klines is not None and len(self.klines):
+            last_open_time = self.klines.view("open_time")[-1]
+            if open_time < last_open_time:
+                return
+            if open_time - last_open_time <= interval_ms:
+                self.klines.extend(kline)
+                self.df = self.klines.to_frame()
+            else:
+                self.df = self._closed_klines(self._refresh_df(), open_time)
+        else:
+            self.df = self._closed_klines(self._refresh_df(), open_time)
+
+        self._check_live_triggers(self.df, closed=True)
+        self._handle_signals(self.signal_engine.generate_signals(self.df))
+        self._print_stats(self.df)
+
+    def _run_streaming(self) -> None:
+        """
+        Streaming mode:
+            With backtest mode disabled and a market data that can stream klines, the signal processor
+            evaluates the strategies as soon as a kline closes, instead of polling the market data.
+            A lost stream is reopened, the klines missed in the meantime are fetched again.
+        """
+        self.df = self._refresh_df()
+
+        while True:
+            try:
+                for kline in self.market_data.stream_klines(
+                    symbol=self.config.symbol,
+                    interval=self.config.market_data_config.interval,
+                ):
+                    self._handle_closed_kline(kline)
+                return
+            except ConnectionError as error:
+                self.events.emit(
+                    EventLevel.WARNING,
+                    "kline_stream_lost",
+                    {"Error": error, "Reconnecting in": STREAM_RECONNECT_DELAY},
+                )
+                sleep(STREAM_RECONNECT_DELAY)
+
     def run(self) -> None:
         """
         Runs the SignalProcessor in either backtest or standard mode.
@@ -126,4 +477,8 @@ class SignalProcessor:
             self._run_backtest()
             return
 
+        if hasattr(self.market_data, "stream_klines"):
+            self._run_streaming()
+            return
+
         self._run_standard()
@@ -0,0 +1,574 @@
+import heapq
+import math
+from collections import deque
+from decimal import Decimal
+from itertools import count
+from typing import Any
+
+import numpy
+from enums import OrderSide, OrderType, TimeInForce
+from schemas import CreateOrderSchema, OrderRejectedError, OrderSchema
+
+DEFAULT_MAKER_FEE = Decimal("0.001")
+DEFAULT_TAKER_FEE = Decimal("0.001")
+OPEN_ORDER_STATUSES = frozenset({"NEW", "PARTIALLY_FILLED"})
+# The number of filled, cancelled, expired or rejected orders kept besides the open orders.
+ORDER_HISTORY_SIZE = 10_000
+
+# Orders that wait in the book until the price reaches their stop price.
+_STOP_ORDER_TYPES = frozenset(
+    {
+        OrderType.STOP_LOSS,
+        OrderType.STOP_LOSS_LIMIT,
+        OrderType.TAKE_PROFIT,
+        OrderType.TAKE_PROFIT_LIMIT,
+    }
+)
+# Orders with a limit price, once they are triggered for stop orders.
+_LIMIT_ORDER_TYPES = frozenset(
+    {OrderType.LIMIT, OrderType.STOP_LOSS_LIMIT, OrderType.TAKE_PROFIT_LIMIT}
+)
+
+
+class _Order:
+    __slots__ = (
+        "order_id",
+        "client_order_id",
+        "symbol",
+        "side",
+        "type",
+        "time_in_force",
+        "quantity",
+        "price",
+        "stop_price",
+        "executed_qty",
+        "quote_qty",
+        "commission",
+        "status",
+        "sequence",
+    )
+
+    def __init__(
+        self, order_id: str, sequence: int, payload: CreateOrderSchema
+    ) -> None:
+        self.order_id = order_id
+        self.client_order_id = payload.client_order_id
+        self.symbol = payload.symbol
+        self.side = payload.side
+        self.type = payload.type
+        self.time_in_force = payload.time_in_force
+        self.quantity = payload.quantity
+        self.price = payload.price
+        self.stop_price = payload.stop_price
+        self.executed_qty = Decimal(0)
+        self.quote_qty = Decimal(0)
+        self.commission = Decimal(0)
+        self.status = "NEW"
+        self.sequence = sequence
+
+    @property
+    def remaining(self) -> Decimal:
+        return self.quantity - self.executed_qty
+
+    @property
+    def average_price(self) -> Decimal | None:
+        if self.executed_qty:
+            return self.quote_qty / self.executed_qty
+        return self.price
+
+    def to_dict(self) -> dict[str, Any]:
+        """The order in the format of the order responses of Binance."""
+        return {
+            "symbol": self.symbol,
+            "orderId": self.order_id,
+            "clientOrderId": self.client_order_id,
+            "price": str(self.price or 0),
+            "origQty": str(self.quantity),
+            "executedQty": str(self.executed_qty),
+            "cummulativeQuoteQty": str(self.quote_qty),
+            "status": self.status,
+            "timeInForce": str(self.time_in_force),
+            "type": str(self.type),
+            "side": str(self.side),
+            "stopPrice": str(self.stop_price or 0),
+            "commission": str(self.commission),
+        }
+
+
+class _Book:
+    __slots__ = (
+        "bids",
+        "asks",
+        "rising_stops",
+        "falling_stops",
+        "market_orders",
+        "last_price",
+        "liquidity",
+        "bounds",
+    )
+
+    def __init__(self) -> None:
+        # Heaps of (key, sequence, order), so orders at the same price keep their arrival order.
+        self.bids: list[tuple[Decimal, int, _Order]] = []  # key: -price
+        self.asks: list[tuple[Decimal, int, _Order]] = []  # key: price
+        self.rising_stops: list[tuple[Decimal, int, _Order]] = []  # key: stop price
+        self.falling_stops: list[tuple[Decimal, int, _Order]] = []  # key: -stop price
+        # Market orders that were only partially filled, filled first on the next bars.
+        self.market_orders: deque[_Order] = deque()
+        self.last_price: float | None = None
+        # The quantity left to trade in the current bar, None when unlimited.
+        self.liquidity: Decimal | None = None
+        # The cached bounds, None when the book changed. Cancelled orders may leave them too wide,
+        # which only costs a match that fills nothing.
+        self.bounds: tuple[float, float] | None = None
+
+
+def _top(heap: list[tuple[Decimal, int, _Order]]) -> _Order | None:
+    """Returns the first open order of a heap, dropping the cancelled orders on the way."""
+    while heap:
+        order = heap[0][2]
+        if order.status in OPEN_ORDER_STATUSES:
+            return order
+        heapq.heappop(heap)
+    return None
+
+
+class SimulatedExchange:
+    simulated = True  # orders are filled in process, also when backtesting
+
+    def __init__(
+        self,
+        maker_fee: Decimal = DEFAULT_MAKER_FEE,
+        taker_fee: Decimal = DEFAULT_TAKER_FEE,
+        participation: float | None = None,
+        quote_asset: str = "USDT",
+        balances: dict[str, Decimal] | None = None,
+        order_history: int = ORDER_HISTORY_SIZE,
+    ) -> None:
+        """
+        In-process exchange with a matching engine, for backtests and as a stand-in of a live exchange in tests.
+
+        Every symbol has a book of resting orders: limit orders by price and arrival, and stop orders
+        by stop price. The books are matched against the bars or ticks fed with on_bar, on_tick or
+        on_bars. Within a bar, the resting orders that its range reaches are filled at their price,
+        or at the open when the bar gapped through it. Stop orders trigger when the range reaches
+        their stop price, and become market or limit orders.
+
+        Incoming orders take liquidity at the last price: market orders, and limit orders that cross
+        the last price. IOC orders cancel what could not be filled at once, FOK orders fill entirely
+        or not at all, GTC limit orders rest in the book for the remainder. Takers pay the taker fee
+        and resting orders the maker fee, in the quote asset.
+
+        With a participation rate, every bar only has that share of its volume to trade, so large
+        orders are filled partially, over several bars. Without one, the liquidity is unlimited.
+
+        Open orders are kept until they are done, but only the most recent orders that are done
+        (filled, cancelled, expired or rejected) are kept, so long backtests don't grow the orders.
+
+        Checking a bar that fills nothing costs a few comparisons with the best prices of the book,
+        and on_bars skips such bars with NumPy.
+
+        Args:
+            maker_fee (Decimal): The fee rate of fills of resting orders.
+            taker_fee (Decimal): The fee rate of fills of incoming orders.
+            participation (float | None): The share of the volume of a bar that can be traded. Defaults to unlimited.
+            quote_asset (str): The asset the symbols are quoted in, and the fees are paid in.
+            balances (dict[str, Decimal] | None): The starting balance per asset.
+            order_history (int): The number of orders that are done kept besides the open orders.
+        """
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.participation = participation
+        self.quote_asset = quote_asset
+        self.balances: dict[str, Decimal] = dict(balances or {})
+
+        self.order_history = order_history
+        self.orders: dict[str, _Order] = {}
+        # The number of orders at which the orders that are done are pruned, growing with the open orders.
+        self._prune_at = 2 * order_history
+        self._books: dict[str, _Book] = {}
+        self._order_ids = count(1)
+
+    def _book(self, symbol: str) -> _Book:
+        if (book := self._books.get(symbol)) is None:
+            book = self._books[symbol] = _Book()
+        return book
+
+    def _base_asset(self, symbol: str) -> str:
+        if symbol.endswith(self.quote_asset):
+            end = len(symbol) - len(self.quote_asset)
+            return symbol[:end]
+        return symbol
+
+    def _prune_orders(self) -> None:
+        """
+        Forgets the orders that are done, but the most recent order_history ones. The open orders are kept.
+        Pruning copies the orders, so it waits until order_history more orders were placed.
+        """
+        done = 0
+        kept = []
+        for order in reversed(self.orders.values()):
+            if order.status in OPEN_ORDER_STATUSES:
+                kept.append(order)
+            elif done < self.order_history:
+                kept.append(order)
+                done += 1
+        self.orders = {order.order_id: order for order in reversed(kept)}
+        self._prune_at = len(self.orders) + self.order_history
+
+    def _fill(
+        self,
+        book: _Book,
+        order: _Order,
+        price: Decimal,
+        quantity: Decimal,
+        fee: Decimal,
+    ) -> Decimal:
+        """
+        Fills (part of) an order, limited by the liquidity left in the bar.
+
+        Returns:
+            Decimal: The filled quantity.
+        """
+        if book.liquidity is not None:
+            quantity = min(quantity, book.liquidity)
+            book.liquidity -= quantity
+        if quantity <= 0:
+            return Decimal(0)
+
+        value = quantity * price
+        commission = value * fee
+        order.executed_qty += quantity
+        order.quote_qty += value
+        order.commission += commission
+        order.status = (
+            "FILLED" if order.executed_qty >= order.quantity else "PARTIALLY_FILLED"
+        )
+
+        base = self._base_asset(order.symbol)
+        quote = self.quote_asset
+        if order.side == OrderSide.BUY:
+            self.balances[base] = self.balances.get(base, Decimal(0)) + quantity
+            self.balances[quote] = (
+                self.balances.get(quote, Decimal(0)) - value - commission
+            )
+        else:
+            self.balances[base] = self.balances.get(base, Decimal(0)) - quantity
+            self.balances[quote] = (
+                self.balances.get(quote, Decimal(0)) + value - commission
+            )
+        return quantity
+
+    def _rest(self, book: _Book, order: _Order, limit: Decimal) -> None:
+        if order.side == OrderSide.BUY:
+            heapq.heappush(book.bids, (-limit, order.sequence, order))
+        else:
+            heapq.heappush(book.asks, (limit, order.sequence, order))
+        book.bounds = None
+
+    def _take(self, book: _Book, order: _Order, price: Decimal) -> None:
+        """
+        Fills an incoming or triggered order against the liquidity of the current bar, at a price.
+        What is not filled is cancelled (IOC, FOK), rests (GTC limit) or waits for the next bar (market).
+        """
+        limit = order.price if order.type in _LIMIT_ORDER_TYPES else None
+        crosses = (
+            limit is None
+            or (order.side == OrderSide.BUY and price <= limit)
+            or (order.side == OrderSide.SELL and price >= limit)
+        )
+
+        if order.time_in_force == TimeInForce.FOK and limit is not None:
+            if not crosses or (
+                book.liquidity is not None and book.liquidity < order.remaining
+            ):
+                order.status = "EXPIRED"
+                return
+
+        if crosses:
+            self._fill(book, order, price, order.remaining, self.taker_fee)
+        if order.status not in OPEN_ORDER_STATUSES:
+            return
+
+        if limit is not None and order.time_in_force != TimeInForce.GTC:
+            order.status = "EXPIRED"
+        elif limit is not None:
+            self._rest(book, order, limit)
+        else:
+            book.market_orders.append(order)
+            book.bounds = None
+
+    def _match_resting(
+        self, book: _Book, open_: Decimal, high: float, low: float
+    ) -> None:
+        """
+        Fills the market orders waiting from earlier bars, triggers the stop orders and fills
+        the limit orders that the range of a bar reaches.
+        """
+        while book.market_orders and book.liquidity != 0:
+            order = book.market_orders[0]
+            if order.status in OPEN_ORDER_STATUSES:
+                self._fill(book, order, open_, order.remaining, self.taker_fee)
+                if order.status in OPEN_ORDER_STATUSES:
+                    break
+            book.market_orders.popleft()
+
+        while _top(book.rising_stops) is not None and book.rising_stops[0][0] <= high:
+            stop_price, _, order = heapq.heappop(book.rising_stops)
+            self._take(book, order, max(stop_price, open_))
+        while _top(book.falling_stops) is not None and -book.falling_stops[0][0] >= low:
+            key, _, order = heapq.heappop(book.falling_stops)
+            self._take(book, order, min(-key, open_))
+
+        while book.liquidity != 0 and _top(book.bids) is not None:
+            key, _, order = book.bids[0]
+            if -key < low:
+                break
+            self._fill(book, order, min(-key, open_), order.remaining, self.maker_fee)
+            if order.status in OPEN_ORDER_STATUSES:
+                break
+            heapq.heappop(book.bids)
+        while book.liquidity != 0 and _top(book.asks) is not None:
+            price, _, order = book.asks[0]
+            if price > high:
+                break
+            self._fill(book, order, max(price, open_), order.remaining, self.maker_fee)
+            if order.status in OPEN_ORDER_STATUSES:
+                break
+            heapq.heappop(book.asks)
+
+    def bounds(self, symbol: str) -> tuple[float, float]:
+        """
+        Returns the prices a bar must reach, downwards and upwards, to fill or trigger a resting order.
+        A bar that stays strictly between them fills nothing, unless market orders are waiting.
+
+        Args:
+            symbol (str): The symbol.
+
+        Returns:
+            tuple[float, float]: The highest buy limit or falling stop, -inf when there are none,
+                and the lowest sell limit or rising stop, inf when there are none.
+        """
+        book = self._book(symbol)
+        if book.bounds is not None:
+            return book.bounds
+        if book.market_orders:
+            book.bounds = (math.inf, -math.inf)
+            return book.bounds
+
+        lower, upper = -math.inf, math.inf
+        if _top(book.bids) is not None:
+            lower = float(-book.bids[0][0])
+        if _top(book.falling_stops) is not None:
+            lower = max(lower, float(-book.falling_stops[0][0]))
+        if _top(book.asks) is not None:
+            upper = float(book.asks[0][0])
+        if _top(book.rising_stops) is not None:
+            upper = min(upper, float(book.rising_stops[0][0]))
+        book.bounds = (lower, upper)
+        return book.bounds
+
+    def _liquidity(self, volume: float | None) -> Decimal | None:
+        if self.participation is None or volume is None:
+            return None
+        return Decimal(str(volume * self.participation))
+
+    def on_bar(
+        self,
+        symbol: str,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float | None = None,
+    ) -> None:
+        """
+        Matches the resting orders of a symbol against a bar.
+
+        Args:
+            symbol (str): The symbol of the bar.
+            open_ (float): The open price.
+            high (float): The highest price.
+            low (float): The lowest price.
+            close (float): The close price, the last price for the orders placed until the next bar.
+            volume (float | None): The traded volume. Without one, or without a participation rate,
+                the liquidity is unlimited.
+        """
+        book = self._book(symbol)
+        book.liquidity = None if self.participation is None else self._liquidity(volume)
+        lower, upper = book.bounds or self.bounds(symbol)
+        if low <= lower or high >= upper:
+            self._match_resting(book, Decimal(str(open_)), high, low)
+            book.bounds = None
+        book.last_price = close
+
+    def on_tick(self, symbol: str, price: float, quantity: float | None = None) -> None:
+        """
+        Matches the resting orders of a symbol against a trade.
+
+        Args:
+            symbol (str): The symbol of the trade.
+            price (float): The trade price.
+            quantity (float | None): The traded quantity, see on_bar.
+        """
+        self.on_bar(symbol, price, price, price, price, quantity)
+
+    def on_bars(
+        self,
+        symbol: str,
+        opens: numpy.ndarray,
+        highs: numpy.ndarray,
+        lows: numpy.ndarray,
+        closes: numpy.ndarray,
+        volumes: numpy.ndarray | None = None,
+    ) -> None:
+        """
+        Matches the resting orders of a symbol against consecutive bars.
+        Only the bars that reach the bounds of the book are matched one by one, the others are skipped at once.
+
+        Args:
+            symbol (str): The symbol of the bars.
+            opens, highs, lows, closes (numpy.ndarray): The prices of the bars.
+            volumes (numpy.ndarray | None): The volumes of the bars, see on_bar.
+        """
+        start, end = 0, len(closes)
+        while start < end:
+            lower, upper = self.bounds(symbol)
+            window = (lows[start:end] <= lower) | (highs[start:end] >= upper)
+            if not (hits := numpy.flatnonzero(window)).size:
+                break
+            index = start + int(hits[0])
+            self.on_bar(
+                symbol,
+                float(opens[index]),
+                float(highs[index]),
+                float(lows[index]),
+                float(closes[index]),
+                None if volumes is None else float(volumes[index]),
+            )
+            start = index + 1
+
+        # The last bar is the current bar for the orders placed next, also when it was skipped.
+        if end and start < end:
+            book = self._book(symbol)
+            book.last_price = float(closes[end - 1])
+            book.liquidity = self._liquidity(
+                None if volumes is None else float(volumes[end - 1])
+            )
+
+    def create_order(self, payload: CreateOrderSchema) -> OrderSchema:
+        """
+        Places an order, filling what it can take at the last price at once.
+
+        Market orders are filled at the last price fed for the symbol, or at the price of the payload
+        before any market data was fed.
+
+        Args:
+            payload (CreateOrderSchema): The order details.
+
+        Returns:
+            OrderSchema: The order after its immediate fills.
+
+        Raises:
+            OrderRejectedError: When the order is missing a price it needs.
+        """
+        if payload.type == OrderType.LIMIT and payload.price is None:
+            raise OrderRejectedError("A limit order needs a price")
+
+        book = self._book(payload.symbol)
+        market_price = (
+            payload.price if book.last_price is None else Decimal(str(book.last_price))
+        )
+        if market_price is None:
+            raise OrderRejectedError(
+                f"There is no market price for {payload.symbol} yet"
+            )
+
+        sequence = next(self._order_ids)
+        order = _Order(str(sequence), sequence, payload)
+        self.orders[order.order_id] = order
+        if len(self.orders) >= self._prune_at:
+            self._prune_orders()
+
+        if payload.type not in _STOP_ORDER_TYPES:
+            self._take(book, order, market_price)
+            return self._order_schema(order)
+
+        stop_price = payload.stop_price
+        if stop_price is None:
+            order.status = "REJECTED"
+            raise OrderRejectedError(f"A {payload.type} order needs a stop price")
+        is_stop_loss = payload.type in (OrderType.STOP_LOSS, OrderType.STOP_LOSS_LIMIT)
+        if (order.side == OrderSide.BUY) == is_stop_loss:
+            heapq.heappush(book.rising_stops, (stop_price, sequence, order))
+        else:
+            heapq.heappush(book.falling_stops, (-stop_price, sequence, order))
+        book.bounds = None
+
+        return self._order_schema(order)
+
+    def _order_schema(self, order: _Order) -> OrderSchema:
+        return OrderSchema.construct(
+            order_id=order.order_id,
+            client_order_id=order.client_order_id,
+            symbol=order.symbol,
+            status=order.status,
+            executed_qty=order.executed_qty,
+            side=order.side,
+            type=order.type,
+            time_in_force=order.time_in_force,
+            price=order.average_price,
+            stop_price=order.stop_price,
+            commission=order.commission,
+            quote_qty=order.quote_qty,
+        )
+
+    def get_order_by_id(self, order_id: str) -> dict:
+        """
+        Retrieves an order by ID. Orders that were done long ago are forgotten, see order_history.
+
+        Args:
+            order_id (str): The ID of the order to retrieve.
+
+        Returns:
+            dict: The order, in the format of Binance, with its commission.
+        """
+        return self.orders[str(order_id)].to_dict()
+
+    def get_all_orders(self) -> list[dict]:
+        """
+        Retrieves the open and recent orders, in the order they were placed.
+
+        Returns:
+            list[dict]: The orders, see get_order_by_id.
+        """
+        return [order.to_dict() for order in self.orders.values()]
+
+    def cancel_order_by_id(self, order_id: str) -> None:
+        """
+        Cancels an open order. Its fills so far are kept.
+
+        Args:
+            order_id (str): The ID of the order to cancel.
+
+        Raises:
+            ValueError: When the order is not open.
+        """
+        order = self.orders[str(order_id)]
+        if order.status not in OPEN_ORDER_STATUSES:
+            raise ValueError(f"Order {order_id} is {order.status}")
+        order.status = "CANCELED"
+
+    def get_account(self) -> dict:
+        """
+        Retrieves the balances, in the format of Binance.
+
+        Returns:
+            dict: The balance per asset. Balances are not checked when orders are placed, and may be negative.
+        """
+        return {
+            "balances": [
+                {"asset": asset, "free": str(balance), "locked": "0"}
+                for asset, balance in self.balances.items()
+            ]
+        }
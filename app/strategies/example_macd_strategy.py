@@ -1,13 +1,25 @@
 from decimal import Decimal
 
+import numpy
 import pandas as pd
 from config.config import MainConfig
 from enums import OrderSide
-from schemas import Signal
-from ta.trend import MACD
+from indicators.registry import IndicatorRegistry
+from schemas import BatchSignals, Signal
 
 
 class MACDStrategy:
+    def __init__(self, n_fast: int = 12, n_slow: int = 26, n_sign: int = 9) -> None:
+        """
+        :param n_fast: The window of the fast moving average
+        :param n_slow: The window of the slow moving average
+        :param n_sign: The window of the signal line
+        """
+
+        self.n_fast = n_fast
+        self.n_slow = n_slow
+        self.n_sign = n_sign
+
     def initialize(self, config: MainConfig) -> None:
         """
         Initialize the MACD Strategy with the given configuration.
@@ -16,9 +28,38 @@ class MACDStrategy:
         self.config = config
         self.name = "MACD Strategy"
 
-        self.n_fast: int = 12
-        self.n_slow: int = 26
-        self.n_sign: int = 9
+        # Bound by the signal engine, or to a registry of its own on first use.
+        self.indicators: IndicatorRegistry | None = None
+
+    def bind_indicators(self, indicators: IndicatorRegistry) -> None:
+        """
+        Get the MACD from the given registry, sharing it with the other strategies that use the same one.
+
+        :param indicators: The indicator registry of the signal engine
+        """
+
+        self.indicators = indicators
+        self.feed = indicators.feed(
+            "macd",
+            self.config.symbol,
+            self.config.market_data_config.interval,
+            window_fast=self.n_fast,
+            window_slow=self.n_slow,
+            window_sign=self.n_sign,
+        )
+        self.macd = self.feed.indicators[0]
+
+    def _bound_indicators(self) -> IndicatorRegistry:
+        """
+        Get the indicator registry of the strategy, binding it to a registry of its own when it is
+        not run by a signal engine.
+
+        :return: The bound indicator registry
+        """
+
+        if self.indicators is None:
+            self.bind_indicators(IndicatorRegistry())
+        return self.indicators
 
     def _create_signal(
         self, action: OrderSide, reason: str, current_price: Decimal
@@ -53,25 +94,23 @@ class MACDStrategy:
         :return: A Signal object if a buy or sell signal is generated, None otherwise
         """
 
-        macd = MACD(
-            close=df["close"],
-            window_fast=self.n_fast,
-            window_slow=self.n_slow,
-            window_sign=self.n_sign,
-            fillna=False,
-        )
-
-        macd_line = macd.macd()
-        if len(macd_line) < 2:
+        # Only the klines that were not seen before are fed to the MACD.
+        self._bound_indicators()
+        self.feed.sync(df)
+
+        current_macd = self.macd.macd
+        previous_macd = self.macd.previous_macd
+        current_signal = self.macd.signal
+        previous_signal = self.macd.previous_signal
+
+        if (
+            current_macd is None
+            or previous_macd is None
+            or current_signal is None
+            or previous_signal is None
+        ):
             return None
 
-        signal_line = macd.macd_signal()
-
-        current_macd = macd_line.iloc[-1]
-        previous_macd = macd_line.iloc[-2]
-        current_signal = signal_line.iloc[-1]
-        previous_signal = signal_line.iloc[-2]
-
         current_price = Decimal(df["close"].iloc[-1])
 
         if current_macd > current_signal and previous_macd <= previous_signal:
@@ -89,3 +128,41 @@ class MACDStrategy:
             )
 
         return None
+
+    def analyze_batch(self, df: pd.DataFrame) -> BatchSignals:
+        """
+        Generate the MACD crossover signals for every row of the given dataframe at once.
+
+        The signal at each row is the same signal `analyze` would return for the dataframe up to that row.
+
+        :param df: A pandas DataFrame containing the asset's historical data
+        :return: A BatchSignals object with the per-row signals
+        """
+
+        macd = self._bound_indicators().series(
+            "macd",
+            df,
+            self.config.symbol,
+            self.config.market_data_config.interval,
+            window_fast=self.n_fast,
+            window_slow=self.n_slow,
+            window_sign=self.n_sign,
+        )
+
+        current_macd = macd["macd"]
+        current_signal = macd["signal"]
+        previous_macd = numpy.roll(current_macd, 1)
+        previous_signal = numpy.roll(current_signal, 1)
+        previous_macd[0] = previous_signal[0] = numpy.nan
+
+        # Comparisons against NaN are False, so rows without enough history never signal.
+        buy = (current_macd > current_signal) & (previous_macd <= previous_signal)
+        sell = (current_macd < current_signal) & (previous_macd >= previous_signal)
+
+        return BatchSignals(
+            name=self.name,
+            buy_reason="MACD line crossed above signal line",
+            sell_reason="MACD line crossed below signal line",
+            action=numpy.where(buy, 1, numpy.where(sell, -1, 0)).astype(numpy.int8),
+            price=df["close"].to_numpy(dtype=float),
+        )
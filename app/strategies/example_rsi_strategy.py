@@ -1,13 +1,29 @@
 from decimal import Decimal
 
+import numpy
 import pandas
 from config.config import MainConfig
 from enums import OrderSide
-from schemas import Signal
-from ta.momentum import rsi
+from indicators.registry import IndicatorRegistry
+from schemas import BatchSignals, Signal
 
 
 class SimpleRsiStrategy:
+    def __init__(
+        self,
+        overbought: int = 70,
+        oversold: int = 30,
+        window: int = 14,
+    ) -> None:
+        """
+        :param overbought: The RSI value above which a sell signal is created
+        :param oversold: The RSI value below which a buy signal is created
+        :param window: The window of the RSI
+        """
+        self.overbought = overbought
+        self.oversold = oversold
+        self.window = window
+
     def initialize(
         self,
         config: MainConfig,
@@ -18,9 +34,35 @@ class SimpleRsiStrategy:
         self.config = config
         self.name = "Simple RSI Strategy"
 
-        self.overbought: int = 70
-        self.oversold: int = 30
-        self.window: int = 14
+        # Bound by the signal engine, or to a registry of its own on first use.
+        self.indicators: IndicatorRegistry | None = None
+
+    def bind_indicators(self, indicators: IndicatorRegistry) -> None:
+        """
+        Get the RSI from the given registry, sharing it with the other strategies that use the same one.
+
+        :param indicators: The indicator registry of the signal engine
+        """
+        self.indicators = indicators
+        self.feed = indicators.feed(
+            "rsi",
+            self.config.symbol,
+            self.config.market_data_config.interval,
+            window=self.window,
+        )
+        self.rsi = self.feed.indicators[0]
+
+    def _bound_indicators(self) -> IndicatorRegistry:
+        """
+        Get the indicator registry of the strategy, binding it to a registry of its own when it is
+        not run by a signal engine.
+
+        :return: The bound indicator registry
+        """
+
+        if self.indicators is None:
+            self.bind_indicators(IndicatorRegistry())
+        return self.indicators
 
     def _create_signal(
         self,
@@ -68,7 +110,14 @@ class SimpleRsiStrategy:
         :return: A Signal object if a buy or sell signal is generated, None otherwise
         """
 
-        current_rsi = rsi(close=df["close"], window=self.window, fillna=False).iloc[-1]
+        # Only the klines that were not seen before are fed to the RSI.
+        self._bound_indicators()
+        self.feed.sync(df)
+
+        current_rsi = self.rsi.value
+        if current_rsi is None:
+            return None
+
         current_price = Decimal(df["close"].iloc[-1])
 
         if current_rsi < self.oversold:
@@ -92,3 +141,44 @@ class SimpleRsiStrategy:
             )
 
         return None
+
+    def analyze_batch(self, df: pandas.DataFrame) -> BatchSignals:
+        """
+        Generate the RSI threshold signals for every row of the given dataframe at once.
+
+        The signal at each row is the same signal `analyze` would return for the dataframe up to that row.
+
+        :param df: A pandas DataFrame containing the asset's historical data
+        :return: A BatchSignals object with the per-row signals
+        """
+
+        current_rsi = self._bound_indicators().series(
+            "rsi",
+            df,
+            self.config.symbol,
+            self.config.market_data_config.interval,
+            window=self.window,
+        )["rsi"]
+        close = df["close"].to_numpy(dtype=float)
+
+        # Comparisons against NaN are False, so rows without enough history never signal.
+        buy = current_rsi < self.oversold
+        sell = current_rsi > self.overbought
+
+        return BatchSignals(
+            name=self.name,
+            buy_reason="RSI value is below the oversold threshold",
+            sell_reason="RSI value is above the overbought threshold",
+            action=numpy.where(buy, 1, numpy.where(sell, -1, 0)).astype(numpy.int8),
+            price=close,
+            stop_price=numpy.where(
+                buy,
+                close * float(self.config.trading_config.stop_loss_percentage),
+                numpy.nan,
+            ),
+            take_profit_price=numpy.where(
+                buy,
+                close * float(self.config.trading_config.take_profit_percentage),
+                numpy.nan,
+            ),
+        )
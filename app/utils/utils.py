@@ -1,42 +1,66 @@
 import importlib
 import os
-from datetime import datetime, timezone
-from typing import TypeVar
+from datetime import datetime, timedelta, timezone
+from typing import Any, TypeVar
 
 from enums import INTERVALS
 from interfaces import StrategyProtocol
 
 T = TypeVar("T")
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
-def get_instance_from_mapping(mapping: dict[str, type[T]], env_var_name: str) -> T:
+
+def get_instance_from_mapping(
+    mapping: dict[str, str | type[T]], env_var_name: str
+) -> T:
+    # Classes can be registered by import path, so only the selected one gets imported.
     if env_value := os.getenv(env_var_name):
-        return mapping[env_value]()
+        factory = mapping[env_value]
+        if isinstance(factory, str):
+            factory = import_from_path(factory)
+        return factory()
 
     raise ValueError(f"Environment variable {env_var_name} not set")
 
 
-def get_strategy_instances(env_var_name: str = "STRATEGIES") -> list[StrategyProtocol]:
+def get_strategy_instances(
+    env_var_name: str = "STRATEGIES", mapping: dict[str, str] | None = None
+) -> list[StrategyProtocol]:
     env_var_value = os.getenv(env_var_name)
     if not env_var_value:
         raise ValueError(f"Environment variable {env_var_name} not set")
 
     instances = []
     for item in env_var_value.split(","):
-        module_name, class_name = item.strip().rsplit(".", 1)
-        module = importlib.import_module(module_name)
-        strategy_class = getattr(module, class_name)
+        strategy_class = import_strategy(item.strip(), mapping)
         instances.append(strategy_class())
     return instances
 
 
+def import_strategy(name: str, mapping: dict[str, str] | None = None) -> Any:
+    # A registered strategy name, or the import path of the strategy class.
+    return import_from_path((mapping or {}).get(name, name))
+
+
+def import_from_path(path: str) -> Any:
+    module_name, attribute_name = path.rsplit(".", 1)
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute_name)
+
+
 def timestamp_to_datetime(timestamp: int) -> str:
     dt = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
     return dt.strftime("%Y-%m-%d %H:%M:%S")
 
 
 def datetime_to_timestamp(value: datetime) -> int:
-    return int(value.timestamp() * 1000)
+    # Integer arithmetic, so converting back and forth never drifts by a millisecond.
+    return (value.astimezone(timezone.utc) - EPOCH) // timedelta(milliseconds=1)
+
+
+def timestamp_to_utc_datetime(timestamp: int) -> datetime:
+    return EPOCH + timedelta(milliseconds=int(timestamp))
 
 
 def y_m_d_to_datetime(value: str) -> datetime:
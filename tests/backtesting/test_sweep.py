@@ -0,0 +1,42 @@
+import pandas as pd
+
+from app.backtesting.sweep import expand_grid, max_drawdown, run_parameter_sweep
+from app.config.config import MainConfig
+from app.strategies.example_macd_strategy import MACDStrategy
+from app.strategies.example_rsi_strategy import SimpleRsiStrategy
+from tests.mocked_data import MockRandomWalkMarketData
+
+
+def test_expand_grid() -> None:
+    assert expand_grid({"window": [7, 14], "oversold": [30]}) == [
+        {"window": 7, "oversold": 30},
+        {"window": 14, "oversold": 30},
+    ]
+
+
+def test_max_drawdown() -> None:
+    assert max_drawdown(pd.Series([100.0, 120.0, 90.0, 130.0, 117.0])) == 0.25
+    # Drawdowns are only measured from positive peaks.
+    assert max_drawdown(pd.Series([0.0, -10.0, 0.0])) == 0.0
+    assert max_drawdown(pd.Series([-10.0, 0.0, 100.0, 50.0])) == 0.5
+    assert max_drawdown(pd.Series([], dtype=float)) == 0.0
+
+
+def test_run_parameter_sweep(trading_bot_config: MainConfig) -> None:
+    df = MockRandomWalkMarketData().get_klines("BTCUSDT", "15m", 1000)
+
+    results = run_parameter_sweep(
+        config=trading_bot_config,
+        df=df,
+        grids={
+            SimpleRsiStrategy: {"window": [7, 14], "oversold": [20, 30]},
+            MACDStrategy: {"n_fast": [8, 12]},
+        },
+        max_workers=2,
+    )
+
+    assert len(results) == 6
+    assert results["final_balance"].is_monotonic_decreasing
+    assert set(results["strategy"]) == {"SimpleRsiStrategy", "MACDStrategy"}
+    assert results["trade_count"].sum() > 0
+    assert results["max_drawdown"].between(0, 1).all()
@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+import pytest
+
+from app.backtesting.walk_forward import run_walk_forward, walk_forward_windows
+from app.config.config import MainConfig
+from app.strategies.example_rsi_strategy import SimpleRsiStrategy
+from tests.conftest import MockStrategy
+from tests.mocked_data import MockRandomWalkMarketData
+
+
+def test_walk_forward_windows() -> None:
+    windows = walk_forward_windows(length=1000, train_bars=400, test_bars=250)
+
+    assert [
+        (window.train_start, window.test_start, window.test_end) for window in windows
+    ] == [(0, 400, 650), (250, 650, 900), (500, 900, 1000)]
+
+
+def test_walk_forward_windows_overlapping_tests() -> None:
+    with pytest.raises(ValueError):
+        walk_forward_windows(length=1000, train_bars=400, test_bars=250, step=100)
+
+
+def test_run_walk_forward(trading_bot_config: MainConfig) -> None:
+    df = MockRandomWalkMarketData(length=1000).get_klines("BTCUSDT", "15m", 1000)
+
+    result = run_walk_forward(
+        config=trading_bot_config,
+        df=df,
+        strategy_class=SimpleRsiStrategy,
+        grid={"window": [7, 14], "oversold": [20, 30]},
+        train_bars=400,
+        test_bars=200,
+        max_workers=2,
+    )
+
+    assert len(result.windows) == 3
+    assert list(result.equity.index) == list(range(400, 1000))
+    assert result.equity.iloc[0] == pytest.approx(
+        float(trading_bot_config.trading_config.starting_balance)
+    )
+    assert result.windows["params"].map(lambda params: "window" in params).all()
+
+
+def test_run_walk_forward_bar_by_bar(trading_bot_config: MainConfig) -> None:
+    """
+    Test that strategies without `analyze_batch` are run bar by bar on each window.
+    """
+    df = MockRandomWalkMarketData(length=300).get_klines("BTCUSDT", "15m", 1000)
+
+    result = run_walk_forward(
+        config=trading_bot_config,
+        df=df,
+        strategy_class=MockStrategy,
+        grid={},
+        train_bars=100,
+        test_bars=100,
+        warmup_bars=50,
+        max_workers=2,
+    )
+
+    assert len(result.windows) == 2
+    assert len(result.equity) == 200
+    assert result.windows["params"].tolist() == [{}, {}]
+
+
+def test_run_walk_forward_needs_a_starting_balance(
+    trading_bot_config: MainConfig,
+) -> None:
+    config = trading_bot_config.copy(deep=True)
+    config.trading_config.starting_balance = Decimal(0)
+    df = MockRandomWalkMarketData(length=1000).get_klines("BTCUSDT", "15m", 1000)
+
+    # Raised before any window is backtested.
+    with pytest.raises(ValueError, match="starting balance"):
+        run_walk_forward(
+            config=config,
+            df=df,
+            strategy_class=SimpleRsiStrategy,
+            grid={"window": [14]},
+            train_bars=400,
+            test_bars=200,
+            max_workers=1,
+        )
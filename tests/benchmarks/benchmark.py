@@ -0,0 +1,356 @@
+"""
+Throughput benchmarks of the backtest hot paths.
+
+Every case runs in a fresh process, so its peak RSS is its own. Run from the repository root:
+
+    python -m tests.benchmarks.benchmark --sizes 10000 100000 1000000 --save baseline.json
+    python -m tests.benchmarks.benchmark --sizes 10000 100000 1000000 --compare baseline.json
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+for path in (ROOT, ROOT / "app"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import pandas as pd  # noqa: E402
+
+from app.config.config import MainConfig, MarketDataConfig, TradingConfig  # noqa: E402
+from app.enums import OrderSide  # noqa: E402
+from app.events.event_sinks import NullEventSink  # noqa: E402
+from app.market_data.static_market_data import StaticMarketData  # noqa: E402
+from app.market_data.synthetic_market_data import SyntheticMarketData  # noqa: E402
+from app.position_manager.fixed_point_position_manager import (  # noqa: E402
+    FixedPointPositionManager,
+)
+from app.position_manager.position_manager import PositionManager  # noqa: E402
+from app.position_manager.trade_executor import TradeExecutor  # noqa: E402
+from app.schemas import Signal  # noqa: E402
+from app.signals.signal_engine import SignalEngine  # noqa: E402
+from app.signals.signal_processor import SignalProcessor  # noqa: E402
+from app.strategies.example_macd_strategy import MACDStrategy  # noqa: E402
+from app.strategies.example_rsi_strategy import SimpleRsiStrategy  # noqa: E402
+from tests.conftest import MockStrategy  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+# Cases that call into Python once per bar are skipped above this size by default.
+DEFAULT_MAX_PER_BAR_SIZE = 200_000
+
+
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+CHUNK_SIZE = 100_000
+
+
+def benchmark_config(size: int = 1000, fixed_point: bool = False) -> MainConfig:
+    return MainConfig(
+        backtest=True,
+        symbol="BTCUSDT",
+        market_data_config=MarketDataConfig(
+            interval="15m", limit=size, start_time=START
+        ),
+        trading_config=TradingConfig(
+            max_amount_open_positions=3,
+            starting_balance=Decimal("1000000000"),
+            notional=Decimal("100"),
+            fixed_point=fixed_point,
+        ),
+    )
+
+
+def build_processor(
+    strategies: list, df: pd.DataFrame, fixed_point: bool = False
+) -> SignalProcessor:
+    config = benchmark_config(len(df), fixed_point)
+    event_sink = NullEventSink()
+    position_manager_class = (
+        FixedPointPositionManager if fixed_point else PositionManager
+    )
+    return SignalProcessor(
+        config,
+        SignalEngine(config=config, strategies=strategies),
+        StaticMarketData(df),
+        position_manager_class(
+            config=config,
+            trade_executor=TradeExecutor(
+                config=config, crypto_exchange=None, event_sink=event_sink
+            ),
+            event_sink=event_sink,
+        ),
+        event_sink=event_sink,
+    )
+
+
+class SignalCounter:
+    """Counts the signals a processor hands to its position manager."""
+
+    def __init__(self, processor: SignalProcessor) -> None:
+        self.count = 0
+        self._handle_signal = processor.position_manager.handle_signal
+        processor.position_manager.handle_signal = self
+
+    def __call__(self, signal: Signal) -> None:
+        self.count += 1
+        self._handle_signal(signal)
+
+
+def synthetic_klines(size: int) -> pd.DataFrame:
+    return SyntheticMarketData(chunk_size=CHUNK_SIZE).get_klines(
+        "BTCUSDT", "15m", size, start_time=START
+    )
+
+
+def bench_backtest_example_strategies(size: int) -> dict[str, float]:
+    """End to end backtest of the example strategies, vectorized."""
+    processor = build_processor(
+        [MACDStrategy(), SimpleRsiStrategy()], synthetic_klines(size)
+    )
+    signals = SignalCounter(processor)
+
+    started_at = time.perf_counter()
+    processor.run()
+    seconds = time.perf_counter() - started_at
+    return {"bars": size, "signals": signals.count, "seconds": seconds}
+
+
+def bench_backtest_mock_strategy(size: int) -> dict[str, float]:
+    """End to end backtest of the conftest MockStrategy, bar by bar."""
+    processor = build_processor([MockStrategy()], synthetic_klines(size))
+    signals = SignalCounter(processor)
+
+    started_at = time.perf_counter()
+    processor.run()
+    seconds = time.perf_counter() - started_at
+    return {"bars": size, "signals": signals.count, "seconds": seconds}
+
+
+def bench_generate_signals(size: int) -> dict[str, float]:
+    """SignalEngine.generate_signals on every growing slice of the klines."""
+    df = synthetic_klines(size)
+    engine = SignalEngine(
+        config=benchmark_config(),
+        strategies=[MACDStrategy(), SimpleRsiStrategy(), MockStrategy()],
+    )
+    engine.initialize_strategies()
+
+    signals = 0
+    started_at = time.perf_counter()
+    for index in range(1, size):
+        signals += len(engine.generate_signals(df.iloc[: index + 1]))
+    seconds = time.perf_counter() - started_at
+    return {"bars": size, "signals": signals, "seconds": seconds}
+
+
+def alternating_signals(size: int) -> list[Signal]:
+    return [
+        Signal(
+            name="benchmark",
+            reason="benchmark",
+            symbol="BTCUSDT",
+            action=OrderSide.BUY if index % 2 == 0 else OrderSide.SELL,
+            price=Decimal(10000 + index % 100),
+            stop_price=None,
+            take_profit_price=None,
+        )
+        for index in range(size)
+    ]
+
+
+def bench_handle_signal(size: int, fixed_point: bool = False) -> dict[str, float]:
+    """PositionManager.handle_signal on alternating buy and sell signals."""
+    position_manager = build_processor([], pd.DataFrame(), fixed_point).position_manager
+    signals = alternating_signals(size)
+
+    started_at = time.perf_counter()
+    for signal in signals:
+        position_manager.handle_signal(signal)
+    seconds = time.perf_counter() - started_at
+    return {"bars": size, "signals": size, "seconds": seconds}
+
+
+def bench_handle_signal_fixed_point(size: int) -> dict[str, float]:
+    """The same signals as handle_signal, with the fixed point accounting."""
+    return bench_handle_signal(size, fixed_point=True)
+
+
+def bench_submit_order(size: int) -> dict[str, float]:
+    """TradeExecutor.submit_order of simulated orders."""
+    trade_executor = build_processor([], pd.DataFrame()).position_manager.trade_executor
+    signals = alternating_signals(size)
+
+    started_at = time.perf_counter()
+    for signal in signals:
+        trade_executor.submit_order(
+            symbol=signal.symbol,
+            side=signal.action,
+            quantity=Decimal("0.01"),
+            price=signal.price,
+        )
+    seconds = time.perf_counter() - started_at
+    return {"bars": size, "signals": size, "seconds": seconds}
+
+
+def bench_parse_klines(size: int) -> dict[str, float]:
+    """BinanceMarketData._parse_klines of raw Binance kline rows."""
+    from app.binance_exchange.market_data import BinanceMarketData
+
+    df = synthetic_klines(size)
+    raw_klines = [
+        [open_time, str(price), str(price), str(price), str(price), "1.0"]
+        + [open_time + 899999, "1.0", 1, "0.5", "0.5", "0"]
+        for open_time, price in zip(df["open_time"].tolist(), df["close"].tolist())
+    ]
+
+    started_at = time.perf_counter()
+    BinanceMarketData(binance_client=object())._parse_klines(raw_klines)
+    seconds = time.perf_counter() - started_at
+    return {"bars": size, "signals": 0, "seconds": seconds}
+
+
+# name: (benchmark, whether it calls into Python once per bar)
+BENCHMARKS: dict[str, tuple[Callable[[int], dict[str, float]], bool]] = {
+    "backtest_example_strategies": (bench_backtest_example_strategies, False),
+    "backtest_mock_strategy": (bench_backtest_mock_strategy, True),
+    "generate_signals": (bench_generate_signals, True),
+    "handle_signal": (bench_handle_signal, True),
+    "handle_signal_fixed_point": (bench_handle_signal_fixed_point, True),
+    "submit_order": (bench_submit_order, True),
+    "parse_klines": (bench_parse_klines, False),
+}
+
+
+def run_case(name: str, size: int) -> dict[str, float]:
+    """
+    Runs a single benchmark in the current process and computes its rates.
+    """
+    benchmark, _ = BENCHMARKS[name]
+    result = benchmark(size)
+    seconds = max(result["seconds"], 1e-9)
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss_kb /= 1024
+
+    return {
+        "seconds": round(seconds, 6),
+        "bars_per_sec": round(result["bars"] / seconds, 1),
+        "signals_per_sec": round(result["signals"] / seconds, 1),
+        "peak_rss_mb": round(peak_rss_kb / 1024, 1),
+    }
+
+
+def run_case_isolated(name: str, size: int) -> dict[str, float]:
+    """
+    Runs a single benchmark in a fresh process, so its peak RSS is not shared with other cases.
+    """
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_case, (name, size))
+
+
+def run_benchmarks(
+    names: list[str],
+    sizes: list[int],
+    max_per_bar_size: int = DEFAULT_MAX_PER_BAR_SIZE,
+    isolated: bool = True,
+) -> dict[str, dict[str, dict[str, float]]]:
+    """
+    Runs the benchmarks over every size.
+
+    Returns:
+        dict[str, dict[str, dict[str, float]]]: The metrics per benchmark name and size.
+    """
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    for name in names:
+        _, per_bar = BENCHMARKS[name]
+        for size in sizes:
+            if per_bar and size > max_per_bar_size:
+                continue
+            run = run_case_isolated if isolated else run_case
+            results.setdefault(name, {})[str(size)] = run(name, size)
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, dict[str, float]]],
+    baseline: dict[str, dict[str, dict[str, float]]],
+    tolerance: float,
+) -> list[str]:
+    """
+    Lists the cases that got slower or bigger than the baseline by more than the tolerance.
+    """
+    regressions = []
+    for name, sizes in results.items():
+        for size, metrics in sizes.items():
+            expected = baseline.get(name, {}).get(size)
+            if not expected:
+                continue
+            if metrics["bars_per_sec"] < expected["bars_per_sec"] * (1 - tolerance):
+                regressions.append(
+                    f"{name}[{size}]: {metrics['bars_per_sec']} bars/sec, "
+                    f"baseline {expected['bars_per_sec']}"
+                )
+            if metrics["peak_rss_mb"] > expected["peak_rss_mb"] * (1 + tolerance):
+                regressions.append(
+                    f"{name}[{size}]: {metrics['peak_rss_mb']} MB peak RSS, "
+                    f"baseline {expected['peak_rss_mb']}"
+                )
+    return regressions
+
+
+def print_results(results: dict[str, dict[str, dict[str, float]]]) -> None:
+    print(
+        f"{'benchmark':<30}{'bars':>12}{'seconds':>12}"
+        f"{'bars/sec':>16}{'signals/sec':>16}{'peak RSS MB':>14}"
+    )
+    for name, sizes in results.items():
+        for size, metrics in sizes.items():
+            print(
+                f"{name:<30}{size:>12}{metrics['seconds']:>12.3f}"
+                f"{metrics['bars_per_sec']:>16,.0f}{metrics['signals_per_sec']:>16,.0f}"
+                f"{metrics['peak_rss_mb']:>14.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS)
+    )
+    parser.add_argument(
+        "--max-per-bar-size", type=int, default=DEFAULT_MAX_PER_BAR_SIZE
+    )
+    parser.add_argument("--save", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", help="compare the results to a baseline JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed relative regression when comparing, defaults to 0.2",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.benchmarks, args.sizes, args.max_per_bar_size)
+    print_results(results)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if regressions := compare(results, baseline, args.tolerance):
+            print("REGRESSIONS:")
+            for regression in regressions:
+                print(regression)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
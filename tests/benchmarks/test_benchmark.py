@@ -0,0 +1,34 @@
+from tests.benchmarks.benchmark import BENCHMARKS, compare, run_benchmarks
+
+
+def test_benchmarks_smoke() -> None:
+    """
+    Test that every benchmark runs on a small dataset and reports its metrics.
+    """
+    results = run_benchmarks(list(BENCHMARKS), [500], isolated=False)
+
+    assert set(results) == set(BENCHMARKS)
+    for sizes in results.values():
+        metrics = sizes["500"]
+        assert metrics["bars_per_sec"] > 0
+        assert metrics["peak_rss_mb"] > 0
+    assert results["handle_signal"]["500"]["signals_per_sec"] > 0
+
+
+def test_benchmarks_skip_per_bar_cases_above_the_limit() -> None:
+    results = run_benchmarks(
+        ["parse_klines", "generate_signals"], [200, 400], 200, isolated=False
+    )
+
+    assert list(results["parse_klines"]) == ["200", "400"]
+    assert list(results["generate_signals"]) == ["200"]
+
+
+def test_compare_reports_regressions() -> None:
+    baseline = {"case": {"10": {"bars_per_sec": 100.0, "peak_rss_mb": 50.0}}}
+    results = {"case": {"10": {"bars_per_sec": 70.0, "peak_rss_mb": 55.0}}}
+
+    regressions = compare(results, baseline, tolerance=0.2)
+
+    assert len(regressions) == 1
+    assert "bars/sec" in regressions[0]
@@ -0,0 +1,290 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import pytest
+
+from app.binance_exchange import exchange as exchange_module
+from app.binance_exchange.exchange import (
+    BinanceAPIError,
+    BinanceExchange,
+    OrderRejectedError,
+)
+from app.enums import OrderSide, OrderType, TimeInForce
+from app.schemas import CreateOrderSchema
+
+API_KEY = "key"
+API_SECRET = "secret"
+SERVER_CLOCK_AHEAD = 3_600_000  # the server clock runs an hour ahead, in ms
+FILL_PRICE = Decimal("20000.5")
+FEE = Decimal("0.001")
+FILTERS = [
+    {"filterType": "PRICE_FILTER", "minPrice": "0.01000000", "tickSize": "0.01000000"},
+    {"filterType": "LOT_SIZE", "minQty": "0.00001000", "stepSize": "0.00001000"},
+]
+
+
+def server_time() -> int:
+    return int(time.time() * 1000) + SERVER_CLOCK_AHEAD
+
+
+class StubExchangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keeps connections alive
+    disable_nagle_algorithm = True  # the headers and the body are written separately
+
+    client_ports: list[int] = []
+    paths: list[str] = []
+    orders: dict[str, dict] = {}
+    order_params: list[dict[str, str]] = []
+    commission_assets: dict[str, str] = {}  # per side, BNB by default
+
+    def _respond(self, status: int, body: object) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method: str) -> None:
+        self.client_ports.append(self.client_address[1])
+        url = urlparse(self.path)
+        self.paths.append(f"{method} {url.path}")
+
+        if url.path == "/api/v3/time":
+            self._respond(200, {"serverTime": server_time()})
+            return
+        if url.path == "/api/v3/exchangeInfo":
+            symbol = dict(parse_qsl(url.query))["symbol"]
+            symbol_info = {
+                "symbol": symbol,
+                "baseAsset": symbol.removesuffix("USDT"),
+                "quoteAsset": "USDT",
+                "filters": FILTERS,
+            }
+            self._respond(200, {"symbols": [symbol_info]})
+            return
+
+        query = url.query
+        if method == "POST":
+            query = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        unsigned_query, _, signature = query.rpartition("&signature=")
+        expected = hmac.new(
+            API_SECRET.encode(), unsigned_query.encode(), hashlib.sha256
+        ).hexdigest()
+        if self.headers["X-MBX-APIKEY"] != API_KEY or signature != expected:
+            self._respond(400, {"code": -1022, "msg": "Signature is not valid."})
+            return
+
+        params = dict(parse_qsl(unsigned_query))
+        if abs(int(params["timestamp"]) - server_time()) > int(params["recvWindow"]):
+            self._respond(400, {"code": -1021, "msg": "Timestamp outside recvWindow"})
+            return
+
+        if url.path == "/api/v3/account":
+            self._respond(200, {"balances": []})
+        elif method == "POST":
+            self.order_params.append(params)
+            order_id = len(self.orders) + 1
+            quantity = Decimal(params["quantity"])
+            order = {
+                "symbol": params["symbol"],
+                "orderId": order_id,
+                "clientOrderId": params["newClientOrderId"],
+                "price": "0.00000000",
+                "origQty": params["quantity"],
+                "executedQty": params["quantity"],
+                "cummulativeQuoteQty": str(quantity * FILL_PRICE),
+                "status": "FILLED",
+                "timeInForce": "GTC",
+                "type": params["type"],
+                "side": params["side"],
+            }
+            self.orders[str(order_id)] = order
+            commission_asset = self.commission_assets.get(params["side"], "BNB")
+            fill = {
+                "price": str(FILL_PRICE),
+                "qty": params["quantity"],
+                "commission": str(quantity * FEE),
+                "commissionAsset": commission_asset,
+            }
+            if commission_asset == "USDT":
+                fill["commission"] = str(quantity * FILL_PRICE * FEE)
+            self._respond(200, {**order, "fills": [fill]})
+        elif method == "DELETE":
+            order = self.orders[params["orderId"]]
+            order["status"] = "CANCELED"
+            self._respond(200, order)
+        else:
+            self._respond(200, self.orders[params["orderId"]])
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def exchange():
+    StubExchangeHandler.client_ports = []
+    StubExchangeHandler.paths = []
+    StubExchangeHandler.orders = {}
+    StubExchangeHandler.order_params = []
+    StubExchangeHandler.commission_assets = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubExchangeHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+
+    exchange = BinanceExchange(
+        api_key=API_KEY,
+        api_secret=API_SECRET,
+        base_url=f"http://127.0.0.1:{server.server_port}",
+    )
+    yield exchange
+
+    exchange.close()
+    server.shutdown()
+    server.server_close()
+
+
+def order_payload(side: OrderSide = OrderSide.BUY) -> CreateOrderSchema:
+    return CreateOrderSchema(
+        client_order_id="client-1",
+        symbol="BTCUSDT",
+        side=side,
+        type=OrderType.MARKET,
+        time_in_force=TimeInForce.GTC,
+        quantity=Decimal("0.01"),
+        price=Decimal("20000"),
+        stop_price=None,
+        trailing_delta=None,
+    )
+
+
+def test_orders_share_one_keep_alive_connection(exchange: BinanceExchange) -> None:
+    orders = [
+        exchange.create_order(order_payload(side))
+        for side in [OrderSide.BUY, OrderSide.SELL, OrderSide.BUY]
+    ]
+
+    assert [order.order_id for order in orders] == ["1", "2", "3"]
+    assert orders[1].side == OrderSide.SELL
+    assert orders[0].executed_qty == Decimal("0.01")
+    assert orders[0].price == FILL_PRICE
+    assert orders[0].client_order_id == "client-1"
+
+    # The symbol of an order placed by the exchange does not have to be given.
+    assert exchange.get_order_by_id("2")["side"] == "SELL"
+    exchange.cancel_order_by_id("3")
+    assert exchange.get_order_by_id("3")["status"] == "CANCELED"
+    assert exchange.get_account() == {"balances": []}
+
+    # The server time is synced once, and every request reuses the same connection.
+    assert StubExchangeHandler.paths.count("GET /api/v3/time") == 1
+    assert len(set(StubExchangeHandler.client_ports)) == 1
+
+
+def test_commissions_are_booked_in_the_quote_asset(exchange: BinanceExchange) -> None:
+    # The fee is taken from the asset received.
+    StubExchangeHandler.commission_assets = {"BUY": "BTC", "SELL": "USDT"}
+    buy = exchange.create_order(order_payload(OrderSide.BUY))
+    sell = exchange.create_order(order_payload(OrderSide.SELL))
+
+    assert StubExchangeHandler.order_params[0]["newOrderRespType"] == "FULL"
+    # The base asset fee of the buy is not held, the quote amount paid for it is.
+    assert buy.executed_qty == Decimal("0.01") - Decimal("0.00001")
+    assert buy.quote_qty == Decimal("0.01") * FILL_PRICE
+    assert buy.commission == 0
+    assert sell.executed_qty == Decimal("0.01")
+    assert sell.quote_qty == Decimal("0.01") * FILL_PRICE
+    assert sell.commission == Decimal("0.01") * FILL_PRICE * FEE
+
+    # Fees paid in BNB are taken from another balance.
+    StubExchangeHandler.commission_assets = {}
+    assert exchange.create_order(order_payload()).commission == 0
+
+
+def test_orders_are_rounded_to_the_symbol_filters(exchange: BinanceExchange) -> None:
+    third = Decimal(100) / Decimal(3)
+    payload = order_payload().copy(
+        update={
+            "type": OrderType.LIMIT,
+            "quantity": third,
+            "price": third,
+            "stop_price": third,
+        }
+    )
+
+    order = exchange.create_order(payload)
+    exchange.create_order(payload.copy(update={"type": OrderType.MARKET}))
+
+    # Rounded down to the step and tick sizes, 0.00001 and 0.01.
+    params = StubExchangeHandler.order_params[0]
+    assert Decimal(params["quantity"]) == Decimal("33.33333")
+    assert Decimal(params["price"]) == Decimal("33.33")
+    assert Decimal(params["stopPrice"]) == Decimal("33.33")
+    assert order.executed_qty == Decimal("33.33333")
+    # The filters are fetched once per symbol.
+    assert StubExchangeHandler.paths.count("GET /api/v3/exchangeInfo") == 1
+
+    with pytest.raises(OrderRejectedError):
+        exchange.create_order(payload.copy(update={"quantity": Decimal("0.000009")}))
+
+
+def test_only_the_symbols_of_recent_orders_are_kept(
+    exchange: BinanceExchange, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(exchange_module, "ORDER_SYMBOLS_SIZE", 2)
+    for symbol in ["BTCUSDT", "ETHUSDT", "BNBUSDT"]:
+        exchange.create_order(order_payload().copy(update={"symbol": symbol}))
+
+    assert list(exchange._order_symbols.items()) == [("2", "ETHUSDT"), ("3", "BNBUSDT")]
+    assert exchange.get_order_by_id("3")["symbol"] == "BNBUSDT"
+    # Without a default symbol, the symbol of an older order must be given.
+    exchange.default_symbol = None
+    with pytest.raises(ValueError):
+        exchange.get_order_by_id("1")
+    assert exchange.get_order_by_id("1", symbol="BTCUSDT")["symbol"] == "BTCUSDT"
+
+
+def test_rejected_timestamp_resyncs_the_clock(exchange: BinanceExchange) -> None:
+    exchange.sync_time()
+    exchange._time_offset = 0  # the clock drifted since the last sync
+
+    assert exchange.create_order(order_payload()).order_id == "1"
+    assert StubExchangeHandler.paths == [
+        "GET /api/v3/time",
+        "GET /api/v3/exchangeInfo",
+        "POST /api/v3/order",
+        "GET /api/v3/time",
+        "POST /api/v3/order",
+    ]
+
+
+def test_errors_are_raised(exchange: BinanceExchange) -> None:
+    exchange._signer = hmac.new(b"wrong", digestmod=hashlib.sha256)
+
+    with pytest.raises(BinanceAPIError) as error:
+        exchange.get_account()
+    assert error.value.code == -1022
+
+    # A rejected order is reported as such, so the bot can skip it. OrderRejectedError comes from the
+    # exchange module, since the app imports schemas without the "app." prefix.
+    with pytest.raises(OrderRejectedError) as rejection:
+        exchange.create_order(order_payload())
+    assert isinstance(rejection.value.__cause__, BinanceAPIError)
+    assert rejection.value.__cause__.code == -1022
@@ -0,0 +1,261 @@
+import base64
+import hashlib
+import json
+import socketserver
+import struct
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from binance import spot
+
+from app.binance_exchange.market_data import BinanceMarketData
+from app.utils.utils import datetime_to_timestamp
+
+MINUTE = 60000
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+FIRST_OPEN_TIME = datetime_to_timestamp(datetime(2021, 1, 1, tzinfo=timezone.utc))
+KLINE_COUNT = 5000
+
+
+class StubKlinesHandler(BaseHTTPRequestHandler):
+    requests: list[dict[str, int]] = []
+
+    def do_GET(self) -> None:
+        query = {
+            key: values[0]
+            for key, values in parse_qs(urlparse(self.path).query).items()
+        }
+        start = int(query.get("startTime", FIRST_OPEN_TIME))
+        end = int(query.get("endTime", FIRST_OPEN_TIME + KLINE_COUNT * MINUTE))
+        limit = int(query.get("limit", 500))
+        self.requests.append({"startTime": start, "endTime": end, "limit": limit})
+
+        klines = []
+        for index in range(KLINE_COUNT):
+            open_time = FIRST_OPEN_TIME + index * MINUTE
+            if start <= open_time <= end and len(klines) < limit:
+                price = str(10000 + index)
+                klines.append(
+                    [
+                        open_time,
+                        price,
+                        price,
+                        price,
+                        price,
+                        "1.0",
+                        open_time + MINUTE - 1,
+                    ]
+                    + ["1.0", 1, "0.5", "0.5", "0"]
+                )
+
+        body = json.dumps(klines).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def market_data():
+    StubKlinesHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubKlinesHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+
+    binance_client = spot.Spot(base_url=f"http://127.0.0.1:{server.server_port}")
+    yield BinanceMarketData(binance_client=binance_client, max_workers=4)
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_klines_range_is_paginated(market_data: BinanceMarketData) -> None:
+    df = market_data.get_klines(
+        symbol="BTCUSDT",
+        interval="1m",
+        limit=1000,
+        start_time=datetime(2021, 1, 1, tzinfo=timezone.utc),
+        end_time=datetime(2021, 1, 5, tzinfo=timezone.utc),
+    )
+
+    assert len(StubKlinesHandler.requests) == 6
+    assert len(df) == KLINE_COUNT
+    assert df["open_time"].is_unique
+    assert df["open_time"].is_monotonic_increasing
+    assert df["close"].iloc[-1] == 10000 + KLINE_COUNT - 1
+
+
+def test_get_klines_start_time_returns_limit(market_data: BinanceMarketData) -> None:
+    df = market_data.get_klines(
+        symbol="BTCUSDT",
+        interval="1m",
+        limit=2500,
+        start_time=datetime(2021, 1, 1, 1, tzinfo=timezone.utc),
+    )
+
+    assert len(StubKlinesHandler.requests) == 3
+    assert len(df) == 2500
+    assert df["open_time"].iloc[0] == FIRST_OPEN_TIME + 60 * MINUTE
+
+
+def test_get_klines_single_request(market_data: BinanceMarketData) -> None:
+    df = market_data.get_klines(
+        symbol="BTCUSDT",
+        interval="1m",
+        limit=100,
+        start_time=datetime(2021, 1, 1, tzinfo=timezone.utc),
+    )
+
+    assert len(StubKlinesHandler.requests) == 1
+    assert len(df) == 100
+
+
+class StubKlineStreamHandler(socketserver.StreamRequestHandler):
+    """
+    A minimal WebSocket server that pushes two updates per kline, the last one closed,
+    like the Binance kline stream, then either waits for the client or closes the stream.
+    """
+
+    paths: list[str] = []
+    kline_count = 3
+    close_stream = False
+
+    def handle(self) -> None:
+        self.paths.append(self.rfile.readline().decode().split()[1])
+        headers = {}
+        while line := self.rfile.readline().decode().strip():
+            name, value = line.split(":", 1)
+            headers[name.lower()] = value.strip()
+
+        accept = base64.b64encode(
+            hashlib.sha1(
+                (headers["sec-websocket-key"] + WEBSOCKET_GUID).encode()
+            ).digest()
+        ).decode()
+        self.wfile.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+            ).encode()
+        )
+
+        for index in range(self.kline_count):
+            for closed in (False, True):
+                self._send_frame(0x1, json.dumps(self._kline_event(index, closed)))
+
+        if self.close_stream:
+            self._send_frame(0x8, "")
+
+        # Wait for the close frame of the client, then answer it.
+        while (opcode := self._read_frame()) not in (None, 0x8):
+            pass
+        if opcode == 0x8 and not self.close_stream:
+            self._send_frame(0x8, "")
+
+    def _kline_event(self, index: int, closed: bool) -> dict:
+        open_time = FIRST_OPEN_TIME + index * MINUTE
+        price = str(10000 + index)
+        return {
+            "e": "kline",
+            "s": "BTCUSDT",
+            "k": {
+                "t": open_time,
+                "T": open_time + MINUTE - 1,
+                "i": "1m",
+                "o": price,
+                "c": price,
+                "h": price,
+                "l": price,
+                "v": "1.0",
+                "n": 1,
+                "x": closed,
+                "q": "1.0",
+                "V": "0.5",
+                "Q": "0.5",
+                "B": "0",
+            },
+        }
+
+    def _send_frame(self, opcode: int, payload: str) -> None:
+        data = payload.encode()
+        if len(data) < 126:
+            header = struct.pack("!BB", 0x80 | opcode, len(data))
+        else:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, len(data))
+        self.wfile.write(header + data)
+
+    def _read_frame(self) -> int | None:
+        header = self.rfile.read(2)
+        if len(header) < 2:
+            return None
+
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self.rfile.read(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self.rfile.read(8))[0]
+        # Client frames are always masked.
+        self.rfile.read(4 + length)
+        return header[0] & 0x0F
+
+
+@pytest.fixture
+def streaming_market_data():
+    StubKlineStreamHandler.paths = []
+    StubKlineStreamHandler.close_stream = False
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StubKlineStreamHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+
+    port = server.server_address[1]
+    yield BinanceMarketData(stream_url=f"ws://127.0.0.1:{port}")
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_stream_klines_yields_closed_klines(
+    streaming_market_data: BinanceMarketData,
+) -> None:
+    stream = streaming_market_data.stream_klines(symbol="BTCUSDT", interval="1m")
+    klines = [next(stream) for _ in range(StubKlineStreamHandler.kline_count)]
+    stream.close()
+
+    assert StubKlineStreamHandler.paths == ["/ws/btcusdt@kline_1m"]
+    assert [len(kline) for kline in klines] == [1, 1, 1]
+    assert [kline["open_time"].iloc[0] for kline in klines] == [
+        FIRST_OPEN_TIME,
+        FIRST_OPEN_TIME + MINUTE,
+        FIRST_OPEN_TIME + 2 * MINUTE,
+    ]
+    assert klines[-1]["close"].iloc[0] == 10002.0
+    assert list(klines[0].columns) == list(
+        streaming_market_data._parse_klines([]).columns
+    )
+
+
+def test_stream_klines_raises_when_the_stream_is_lost(
+    streaming_market_data: BinanceMarketData,
+) -> None:
+    StubKlineStreamHandler.close_stream = True
+
+    stream = streaming_market_data.stream_klines(symbol="BTCUSDT", interval="1m")
+    klines = [next(stream) for _ in range(StubKlineStreamHandler.kline_count)]
+
+    with pytest.raises(ConnectionError):
+        next(stream)
+    assert len(klines) == StubKlineStreamHandler.kline_count
@@ -0,0 +1,86 @@
+import json
+from decimal import Decimal
+
+from app.config.config import MainConfig
+from app.enums import EventLevel
+from app.events.event_sinks import (
+    ConsoleEventSink,
+    FileEventSink,
+    NullEventSink,
+    event_sink_from_settings,
+)
+from app.position_manager.position_manager import PositionManager
+from app.position_manager.trade_executor import TradeExecutor
+from app.signals.signal_engine import SignalEngine
+from app.signals.signal_processor import SignalProcessor
+from app.strategies.example_rsi_strategy import SimpleRsiStrategy
+from tests.mocked_data import MockRandomWalkMarketData
+
+
+def test_console_event_sink_filters_levels(capsys) -> None:
+    sink = ConsoleEventSink(EventLevel.SUMMARY)
+    sink.emit(EventLevel.DEBUG, "kline", {"Close": 1})
+    sink.emit(EventLevel.SUMMARY, "backtest_results", {"Asset": "BTCUSDT"})
+
+    captured = capsys.readouterr()
+    assert "Close" not in captured.out
+    assert "[SUMMARY] backtest_results" in captured.out
+    assert "Asset:  BTCUSDT" in captured.out
+    assert not sink.enabled(EventLevel.INFO)
+    assert sink.enabled(EventLevel.ERROR)
+
+
+def test_file_event_sink_writes_json_lines(tmp_path) -> None:
+    path = tmp_path / "events.log"
+    sink = FileEventSink(str(path), EventLevel.INFO)
+    sink.emit(EventLevel.DEBUG, "kline", {"Close": 1})
+    for index in range(100):
+        sink.emit(EventLevel.INFO, "order", {"Index": index, "Price": 1.5})
+    sink.close()
+
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(events) == 100
+    assert events[0]["level"] == "INFO"
+    assert events[0]["event"] == "order"
+    assert events[-1]["fields"] == {"Index": 99, "Price": 1.5}
+
+
+def test_event_sink_from_settings(tmp_path) -> None:
+    assert isinstance(event_sink_from_settings("off"), NullEventSink)
+    assert event_sink_from_settings("summary").enabled(EventLevel.SUMMARY)
+
+    sink = event_sink_from_settings("INFO", str(tmp_path / "events.log"))
+    assert isinstance(sink, FileEventSink)
+    sink.close()
+
+
+def test_backtest_summary_only_output(trading_bot_config: MainConfig, capsys) -> None:
+    """
+    Test that a backtest reporting to a summary-level sink only prints its results.
+    """
+    event_sink = ConsoleEventSink(EventLevel.SUMMARY)
+    processor = SignalProcessor(
+        trading_bot_config,
+        SignalEngine(config=trading_bot_config, strategies=[SimpleRsiStrategy()]),
+        MockRandomWalkMarketData(),
+        PositionManager(
+            config=trading_bot_config,
+            trade_executor=TradeExecutor(
+                config=trading_bot_config, crypto_exchange=None, event_sink=event_sink
+            ),
+            event_sink=event_sink,
+        ),
+        event_sink=event_sink,
+    )
+    processor.run()
+    processor.position_manager.print_stats(
+        close_price=Decimal(str(processor.df["close"].iloc[-1]))
+    )
+
+    captured = capsys.readouterr()
+    assert processor.position_manager.trade_executor.order_count > 0
+    assert "[DEBUG]" not in captured.out
+    assert "[INFO]" not in captured.out
+    assert "[SUMMARY] backtest_results" in captured.out
+    assert "[SUMMARY] position_manager_stats" in captured.out
+    assert "[SUMMARY] trade_executor_stats" in captured.out
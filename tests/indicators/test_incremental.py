@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ta.momentum import rsi
+from ta.trend import MACD as TaMACD
+
+from app.indicators.incremental import EMA, MACD, RSI, IndicatorFeed
+
+
+@pytest.fixture
+def close() -> pd.Series:
+    rng = np.random.default_rng(42)
+    return pd.Series(10000 + np.cumsum(rng.normal(0, 25, 300)))
+
+
+def _assert_matches(values: list[float | None], expected: pd.Series) -> None:
+    for value, expected_value in zip(values, expected):
+        if np.isnan(expected_value):
+            assert value is None
+        else:
+            assert value == pytest.approx(expected_value)
+
+
+def test_ema_matches_pandas(close: pd.Series) -> None:
+    ema = EMA(window=12)
+    values = [ema.update(value) for value in close]
+
+    _assert_matches(values, close.ewm(span=12, min_periods=12, adjust=False).mean())
+
+
+def test_macd_matches_ta(close: pd.Series) -> None:
+    macd = MACD(window_fast=12, window_slow=26, window_sign=9)
+    macd_values, signal_values = [], []
+    for value in close:
+        macd_values.append(macd.update(value))
+        signal_values.append(macd.signal)
+
+    expected = TaMACD(close, window_fast=12, window_slow=26, window_sign=9)
+    _assert_matches(macd_values, expected.macd())
+    _assert_matches(signal_values, expected.macd_signal())
+
+
+def test_rsi_matches_ta(close: pd.Series) -> None:
+    indicator = RSI(window=14)
+    values = [indicator.update(value) for value in close]
+
+    _assert_matches(values, rsi(close, window=14, fillna=False))
+
+
+def test_replace_last_value(close: pd.Series) -> None:
+    """
+    Test that replacing the still-forming last value gives the same result as
+    feeding the final value directly.
+    """
+    replaced = RSI(window=14)
+    direct = RSI(window=14)
+    for value in close.iloc[:-1]:
+        replaced.update(value)
+        direct.update(value)
+
+    replaced.update(close.iloc[-1] + 500)
+    replaced.update(close.iloc[-1], replace=True)
+    direct.update(close.iloc[-1])
+
+    assert replaced.value == pytest.approx(direct.value)
+    assert replaced.previous == pytest.approx(direct.previous)
+
+
+def test_feed_only_feeds_new_rows(close: pd.Series) -> None:
+    df = pd.DataFrame({"open_time": np.arange(len(close)) * 60_000, "close": close})
+    incremental = RSI(window=14)
+    feed = IndicatorFeed(incremental)
+
+    for index in range(1, len(df)):
+        feed.sync(df.iloc[: index + 1])
+
+    # A fresh window that overlaps the previous one, with the last kline updated.
+    shifted = df.iloc[50:].copy()
+    shifted.loc[shifted.index[-1], "close"] += 10
+    feed.sync(shifted)
+
+    expected = RSI(window=14)
+    for value in df["close"].iloc[:-1]:
+        expected.update(value)
+    expected.update(shifted["close"].iloc[-1])
+
+    assert incremental.value == pytest.approx(expected.value)
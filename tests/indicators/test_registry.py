@@ -0,0 +1,101 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from ta.momentum import rsi
+
+from app.config.config import MainConfig
+from app.indicators.registry import IndicatorRegistry
+from app.signals.signal_engine import SignalEngine
+from app.strategies.example_macd_strategy import MACDStrategy
+from app.strategies.example_rsi_strategy import SimpleRsiStrategy
+
+
+@pytest.fixture
+def klines() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    close = 10000 + np.cumsum(rng.normal(0, 50, 300))
+    return pd.DataFrame({"open_time": np.arange(300) * 60_000, "close": close})
+
+
+def test_strategies_share_their_indicators(
+    trading_bot_config: MainConfig, klines: pd.DataFrame
+) -> None:
+    """
+    Test that strategies using the same indicator share one feed, and signal like unshared strategies.
+    """
+    shared = SignalEngine(
+        config=trading_bot_config,
+        strategies=[
+            MACDStrategy(),
+            MACDStrategy(),
+            SimpleRsiStrategy(),
+            SimpleRsiStrategy(overbought=60, oversold=40),
+            SimpleRsiStrategy(window=7),
+        ],
+    )
+    shared.initialize_strategies()
+    strategies = shared.strategies
+
+    assert strategies[0].feed is strategies[1].feed
+    assert strategies[2].feed is strategies[3].feed
+    assert strategies[2].feed is not strategies[4].feed
+    assert (len(shared.indicators), shared.indicators.hits) == (3, 2)
+    assert all(strategy.indicators is shared.indicators for strategy in strategies)
+
+    alone = []
+    for strategy in [
+        MACDStrategy(),
+        SimpleRsiStrategy(overbought=60, oversold=40),
+        SimpleRsiStrategy(window=7),
+    ]:
+        strategy.initialize(trading_bot_config)
+        # Strategies run on their own get a registry of their own on first use.
+        assert strategy.indicators is None
+        alone.append(strategy)
+
+    for index in range(1, len(klines)):
+        df = klines.iloc[: index + 1]
+        signals = shared.generate_signals(df)
+        expected = [signal for s in alone if (signal := s.analyze(df))]
+        assert {(s.name, s.action, s.price) for s in signals} == {
+            (s.name, s.action, s.price) for s in expected
+        }
+
+
+def test_series_are_memoized_by_data_version(klines: pd.DataFrame) -> None:
+    registry = IndicatorRegistry(max_entries=2)
+
+    first = registry.series("rsi", klines, "BTCUSDT", "1m", window=14)
+    assert registry.series("rsi", klines.copy(), "BTCUSDT", "1m", window=14) is first
+    np.testing.assert_allclose(first["rsi"], rsi(klines["close"], window=14))
+    with pytest.raises(ValueError):
+        first["rsi"][0] = 0
+
+    # A new kline, or a change of the still forming one, is a new version of the data.
+    updated = klines.copy()
+    updated.loc[updated.index[-1], "close"] += 1
+    assert registry.series("rsi", updated, "BTCUSDT", "1m", window=14) is not first
+    # So is a kline fetched again with another value.
+    refetched = klines.copy()
+    refetched.loc[refetched.index[0], "close"] += 1
+    assert registry.series("rsi", refetched, "BTCUSDT", "1m", window=14) is not first
+    assert registry.series("rsi", klines, "ETHUSDT", "1m", window=14) is not first
+
+    # The least recently used entry was evicted.
+    assert (len(registry), registry.hits, registry.misses) == (2, 1, 4)
+    assert registry.series("rsi", klines, "BTCUSDT", "1m", window=14) is not first
+
+
+def test_pickled_registries_start_empty(klines: pd.DataFrame) -> None:
+    registry = IndicatorRegistry(max_entries=8)
+    feed = registry.feed("ema", "BTCUSDT", "1m", window=12)
+    feed.sync(klines)
+
+    copied_registry, copied_feed = pickle.loads(pickle.dumps((registry, feed)))
+
+    assert (len(copied_registry), copied_registry.max_entries) == (0, 8)
+    assert copied_feed.indicators[0].value == feed.indicators[0].value
+    copied_feed.sync(klines)
+    assert copied_feed.indicators[0].value == feed.indicators[0].value
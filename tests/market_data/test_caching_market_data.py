@@ -0,0 +1,138 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from app.enums import INTERVALS
+from app.market_data.caching_market_data import CachingMarketData
+from app.utils.utils import datetime_to_timestamp
+from tests.mocked_data import MockStreamingMarketData
+
+HOUR = 3600000
+
+
+class CountingMarketData:
+    def __init__(self) -> None:
+        self.requests: list[tuple[datetime | None, datetime | None]] = []
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: INTERVALS,
+        limit: int,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+    ) -> pd.DataFrame:
+        self.requests.append((start_time, end_time))
+
+        start = -(-datetime_to_timestamp(start_time) // HOUR) * HOUR
+        end = datetime_to_timestamp(end_time)
+        open_time = list(range(start, end + 1, HOUR))[:limit]
+        return pd.DataFrame(
+            {
+                "open_time": open_time,
+                "close": [float(value // HOUR) for value in open_time],
+                "close_time": [value + HOUR - 1 for value in open_time],
+            }
+        )
+
+
+@pytest.fixture
+def market_data() -> CountingMarketData:
+    return CountingMarketData()
+
+
+def _get_klines(
+    caching_market_data: CachingMarketData, start_day: int, end_day: int
+) -> pd.DataFrame:
+    return caching_market_data.get_klines(
+        symbol="BTCUSDT",
+        interval="1h",
+        limit=1000,
+        start_time=datetime(2021, 1, start_day, tzinfo=timezone.utc),
+        end_time=datetime(2021, 1, end_day, tzinfo=timezone.utc),
+    )
+
+
+def test_repeated_request_is_served_from_memory(
+    market_data: CountingMarketData,
+) -> None:
+    caching_market_data = CachingMarketData(market_data)
+
+    first = _get_klines(caching_market_data, 1, 3)
+    second = _get_klines(caching_market_data, 1, 3)
+
+    assert len(market_data.requests) == 1
+    assert len(first) == 49
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_only_missing_range_is_fetched(market_data: CountingMarketData) -> None:
+    caching_market_data = CachingMarketData(market_data)
+
+    _get_klines(caching_market_data, 2, 3)
+    df = _get_klines(caching_market_data, 1, 4)
+
+    assert market_data.requests[1:] == [
+        (
+            datetime(2021, 1, 1, tzinfo=timezone.utc),
+            datetime(2021, 1, 1, 23, 59, 59, 999000, tzinfo=timezone.utc),
+        ),
+        (
+            datetime(2021, 1, 3, 0, 0, 0, 1000, tzinfo=timezone.utc),
+            datetime(2021, 1, 4, tzinfo=timezone.utc),
+        ),
+    ]
+    assert len(df) == 73
+    assert df["open_time"].is_monotonic_increasing
+    assert df["open_time"].is_unique
+
+
+def test_disk_cache_survives_restart(market_data: CountingMarketData, tmp_path) -> None:
+    _get_klines(CachingMarketData(market_data, cache_dir=tmp_path), 1, 3)
+    df = _get_klines(CachingMarketData(market_data, cache_dir=tmp_path), 1, 3)
+
+    assert len(market_data.requests) == 1
+    assert len(df) == 49
+
+
+def test_disk_cache_only_appends_new_closed_klines(
+    market_data: CountingMarketData, tmp_path
+) -> None:
+    caching_market_data = CachingMarketData(market_data, cache_dir=tmp_path)
+    _get_klines(caching_market_data, 1, 3)
+    (path,) = tmp_path.iterdir()
+    saved = path.read_bytes()
+
+    _get_klines(caching_market_data, 1, 4)
+    assert path.read_bytes().startswith(saved)
+    assert len(path.read_bytes()) > len(saved)
+
+    # Live polls within the forming kline fetch it again, without writing anything.
+    now = datetime_to_timestamp(datetime(2021, 1, 4, 0, 30, tzinfo=timezone.utc))
+    caching_market_data._now = lambda: now  # type: ignore[method-assign]
+    saved = path.read_bytes()
+    requests = len(market_data.requests)
+    for _ in range(3):
+        df = caching_market_data.get_klines(symbol="BTCUSDT", interval="1h", limit=2)
+        assert df["open_time"].iloc[-1] == now - 30 * 60_000
+    assert len(market_data.requests) == requests + 3
+    assert path.read_bytes() == saved
+
+    restarted = CachingMarketData(market_data, cache_dir=tmp_path)
+    requests = len(market_data.requests)
+    assert len(_get_klines(restarted, 1, 4)) == 73
+    assert len(market_data.requests) == requests
+
+
+def test_klines_are_streamed_by_the_wrapped_provider(
+    market_data: CountingMarketData,
+) -> None:
+    assert not hasattr(CachingMarketData(market_data), "stream_klines")
+
+    streaming_market_data = MockStreamingMarketData(history=100, length=103)
+    klines = list(
+        CachingMarketData(streaming_market_data).stream_klines("BTCUSDT", "15m")
+    )
+    assert len(klines) == 3
+    assert streaming_market_data.closed == 103
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.market_data.kline_ring_buffer import KlineRingBuffer
+
+MINUTE = 60000
+
+
+def klines(start: int, count: int) -> pd.DataFrame:
+    index = np.arange(start, start + count)
+    return pd.DataFrame(
+        {
+            "open_time": index * MINUTE,
+            "close": index.astype(float),
+            "ignore": ["0"] * count,
+        }
+    )
+
+
+def test_extend_keeps_the_last_capacity_klines() -> None:
+    buffer = KlineRingBuffer.from_frame(klines(0, 3), capacity=5)
+    for start in range(3, 12, 3):
+        buffer.extend(klines(start, 3))
+
+    assert len(buffer) == 5
+    assert buffer.view("close").tolist() == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert buffer.view("ignore").dtype == np.float64
+
+
+def test_extend_larger_than_capacity() -> None:
+    buffer = KlineRingBuffer.from_frame(klines(0, 2), capacity=4)
+    buffer.extend(klines(2, 10))
+
+    assert buffer.view("open_time").tolist() == [
+        8 * MINUTE,
+        9 * MINUTE,
+        10 * MINUTE,
+        11 * MINUTE,
+    ]
+
+
+def test_extend_overwrites_the_last_kline_and_ignores_older_ones() -> None:
+    buffer = KlineRingBuffer.from_frame(klines(0, 4), capacity=4)
+    update = klines(2, 3)
+    update.loc[1, "close"] = 99.0
+
+    buffer.extend(update)
+
+    assert buffer.view("close").tolist() == [1.0, 2.0, 99.0, 4.0]
+
+
+def test_append_and_overwrite_last() -> None:
+    buffer = KlineRingBuffer(capacity=3, dtypes={"open_time": np.int64})
+    with pytest.raises(IndexError):
+        buffer.overwrite_last({"open_time": 0})
+
+    for open_time in range(5):
+        buffer.append({"open_time": open_time})
+    buffer.overwrite_last({"open_time": 10})
+
+    assert buffer.view("open_time").tolist() == [2, 3, 10]
+
+
+def test_views_are_read_only_and_not_copied() -> None:
+    buffer = KlineRingBuffer.from_frame(klines(0, 3), capacity=3)
+    df = buffer.to_frame()
+
+    assert np.shares_memory(df["close"].to_numpy(), buffer.view("close"))
+    with pytest.raises(ValueError):
+        buffer.view("close")[0] = 1.0
+
+    # Frames taken before a write see the overwritten slots.
+    buffer.append({"open_time": 3 * MINUTE, "close": 3.0, "ignore": 0.0})
+    assert df["close"].tolist() == [3.0, 1.0, 2.0]
+    assert buffer.view("close").tolist() == [1.0, 2.0, 3.0]
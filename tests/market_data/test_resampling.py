@@ -0,0 +1,108 @@
+import pickle
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.indicators.registry import IndicatorRegistry
+from app.market_data.resampling import (
+    TimeframeAggregator,
+    bucket_open_times,
+    resample_klines,
+)
+from app.market_data.synthetic_market_data import SyntheticMarketData
+
+START = datetime(2021, 1, 1, 0, 10, tzinfo=timezone.utc)  # 10 minutes into an hour
+
+
+@pytest.fixture
+def klines() -> pd.DataFrame:
+    return SyntheticMarketData(seed=3).get_klines(
+        "BTCUSDT", "5m", 500, start_time=START
+    )
+
+
+def grouped_klines(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """The klines of the interval, with a pandas group by, without the first, partial one."""
+    size = pd.Timedelta(interval.replace("m", "min")).value // 1_000_000
+    grouped = df.groupby(df["open_time"] // size * size).agg(
+        open=("open", "first"),
+        high=("high", "max"),
+        low=("low", "min"),
+        close=("close", "last"),
+        volume=("volume", "sum"),
+    )
+    return grouped.iloc[1:].reset_index()
+
+
+def test_resample_klines_matches_a_group_by(klines: pd.DataFrame) -> None:
+    resampled = resample_klines(klines, "5m", "1h")
+    expected = grouped_klines(klines, "1h")
+
+    pd.testing.assert_frame_equal(resampled[expected.columns], expected)
+    assert (resampled["open_time"] % 3_600_000 == 0).all()
+    assert (resampled["close_time"] == resampled["open_time"] + 3_599_999).all()
+    assert (
+        resampled["number_of_trades"].sum()
+        == klines["number_of_trades"].iloc[10:].sum()
+    )
+
+
+def test_weeks_and_months_open_like_binance() -> None:
+    open_times = pd.to_datetime(["2024-02-29 13:00", "2024-03-03 23:00"], utc=True)
+    milliseconds = open_times.as_unit("ms").asi8
+
+    weeks = pd.to_datetime(bucket_open_times(milliseconds, "1w"), unit="ms", utc=True)
+    months = pd.to_datetime(bucket_open_times(milliseconds, "1M"), unit="ms", utc=True)
+
+    assert list(weeks.day_name()) == ["Monday", "Monday"]
+    assert list(weeks.strftime("%Y-%m-%d")) == ["2024-02-26", "2024-02-26"]
+    assert list(months.strftime("%Y-%m-%d")) == ["2024-02-01", "2024-03-01"]
+
+
+@pytest.mark.parametrize(
+    "base_interval, interval", [("1h", "15m"), ("3d", "1w"), ("1w", "1M")]
+)
+def test_intervals_must_be_built_from_whole_base_klines(
+    base_interval: str, interval: str
+) -> None:
+    with pytest.raises(ValueError):
+        TimeframeAggregator(base_interval, interval)  # type: ignore[arg-type]
+
+
+def test_aggregator_keeps_the_forming_kline_current(klines: pd.DataFrame) -> None:
+    """
+    Test that syncing growing klines, with a forming last kline, gives the same klines as resampling.
+    """
+    aggregator = TimeframeAggregator("5m", "15m", capacity=100)
+    for index in range(1, len(klines)):
+        window = klines.iloc[max(0, index - 200) : index + 1].copy()
+        # The last base kline is still forming, the next sync replaces it.
+        forming = window.copy()
+        forming.loc[forming.index[-1], ["high", "close"]] += 50
+        aggregator.sync(forming)
+        aggregator.sync(window)
+
+        expected = resample_klines(klines.iloc[: index + 1], "5m", "15m").tail(100)
+        pd.testing.assert_frame_equal(
+            aggregator.to_frame(), expected.reset_index(drop=True)
+        )
+
+    copied = pickle.loads(pickle.dumps(aggregator))
+    pd.testing.assert_frame_equal(copied.to_frame(), aggregator.to_frame())
+
+
+def test_strategies_get_higher_intervals_from_the_registry(
+    klines: pd.DataFrame,
+) -> None:
+    registry = IndicatorRegistry()
+
+    hourly = registry.klines(klines, "BTCUSDT", "5m", "1h")
+    assert registry.klines(klines, "BTCUSDT", "5m", "1h") is hourly
+    pd.testing.assert_frame_equal(hourly, resample_klines(klines, "5m", "1h"))
+
+    newer = klines.iloc[1:].copy()
+    newer.loc[newer.index[-1], "close"] = 1.0
+    assert registry.klines(newer, "BTCUSDT", "5m", "1h")["close"].iloc[-1] == 1.0
+    assert (len(registry), registry.hits) == (1, 2)
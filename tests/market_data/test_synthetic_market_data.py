@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.market_data.synthetic_market_data import (
+    SYNTHETIC_KLINE_COLUMNS,
+    SyntheticMarketData,
+)
+
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def test_get_klines_is_deterministic_across_chunks() -> None:
+    market_data = SyntheticMarketData(model="regime", chunk_size=1000)
+    df = market_data.get_klines("BTCUSDT", "1m", 2500, start_time=START)
+
+    again = SyntheticMarketData(model="regime", chunk_size=1000).get_klines(
+        "BTCUSDT",
+        "1m",
+        500,
+        start_time=START + timedelta(minutes=1000),
+    )
+    other_symbol = market_data.get_klines("ETHUSDT", "1m", 2500, start_time=START)
+
+    assert list(df.columns) == SYNTHETIC_KLINE_COLUMNS
+    assert len(df) == 2500
+    assert (np.diff(df["open_time"]) == 60000).all()
+    assert (df["close_time"] == df["open_time"] + 59999).all()
+    assert (df["open"].iloc[1:].to_numpy() == df["close"].iloc[:-1].to_numpy()).all()
+    pd.testing.assert_frame_equal(again, df.iloc[1000:1500].reset_index(drop=True))
+    assert not np.allclose(df["close"], other_symbol["close"])
+
+
+def test_klines_are_consistent() -> None:
+    df = SyntheticMarketData().get_klines("BTCUSDT", "15m", 10000, start_time=START)
+
+    assert (df["high"] >= df[["open", "close"]].max(axis=1)).all()
+    assert (df["low"] <= df[["open", "close"]].min(axis=1)).all()
+    assert (df["volume"] > 0).all()
+    assert (df["taker_buy_base_asset_volume"] <= df["volume"]).all()
+
+
+def test_gbm_volatility_matches_the_parameter() -> None:
+    df = SyntheticMarketData(volatility=0.5).get_klines(
+        "BTCUSDT", "1h", 100000, start_time=START
+    )
+
+    realized = np.diff(np.log(df["close"])).std() * np.sqrt(24 * 365)
+    assert abs(realized - 0.5) < 0.01
+
+
+def test_regime_model_switches_volatility() -> None:
+    df = SyntheticMarketData(
+        model="regime", regimes=[(0.0, 0.2), (0.0, 2.0)], mean_regime_bars=500
+    ).get_klines("BTCUSDT", "1h", 100000, start_time=START)
+
+    returns = pd.Series(np.diff(np.log(df["close"])))
+    rolling = returns.rolling(100).std().dropna() * np.sqrt(24 * 365)
+    assert rolling.min() < 0.4
+    assert rolling.max() > 1.5
+
+
+def test_iter_klines_yields_bounded_chunks() -> None:
+    market_data = SyntheticMarketData(chunk_size=1000)
+    chunks = list(market_data.iter_klines("BTCUSDT", "1m", 3500, start_time=START))
+
+    assert max(len(chunk) for chunk in chunks) == 1000
+    assert sum(len(chunk) for chunk in chunks) == 3500
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True),
+        market_data.get_klines("BTCUSDT", "1m", 3500, start_time=START),
+    )
+
+
+def test_polling_reuses_the_last_chunk(monkeypatch: pytest.MonkeyPatch) -> None:
+    market_data = SyntheticMarketData(chunk_size=1000)
+    generated = []
+    generate_chunk = market_data._generate_chunk
+
+    def record(symbol: str, interval: str, chunk: int, state: Any) -> Any:
+        generated.append((symbol, chunk))
+        return generate_chunk(symbol, interval, chunk, state)
+
+    monkeypatch.setattr(market_data, "_generate_chunk", record)
+    first = market_data.get_klines("BTCUSDT", "1m", 2, start_time=START)
+    generated.clear()
+    for minutes in range(1, 10):
+        market_data.get_klines(
+            "BTCUSDT", "1m", 2, start_time=START + timedelta(minutes=minutes)
+        )
+    market_data.get_klines("ETHUSDT", "1m", 2, start_time=START)
+
+    # Only the chunks of the other symbol were generated.
+    assert generated
+    assert {symbol for symbol, _ in generated} == {"ETHUSDT"}
+    pd.testing.assert_frame_equal(
+        market_data.get_klines("BTCUSDT", "1m", 2, start_time=START), first
+    )
+
+
+def test_get_klines_ranges() -> None:
+    market_data = SyntheticMarketData()
+    end = datetime(2020, 1, 2, tzinfo=timezone.utc)
+
+    in_range = market_data.get_klines(
+        "BTCUSDT", "1h", 5, start_time=START, end_time=end
+    )
+    until_end = market_data.get_klines("BTCUSDT", "1h", 5, end_time=end)
+
+    assert len(in_range) == 25
+    assert len(until_end) == 5
+    assert until_end["open_time"].iloc[-1] == in_range["open_time"].iloc[-1]
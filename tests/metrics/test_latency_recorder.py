@@ -0,0 +1,105 @@
+from decimal import Decimal
+
+from app.config.config import MainConfig
+from app.enums import EventLevel
+from app.metrics.latency_recorder import LatencyHistogram, LatencyRecorder
+from app.position_manager.position_manager import PositionManager
+from app.position_manager.trade_executor import TradeExecutor
+from app.signals.signal_engine import SignalEngine
+from app.signals.signal_processor import SignalProcessor
+from tests.conftest import MockStrategy
+from tests.mocked_data import MockMarketData
+
+
+class RecordingEventSink:
+    def __init__(self) -> None:
+        self.events: list[tuple[EventLevel, str, dict]] = []
+
+    def enabled(self, level: EventLevel) -> bool:
+        return True
+
+    def emit(self, level: EventLevel, event: str, fields: dict) -> None:
+        self.events.append((level, event, fields))
+
+    def close(self) -> None:
+        pass
+
+
+def test_histogram_percentiles_are_within_a_bucket() -> None:
+    histogram = LatencyHistogram()
+    for nanoseconds in range(1, 100_001):
+        histogram.record(nanoseconds)
+
+    assert histogram.count == 100_000
+    assert histogram.max == 100_000
+    assert 50_000 <= histogram.percentile(50) <= 50_000 * 1.07
+    assert 99_000 <= histogram.percentile(99) <= 100_000
+    assert histogram.percentile(100) == 100_000
+    assert LatencyHistogram().percentile(50) == 0
+
+
+def test_histogram_buckets_cover_every_duration() -> None:
+    for nanoseconds in [0, 1, 15, 16, 17, 31, 32, 1000, 10**9, 2**63 - 1]:
+        bucket = LatencyHistogram._bucket(nanoseconds)
+        assert nanoseconds <= LatencyHistogram._bucket_upper_bound(bucket)
+        if bucket:
+            assert nanoseconds > LatencyHistogram._bucket_upper_bound(bucket - 1)
+
+
+def test_disabled_recorder_records_nothing() -> None:
+    recorder = LatencyRecorder(enabled=False)
+    recorder.record("handle_signal", 1000)
+    with recorder.measure("get_df"):
+        pass
+
+    assert recorder.summary() == {}
+    sink = RecordingEventSink()
+    recorder.print_stats(sink)
+    assert sink.events == []
+
+
+def test_pipeline_stages_are_recorded(trading_bot_config: MainConfig) -> None:
+    recorder = LatencyRecorder()
+    sink = RecordingEventSink()
+    position_manager = PositionManager(
+        config=trading_bot_config,
+        trade_executor=TradeExecutor(
+            config=trading_bot_config,
+            crypto_exchange=None,
+            event_sink=sink,
+            latency_recorder=recorder,
+        ),
+        event_sink=sink,
+        latency_recorder=recorder,
+    )
+    signal_processor = SignalProcessor(
+        trading_bot_config,
+        SignalEngine(
+            config=trading_bot_config,
+            strategies=[MockStrategy()],
+            latency_recorder=recorder,
+        ),
+        MockMarketData(trading_bot_config),
+        position_manager,
+        event_sink=sink,
+        latency_recorder=recorder,
+    )
+
+    signal_processor.run()
+    position_manager.print_stats(close_price=Decimal("10000"))
+
+    summary = recorder.summary()
+    bars = len(signal_processor.df) - 1
+    assert summary["get_df"]["count"] == 1
+    assert summary["generate_signals"]["count"] == bars
+    assert summary["analyze[MockStrategy]"]["count"] == bars
+    assert summary["handle_signal"]["count"] > 0
+    assert (
+        summary["submit_order"]["count"] == position_manager.trade_executor.order_count
+    )
+    for stats in summary.values():
+        assert 0 <= stats["p50_us"] <= stats["p99_us"] <= stats["max_us"]
+
+    level, event, fields = sink.events[-1]
+    assert (level, event) == (EventLevel.SUMMARY, "latency_stats")
+    assert set(fields) == set(summary)
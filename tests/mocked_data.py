@@ -1,10 +1,13 @@
+from collections.abc import Iterator
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
 from app.config.config import MainConfig
 from app.enums import INTERVALS
 from app.interfaces import MarketDataProtocol
+from app.utils.utils import datetime_to_timestamp
 
 
 class MockMarketData(MarketDataProtocol):
@@ -43,3 +46,86 @@ class MockMarketData(MarketDataProtocol):
         }
 
         return pd.DataFrame(data).sort_values(by="open_time", ascending=True)
+
+
+class MockRandomWalkMarketData(MarketDataProtocol):
+    def __init__(self, length: int = 500, seed: int = 42) -> None:
+        self.length = length
+        self.seed = seed
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: INTERVALS,
+        limit: int,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+    ) -> pd.DataFrame:
+        """
+        Get a deterministic random walk of klines, ignoring the requested range.
+        """
+        rng = np.random.default_rng([self.seed, *symbol.encode()])
+        close = 10000 + np.cumsum(rng.normal(0, 50, self.length))
+        open_time = 1609459200000 + np.arange(self.length) * 900000
+
+        return pd.DataFrame(
+            {
+                "open_time": open_time,
+                "open": np.concatenate(([close[0]], close[:-1])),
+                "high": close + 25,
+                "low": close - 25,
+                "close": close,
+                "volume": rng.uniform(1, 100, self.length),
+                "close_time": open_time + 899999,
+            }
+        )
+
+
+class MockStreamingMarketData(MockRandomWalkMarketData):
+    def __init__(
+        self,
+        history: int = 100,
+        length: int = 120,
+        lose_stream_at: int | None = None,
+        seed: int = 42,
+        forming: bool = False,
+    ) -> None:
+        """
+        Serves the first `history` klines of a random walk, then streams the others as they close.
+        When `lose_stream_at` is given, the stream is lost once while that kline closes.
+        When `forming` is set, `get_klines` also returns the kline that is still forming.
+        """
+        super().__init__(length=length, seed=seed)
+        self.closed = history
+        self.lose_stream_at = lose_stream_at
+        self.forming = forming
+        self.requests: list[dict] = []
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: INTERVALS,
+        limit: int,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+    ) -> pd.DataFrame:
+        self.requests.append({"limit": limit, "start_time": start_time})
+        df = super().get_klines(symbol, interval, limit).iloc[: self.closed + 1]
+        if self.forming:
+            # The next kline has just opened, its close is still the open price.
+            df.loc[df.index[-1], "close"] = df["open"].iloc[-1]
+        else:
+            df = df.iloc[:-1]
+        if start_time:
+            df = df[df["open_time"] >= datetime_to_timestamp(start_time)].head(limit)
+        return df.tail(limit).reset_index(drop=True)
+
+    def stream_klines(self, symbol: str, interval: INTERVALS) -> Iterator[pd.DataFrame]:
+        df = super().get_klines(symbol, interval, self.length)
+        while self.closed < self.length:
+            self.closed += 1
+            if self.closed == self.lose_stream_at:
+                self.lose_stream_at = None
+                raise ConnectionError("Kline stream lost")
+
+            yield df.iloc[[self.closed - 1]]
@@ -0,0 +1,246 @@
+from decimal import Decimal
+
+import pytest
+
+from app.bot.trading_bot_builder import trading_bot_builder
+from app.config.config import MainConfig
+from app.enums import OrderSide
+from app.position_manager.fixed_point import FixedPoint, FixedPointAccounting
+from app.position_manager.fixed_point_position_manager import FixedPointPositionManager
+from app.position_manager.position_manager import PositionManager
+from app.position_manager.trade_executor import OrderRejectedError, TradeExecutor
+from app.schemas import CreateOrderSchema, OrderSchema, Signal
+from app.simulated_exchange.exchange import SimulatedExchange
+from tests.mocked_data import MockMarketData
+
+
+def fixed_point_config(config: MainConfig) -> MainConfig:
+    return config.copy(
+        update={
+            "trading_config": config.trading_config.copy(update={"fixed_point": True})
+        }
+    )
+
+
+def build(config: MainConfig, position_manager_class: type) -> PositionManager:
+    return position_manager_class(
+        config=config,
+        trade_executor=TradeExecutor(config=config, crypto_exchange=None),
+    )
+
+
+def signal(action: OrderSide, price: str, symbol: str = "BTCUSDT") -> Signal:
+    return Signal(
+        name="signal",
+        reason="reason",
+        symbol=symbol,
+        action=action,
+        price=Decimal(price),
+        stop_price=Decimal(price) * Decimal("0.95"),
+    )
+
+
+def test_fixed_point_conversions() -> None:
+    fixed_point = FixedPoint(Decimal("0.01"), Decimal("0.001"), Decimal("0.00001"))
+    assert fixed_point.to_ticks(Decimal("100.125")) == 10012
+    assert fixed_point.to_ticks(Decimal("100.135")) == 10014
+    assert fixed_point.to_steps(Decimal("0.0019")) == 1
+    assert fixed_point.price(10012) == Decimal("100.12")
+    assert fixed_point.cost(10012, 3) == 10012 * 3
+
+    with pytest.raises(ValueError):
+        FixedPoint(Decimal("0.01"), Decimal("0.001"), Decimal("0.001"))
+
+    accounting = FixedPointAccounting(
+        ["BTCUSDT", "SHIBUSDT"],
+        tick_sizes={"SHIBUSDT": Decimal("0.00000001")},
+        step_sizes={"SHIBUSDT": Decimal("1")},
+    )
+    assert accounting.money_size == Decimal("0.0000000001")
+    assert accounting["SHIBUSDT"].cost_factor == 100
+    assert accounting.to_decimal(accounting.to_money(Decimal("12.345"))) == Decimal(
+        "12.345"
+    )
+
+
+def test_identical_trades_match_the_decimal_accounting(
+    trading_bot_config: MainConfig,
+) -> None:
+    decimal_manager = build(trading_bot_config, PositionManager)
+    fixed_point_manager = build(
+        fixed_point_config(trading_bot_config), FixedPointPositionManager
+    )
+
+    # Every notional buys a whole number of steps, so both accountings are exact.
+    trades = [
+        signal(OrderSide.BUY, "10000"),
+        signal(OrderSide.BUY, "12500", symbol="ETHUSDT"),
+        signal(OrderSide.BUY, "8000"),
+        signal(OrderSide.SELL, "11000"),
+        signal(OrderSide.SELL, "9999.99", symbol="ETHUSDT"),
+        signal(OrderSide.BUY, "20000"),
+    ]
+    for trade in trades:
+        decimal_manager.handle_signal(trade)
+        fixed_point_manager.handle_signal(trade)
+
+    assert fixed_point_manager.balance == decimal_manager.balance
+    assert fixed_point_manager.portfolio == dict(decimal_manager.portfolio)
+    assert fixed_point_manager.open_positions == decimal_manager.open_positions
+    assert [
+        (
+            position.symbol,
+            position.entry_price,
+            position.quantity,
+            position.stop_loss_price,
+        )
+        for position in fixed_point_manager.positions.values()
+    ] == [
+        (
+            position.symbol,
+            position.entry_price,
+            position.quantity,
+            position.stop_loss_price,
+        )
+        for position in decimal_manager.positions.values()
+    ]
+    assert (
+        fixed_point_manager.trade_executor.order_count
+        == decimal_manager.trade_executor.order_count
+    )
+
+
+def test_quantities_are_rounded_down_without_drift(
+    trading_bot_config: MainConfig,
+) -> None:
+    position_manager = build(
+        fixed_point_config(trading_bot_config), FixedPointPositionManager
+    )
+
+    for _ in range(1000):
+        position_manager.handle_signal(signal(OrderSide.BUY, "3"))
+        assert position_manager.portfolio["BTCUSDT"] == Decimal("33.33333333")
+        assert position_manager.balance == Decimal("10000") - Decimal("99.99999999")
+        position_manager.handle_signal(signal(OrderSide.SELL, "3"))
+
+    assert position_manager.balance == Decimal("10000")
+    assert position_manager.portfolio["BTCUSDT"] == 0
+    assert position_manager.trade_executor.order_count == 2000
+
+
+@pytest.mark.parametrize(
+    "position_manager_class", [PositionManager, FixedPointPositionManager]
+)
+def test_partial_fills_and_fees_are_booked(
+    trading_bot_config: MainConfig, position_manager_class: type
+) -> None:
+    config = fixed_point_config(trading_bot_config)
+    # Every tick can fill half of its quantity.
+    exchange = SimulatedExchange(taker_fee=Decimal("0.001"), participation=0.5)
+    position_manager = position_manager_class(
+        config=config,
+        trade_executor=TradeExecutor(config=config, crypto_exchange=exchange),
+    )
+
+    exchange.on_tick("BTCUSDT", 10000.0, quantity=0.01)
+    position_manager.handle_signal(signal(OrderSide.BUY, "10000"))
+    assert position_manager.portfolio["BTCUSDT"] == Decimal("0.005")
+    assert position_manager.balance == Decimal("10000") - Decimal("50.05")
+
+    exchange.on_tick("BTCUSDT", 11000.0, quantity=0.004)
+    position_manager.handle_signal(signal(OrderSide.SELL, "11000"))
+    assert position_manager.balance == Decimal("9949.95") + Decimal("21.978")
+    assert position_manager.portfolio["BTCUSDT"] == Decimal("0.003")
+    # The rest of the position stays open, and is stopped out like before.
+    (position,) = position_manager.positions.values()
+    assert position.quantity == Decimal("0.003")
+    assert position_manager.trigger_bounds("BTCUSDT") == (9500.0, float("inf"))
+    assert [order["status"] for order in exchange.get_all_orders()] == [
+        "CANCELED",
+        "CANCELED",
+    ]
+
+
+class SlippingExchange(SimulatedExchange):
+    # Every fill is split over prices that average between two ticks.
+    slippage = Decimal("0.00333")
+
+    def create_order(self, payload: CreateOrderSchema) -> OrderSchema:
+        order = super().create_order(payload)
+        quote_qty = order.quote_qty + self.slippage
+        return order.copy(
+            update={"price": quote_qty / order.executed_qty, "quote_qty": quote_qty}
+        )
+
+
+@pytest.mark.parametrize(
+    "position_manager_class", [PositionManager, FixedPointPositionManager]
+)
+def test_the_quote_amount_of_live_fills_is_booked(
+    trading_bot_config: MainConfig, position_manager_class: type
+) -> None:
+    config = fixed_point_config(trading_bot_config)
+    exchange = SlippingExchange(taker_fee=Decimal(0))
+    position_manager = position_manager_class(
+        config=config,
+        trade_executor=TradeExecutor(config=config, crypto_exchange=exchange),
+    )
+
+    exchange.on_tick("BTCUSDT", 10000.0)
+    position_manager.handle_signal(signal(OrderSide.BUY, "10000"))
+    assert position_manager.balance == Decimal("10000") - Decimal("100.00333")
+
+    exchange.on_tick("BTCUSDT", 11000.0)
+    position_manager.handle_signal(signal(OrderSide.SELL, "11000"))
+    assert position_manager.balance == Decimal("9899.99667") + Decimal("110.00333")
+
+
+class RejectingExchange(SimulatedExchange):
+    # OrderRejectedError comes from an app module: the app imports schemas without the "app." prefix.
+    rejects = False
+
+    def create_order(self, payload: CreateOrderSchema) -> OrderSchema:
+        if self.rejects:
+            raise OrderRejectedError("Account has insufficient balance")
+        return super().create_order(payload)
+
+
+@pytest.mark.parametrize(
+    "position_manager_class", [PositionManager, FixedPointPositionManager]
+)
+def test_rejected_orders_are_skipped(
+    trading_bot_config: MainConfig,
+    position_manager_class: type,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    config = fixed_point_config(trading_bot_config)
+    exchange = RejectingExchange()
+    position_manager = position_manager_class(
+        config=config,
+        trade_executor=TradeExecutor(config=config, crypto_exchange=exchange),
+    )
+    exchange.on_tick("BTCUSDT", 10000.0)
+    position_manager.handle_signal(signal(OrderSide.BUY, "10000"))
+    balance, portfolio = position_manager.balance, dict(position_manager.portfolio)
+    positions = dict(position_manager.positions)
+
+    exchange.rejects = True
+    position_manager.handle_signal(signal(OrderSide.SELL, "10000"))
+    position_manager.handle_signal(signal(OrderSide.BUY, "10000"))
+
+    assert position_manager.balance == balance
+    assert dict(position_manager.portfolio) == portfolio
+    assert dict(position_manager.positions) == positions
+    assert position_manager.trade_executor.order_count == 1
+    assert capsys.readouterr().out.count("order_rejected") == 2
+
+
+def test_builder_uses_the_fixed_point_accounting(
+    trading_bot_config: MainConfig,
+) -> None:
+    config = fixed_point_config(trading_bot_config)
+    trading_bot = trading_bot_builder(
+        config=config, strategies=[], market_data_provider=MockMarketData(config)
+    )
+    # The builder imports the app modules without the "app." prefix.
+    assert type(trading_bot.position_manager).__name__ == "FixedPointPositionManager"
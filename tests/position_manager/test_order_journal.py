@@ -0,0 +1,115 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.enums import OrderSide, OrderType, TimeInForce
+from app.position_manager.order_journal import OrderJournal
+from app.schemas import OrderSchema
+
+
+def order(index: int, status: str = "FILLED", symbol: str = "BTCUSDT") -> OrderSchema:
+    return OrderSchema(
+        order_id=f"order-{index}",
+        client_order_id=f"client-{index}" if index % 2 else None,
+        symbol=symbol,
+        status=status,
+        executed_qty=Decimal("100") / Decimal(10000 + index),
+        side=OrderSide.BUY if index % 2 else OrderSide.SELL,
+        type=OrderType.MARKET,
+        time_in_force=TimeInForce.GTC,
+        price=Decimal(10000 + index),
+        stop_price=None,
+    )
+
+
+def test_in_memory_journal_keeps_only_recent_orders() -> None:
+    journal = OrderJournal(recent=3)
+    orders = [order(index) for index in range(10)]
+    for executed in orders:
+        journal.append(executed)
+
+    assert len(journal) == 10
+    assert journal.summary.count == 10
+    assert journal.summary.by_side == {OrderSide.BUY: 5, OrderSide.SELL: 5}
+    assert journal.get("order-9") == orders[9]
+    assert journal.get("order-6") is None
+
+    assert list(journal.replay(chunk_size=4)) == orders
+    assert journal.records()["price"].tolist()[:2] == [b"10000", b"10001"]
+
+
+def test_in_memory_journal_is_capped() -> None:
+    journal = OrderJournal(recent=2, max_records=4)
+    for index in range(10):
+        journal.append(order(index))
+
+    # The oldest half is dropped when the buffer is full, the summary counts every order.
+    assert len(journal) == journal.summary.count == 10
+    assert journal.records()["order_id"].tolist() == [
+        f"order-{index}".encode() for index in range(6, 10)
+    ]
+    assert [executed.order_id for executed in journal.replay()] == [
+        f"order-{index}" for index in range(6, 10)
+    ]
+    assert journal.get("order-9") == order(9)
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [
+        ("order_id", "order-" + "1" * 40),
+        ("client_order_id", "client-" + "1" * 40),
+        ("symbol", "VERYLONGSYMBOLUSDT"),
+        ("price", Decimal("1." + "0" * 40)),
+    ],
+)
+def test_fields_too_long_for_a_record_are_rejected(field: str, value: object) -> None:
+    journal = OrderJournal()
+    too_long = order(1).copy(update={field: value})
+
+    with pytest.raises(ValueError, match=field):
+        journal.append(too_long)
+    assert len(journal) == 0
+    assert journal.records().size == 0
+
+
+def test_journal_file_is_reopened_where_it_ended(tmp_path) -> None:
+    path = str(tmp_path / "orders.journal")
+    journal = OrderJournal(path, recent=2)
+    for index in range(5):
+        journal.append(order(index, symbol="ETHUSDT" if index == 4 else "BTCUSDT"))
+    journal.append(order(5, status="NEW"))
+    journal.append(order(6, status="NEW"))
+    journal.append(order(6))
+    journal.close()
+
+    # a crash in the middle of a write leaves a partial record
+    with open(path, "ab") as file:
+        file.write(b"partial")
+
+    journal = OrderJournal(path, recent=1)
+    assert len(journal) == 8
+    assert journal.summary.by_symbol == {"BTCUSDT": 7, "ETHUSDT": 1}
+    assert [open_order.order_id for open_order in journal.open_orders] == ["order-5"]
+    assert journal.get("order-6").status == "FILLED"
+    assert journal.get("order-4") is None
+
+    journal.append(order(5))
+    assert journal.open_orders == []
+    records = journal.records()
+    assert isinstance(records, np.memmap)
+    assert records["order_id"][-1] == b"order-5"
+    assert [executed.executed_qty for executed in journal.replay()][:2] == [
+        Decimal("100") / Decimal(10000),
+        Decimal("100") / Decimal(10001),
+    ]
+    journal.close()
+
+
+def test_journal_rejects_other_files(tmp_path) -> None:
+    path = tmp_path / "orders.journal"
+    path.write_bytes(b"not an order journal")
+
+    with pytest.raises(ValueError):
+        OrderJournal(str(path))
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.position_manager.position_book import Position, PositionBook
+
+
+def open_position(
+    book: PositionBook, position_id: str, symbol: str = "BTCUSDT", price: str = "100"
+) -> int:
+    return book.open(
+        position_id,
+        symbol=symbol,
+        entry_price=Decimal(price),
+        quantity=Decimal("0.5"),
+        order_id=f"order-{position_id}",
+        stop_loss_price=Decimal("90"),
+    )
+
+
+def test_positions_are_read_back_exactly() -> None:
+    book = PositionBook()
+    open_position(book, "1", price="100.123456789")
+
+    position = book["1"]
+    assert isinstance(position, Position)
+    assert position.entry_price == Decimal("100.123456789")
+    assert position.stop_loss_price == Decimal("90")
+    assert position.take_profit_price is None
+    assert dict(book) == {"1": position}
+    assert np.isnan(book.take_profit_prices[book.slot("1")])
+
+    with pytest.raises(KeyError):
+        open_position(book, "1")
+
+
+def test_closed_slots_are_reused_and_the_book_grows() -> None:
+    book = PositionBook(capacity=2)
+    first = open_position(book, "1")
+    open_position(book, "2")
+    open_position(book, "3")
+    assert book.capacity == 4
+
+    book.close("1")
+    assert open_position(book, "4") == first
+    assert list(book) == ["2", "3", "4"]
+    assert "1" not in book
+    assert len(book) == 3
+
+
+def test_oldest_position_per_symbol() -> None:
+    book = PositionBook()
+    open_position(book, "1", symbol="ETHUSDT")
+    open_position(book, "2")
+    open_position(book, "3")
+    open_position(book, "4")
+
+    assert book.oldest("BTCUSDT") == "2"
+    book.close("3")  # closed out of order
+    book.close("2")
+    assert book.oldest("BTCUSDT") == "4"
+    assert book.oldest("ETHUSDT") == "1"
+    assert book.oldest("BNBUSDT") is None
+
+    closed = book.close("4")
+    assert closed.symbol == "BTCUSDT"
+    assert book.oldest("BTCUSDT") is None
+
+
+def test_mark_to_market() -> None:
+    book = PositionBook()
+    assert book.market_value({"BTCUSDT": 1.0}) == 0.0
+
+    open_position(book, "1")
+    open_position(book, "2", symbol="ETHUSDT")
+    open_position(book, "3")
+    book.close("3")
+
+    assert book.market_value({"BTCUSDT": 200.0, "ETHUSDT": 10.0}) == 105.0
+    assert book.market_value({"BTCUSDT": 200.0}, default=20.0) == 110.0
+    assert np.isnan(book.market_value({"BTCUSDT": 200.0}))
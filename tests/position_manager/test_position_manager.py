@@ -198,3 +198,37 @@ def test_max_open_positions(position_manager: PositionManager) -> None:
     position_manager.handle_signal(signal)
 
     assert position_manager.open_positions == initial_open_positions
+
+
+def test_sell_signal_closes_position_of_same_symbol(
+    position_manager: PositionManager,
+) -> None:
+    """
+    Test that a sell signal only closes a position of its own symbol, so several symbols
+    can share one position manager.
+    """
+    for symbol in ("ETHUSDT", "BTCUSDT"):
+        position_manager.handle_signal(
+            Signal(
+                name="signal",
+                reason="reason",
+                symbol=symbol,
+                action=OrderSide.BUY,
+                price=Decimal("1000.00"),
+            )
+        )
+
+    position_manager.handle_signal(
+        Signal(
+            name="signal",
+            reason="reason",
+            symbol="BTCUSDT",
+            action=OrderSide.SELL,
+            price=Decimal("1100.00"),
+        )
+    )
+
+    assert position_manager.open_positions == 1
+    assert [position.symbol for position in position_manager.positions.values()] == [
+        "ETHUSDT"
+    ]
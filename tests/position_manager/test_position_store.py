@@ -0,0 +1,182 @@
+import os
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from app.config.config import MainConfig
+from app.enums import OrderSide
+from app.position_manager.fixed_point_position_manager import FixedPointPositionManager
+from app.position_manager.position_manager import PositionManager
+from app.position_manager.position_store import LOG_FILE, PositionStore
+from app.position_manager.trade_executor import TradeExecutor
+from app.schemas import Signal
+
+
+def build(
+    config: MainConfig,
+    store: PositionStore,
+    position_manager_class: type = PositionManager,
+) -> PositionManager:
+    return position_manager_class(
+        config=config,
+        trade_executor=TradeExecutor(config=config, crypto_exchange=None),
+        position_store=store,
+    )
+
+
+def signal(action: OrderSide, price: str) -> Signal:
+    return Signal(
+        name="signal",
+        reason="reason",
+        symbol="BTCUSDT",
+        action=action,
+        price=Decimal(price),
+        stop_price=Decimal(price) * Decimal("0.95"),
+    )
+
+
+def trade(position_manager: PositionManager) -> None:
+    for action, price in [
+        (OrderSide.BUY, "100"),
+        (OrderSide.BUY, "110"),
+        (OrderSide.BUY, "120"),
+        (OrderSide.SELL, "130"),
+    ]:
+        position_manager.handle_signal(signal(action, price))
+
+
+def test_restart_restores_positions_from_the_log(
+    trading_bot_config: MainConfig, tmp_path: Path
+) -> None:
+    position_manager = build(trading_bot_config, PositionStore(str(tmp_path)))
+    trade(position_manager)
+    # The first process stops without closing the store, like a crash.
+
+    restored = build(trading_bot_config, PositionStore(str(tmp_path)))
+    assert restored.balance == position_manager.balance
+    assert dict(restored.portfolio) == dict(position_manager.portfolio)
+    assert dict(restored.positions) == dict(position_manager.positions)
+    assert restored.open_positions == 2
+    assert restored.trigger_bounds("BTCUSDT") == position_manager.trigger_bounds(
+        "BTCUSDT"
+    )
+
+    # The position ids continue, and the oldest position is still sold first.
+    restored.handle_signal(signal(OrderSide.BUY, "90"))
+    assert list(restored.positions) == ["2", "3", "4"]
+    restored.handle_signal(signal(OrderSide.SELL, "100"))
+    assert list(restored.positions) == ["3", "4"]
+
+
+def test_snapshots_truncate_the_log(
+    trading_bot_config: MainConfig, tmp_path: Path
+) -> None:
+    # Every trade logs its order, then its fill.
+    store = PositionStore(str(tmp_path), snapshot_interval=6)
+    position_manager = build(trading_bot_config, store)
+    trade(position_manager)
+    assert os.path.exists(store.snapshot_path)
+    assert len(Path(store.log_path).read_bytes().splitlines()) == 2
+
+    # A partially written record at the end of the log is dropped.
+    with open(tmp_path / LOG_FILE, "ab") as log:
+        log.write(b'{"op":"open","position_id":"9"')
+
+    restored = build(trading_bot_config, PositionStore(str(tmp_path)))
+    assert restored.balance == position_manager.balance
+    assert dict(restored.positions) == dict(position_manager.positions)
+
+    restored.store.close()
+    assert Path(store.log_path).read_bytes() == b""
+    assert build(trading_bot_config, PositionStore(str(tmp_path))).open_positions == 2
+
+
+def test_a_failed_write_leaves_the_state_unchanged(
+    trading_bot_config: MainConfig, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = PositionStore(str(tmp_path))
+    position_manager = build(trading_bot_config, store)
+    trade(position_manager)
+    assert store.state is not None
+    state = store.state.to_dict()
+
+    def fail(data: bytes) -> int:
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(store._log, "write", fail)
+    with pytest.raises(OSError):
+        store.log_close("2", "BTCUSDT", balance=Decimal(0), holding=Decimal(0))
+    assert store.state.to_dict() == state
+
+
+@pytest.mark.parametrize(
+    "position_manager_class", [PositionManager, FixedPointPositionManager]
+)
+def test_fills_are_logged_before_the_positions_change(
+    trading_bot_config: MainConfig,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    position_manager_class: type,
+) -> None:
+    store = PositionStore(str(tmp_path))
+    position_manager = build(trading_bot_config, store, position_manager_class)
+    trade(position_manager)
+    balance, portfolio = position_manager.balance, dict(position_manager.portfolio)
+    positions = dict(position_manager.positions)
+
+    # The orders are logged, then the disk fills up before their fills are.
+    write = store._log.write
+
+    def write_orders_only(data: bytes) -> int:
+        if b'"op":"order"' in data:
+            return write(data)
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(store._log, "write", write_orders_only)
+    for action in [OrderSide.BUY, OrderSide.SELL]:
+        with pytest.raises(OSError):
+            position_manager.handle_signal(signal(action, "100"))
+
+        assert position_manager.balance == balance
+        assert dict(position_manager.portfolio) == portfolio
+        assert dict(position_manager.positions) == positions
+    monkeypatch.undo()
+
+    # The orders that may have been filled are reported after a restart.
+    capsys.readouterr()
+    restored = build(
+        trading_bot_config, PositionStore(str(tmp_path)), position_manager_class
+    )
+    assert dict(restored.positions) == positions
+    assert "unconfirmed_orders" in capsys.readouterr().out
+    assert restored.store.state is not None
+    assert [
+        order["side"] for order in restored.store.state.pending_orders.values()
+    ] == [
+        "BUY",
+        "SELL",
+    ]
+
+
+def test_fixed_point_restart(trading_bot_config: MainConfig, tmp_path: Path) -> None:
+    config = trading_bot_config.copy(
+        update={
+            "trading_config": trading_bot_config.trading_config.copy(
+                update={"fixed_point": True}
+            )
+        }
+    )
+    position_manager = build(
+        config, PositionStore(str(tmp_path)), FixedPointPositionManager
+    )
+    trade(position_manager)
+
+    restored = build(config, PositionStore(str(tmp_path)), FixedPointPositionManager)
+    assert restored.balance == position_manager.balance
+    assert restored.portfolio == position_manager.portfolio
+    assert dict(restored.positions) == dict(position_manager.positions)
+    assert restored.positions.exact_quantity("2") == (
+        position_manager.positions.exact_quantity("2")
+    )
@@ -0,0 +1,127 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from app.config.config import MainConfig
+from app.enums import OrderSide, OrderType
+from app.market_data.static_market_data import StaticMarketData
+from app.position_manager.position_manager import PositionManager
+from app.position_manager.trade_executor import TradeExecutor
+from app.position_manager.trigger_engine import TriggerEngine
+from app.schemas import Signal
+from app.signals.signal_engine import SignalEngine
+from app.signals.signal_processor import SignalProcessor
+
+
+def test_triggered_levels_in_price_order() -> None:
+    engine = TriggerEngine()
+    engine.add("1", "BTCUSDT", stop_loss_price=90.0, take_profit_price=120.0)
+    engine.add("2", "BTCUSDT", stop_loss_price=95.0, take_profit_price=np.nan)
+    engine.add("3", "BTCUSDT", stop_loss_price=np.nan, take_profit_price=110.0)
+    engine.add("4", "ETHUSDT", stop_loss_price=99.0, take_profit_price=101.0)
+    engine.add("5", "BTCUSDT", stop_loss_price=np.nan, take_profit_price=np.nan)
+
+    assert len(engine) == 4
+    assert engine.bounds("BTCUSDT") == (95.0, 110.0)
+    assert engine.triggered("BTCUSDT", high=105.0, low=96.0) == []
+
+    assert engine.triggered("BTCUSDT", high=115.0, low=89.0) == [
+        ("2", OrderType.STOP_LOSS),
+        ("1", OrderType.STOP_LOSS),
+        ("3", OrderType.TAKE_PROFIT),
+    ]
+    assert engine.bounds("BTCUSDT") == (-np.inf, np.inf)
+    assert engine.bounds("ETHUSDT") == (99.0, 101.0)
+
+
+def test_removed_positions_are_skipped_and_compacted() -> None:
+    engine = TriggerEngine()
+    for index in range(1000):
+        engine.add(str(index), "BTCUSDT", float(index), float(2000 + index))
+    for index in range(999):
+        engine.remove(str(index))
+
+    assert len(engine) == 1
+    assert engine._entries["BTCUSDT"] < 100
+    assert engine.bounds("BTCUSDT") == (999.0, 2999.0)
+    assert engine.triggered("BTCUSDT", high=3000.0, low=0.0) == [
+        ("999", OrderType.STOP_LOSS)
+    ]
+
+
+def test_positions_indexed_again_only_match_their_new_levels() -> None:
+    engine = TriggerEngine()
+    engine.add("1", "BTCUSDT", stop_loss_price=90.0, take_profit_price=120.0)
+    engine.remove("1")
+    engine.add("1", "BTCUSDT", stop_loss_price=80.0, take_profit_price=150.0)
+    engine.add("1", "BTCUSDT", stop_loss_price=70.0, take_profit_price=160.0)
+
+    assert len(engine) == 1
+    assert engine.bounds("BTCUSDT") == (70.0, 160.0)
+    assert engine.triggered("BTCUSDT", high=155.0, low=75.0) == []
+    assert engine.triggered("BTCUSDT", high=165.0, low=75.0) == [
+        ("1", OrderType.TAKE_PROFIT)
+    ]
+    assert len(engine) == 0
+
+
+class StopStrategy:
+    """Buys on the second bar, with a stop at 95 and a target at 130."""
+
+    def initialize(self, config: MainConfig) -> None:
+        pass
+
+    def analyze(self, df: pd.DataFrame) -> Signal | None:
+        if len(df) != 2:
+            return None
+        return Signal(
+            name="stop_strategy",
+            reason="second_bar",
+            symbol="BTCUSDT",
+            action=OrderSide.BUY,
+            price=Decimal("100"),
+            stop_price=Decimal("95"),
+            take_profit_price=Decimal("130"),
+        )
+
+
+def test_backtest_closes_positions_at_their_stop(
+    trading_bot_config: MainConfig,
+) -> None:
+    lows = [100.0, 99.0, 97.0, 94.0, 80.0]
+    df = pd.DataFrame(
+        {
+            "open_time": np.arange(5) * 900000,
+            "open": 100.0,
+            "high": 101.0,
+            "low": lows,
+            "close": 100.0,
+            "volume": 1.0,
+            "close_time": np.arange(5) * 900000 + 899999,
+        }
+    )
+    position_manager = PositionManager(
+        config=trading_bot_config,
+        trade_executor=TradeExecutor(config=trading_bot_config, crypto_exchange=None),
+    )
+    processor = SignalProcessor(
+        trading_bot_config,
+        SignalEngine(config=trading_bot_config, strategies=[StopStrategy()]),
+        StaticMarketData(df),
+        position_manager,
+    )
+
+    processor.run()
+
+    assert position_manager.open_positions == 0
+    assert not position_manager.triggers
+    sell_orders = [
+        order
+        for order in position_manager.trade_executor.journal.replay()
+        if order.side == OrderSide.SELL
+    ]
+    assert [order.price for order in sell_orders] == [Decimal("95")]
+    # stopped out on the fourth bar, 5% of the notional lost
+    assert processor.balance_history[-1][0] == 3
+    assert position_manager.balance == Decimal("9995")
@@ -0,0 +1,72 @@
+import pytest
+
+from app.__main__ import trades_several_symbols
+from app.bot.trading_bot_builder import multi_symbol_trading_bot_builder
+from app.config.config import MainConfig
+from app.strategies.example_macd_strategy import MACDStrategy
+from app.strategies.example_rsi_strategy import SimpleRsiStrategy
+from tests.conftest import MockStrategy
+from tests.mocked_data import MockRandomWalkMarketData
+
+
+def test_multi_symbol_backtest_shares_position_manager(
+    trading_bot_config: MainConfig,
+) -> None:
+    """
+    Test that every symbol trades through the same position manager, which enforces
+    the maximum amount of open positions across all symbols.
+    """
+    config = trading_bot_config.copy(update={"symbols": ["BTCUSDT", "ETHUSDT"]})
+    trading_bot = multi_symbol_trading_bot_builder(
+        config=config,
+        strategies=[MACDStrategy(), SimpleRsiStrategy()],
+        market_data_provider=MockRandomWalkMarketData(),
+    )
+
+    trading_bot.run()
+
+    position_manager = trading_bot.position_manager
+    summary = position_manager.trade_executor.journal.summary
+    assert set(summary.by_symbol) == {"BTCUSDT", "ETHUSDT"}
+    assert (
+        position_manager.open_positions
+        <= config.trading_config.max_amount_open_positions
+    )
+    assert all(
+        processor.position_manager is position_manager
+        for processor in trading_bot.processors
+    )
+
+
+def test_multi_symbol_backtest_without_batch_support(
+    trading_bot_config: MainConfig,
+) -> None:
+    """
+    Test that strategies without `analyze_batch` are evaluated bar by bar for every symbol.
+    """
+    config = trading_bot_config.copy(update={"symbols": ["BTCUSDT", "ETHUSDT"]})
+    trading_bot = multi_symbol_trading_bot_builder(
+        config=config,
+        strategies=[MockStrategy()],
+        market_data_provider=MockRandomWalkMarketData(length=50),
+    )
+
+    trading_bot.run()
+
+    assert trading_bot.position_manager.open_positions == 3
+
+
+@pytest.mark.parametrize(
+    "symbols, several",
+    [
+        ([], False),
+        (["BTCUSDT"], False),
+        (["ETHUSDT"], True),
+        (["BTCUSDT", "ETHUSDT"], True),
+    ],
+)
+def test_symbols_other_than_the_symbol_are_traded(
+    trading_bot_config: MainConfig, symbols: list[str], several: bool
+) -> None:
+    config = MainConfig(**{**trading_bot_config.dict(), "symbols": symbols})
+    assert trades_several_symbols(config) == several
@@ -1,7 +1,36 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
 import pandas as pd
 
-from app.schemas import OrderSide
+from app.config.config import MainConfig
+from app.market_data.kline_ring_buffer import KlineRingBuffer
+from app.schemas import OrderSide, Signal
 from app.signals.signal_engine import SignalEngine
+from tests.metrics.test_latency_recorder import RecordingEventSink
+
+
+class SleepingStrategy:
+    def __init__(self, name: str, seconds: float) -> None:
+        self.name = name
+        self.seconds = seconds
+        self.released = threading.Event()
+
+    def initialize(self, config: MainConfig) -> None:
+        pass
+
+    def analyze(self, df: pd.DataFrame) -> Signal | None:
+        # Waits like a strategy that releases the GIL, or until it is released.
+        self.released.wait(self.seconds)
+        return Signal(
+            name=self.name,
+            reason="slept",
+            symbol="BTCUSDT",
+            action=OrderSide.BUY,
+            price=Decimal(df["close"].iloc[-1]),
+        )
 
 
 def test_initialize_strategies(signal_engine: SignalEngine) -> None:
@@ -34,3 +63,96 @@ def test_generate_signals(signal_engine: SignalEngine) -> None:
 
     assert len(signals) == 1
     assert signals[0].action == OrderSide.BUY
+
+
+def test_generate_batch_signals_unsupported(signal_engine: SignalEngine) -> None:
+    """
+    Test that `generate_batch_signals` returns None when a strategy has no `analyze_batch`.
+    """
+    df = pd.DataFrame({"close": [9500, 10000, 11000]})
+
+    assert signal_engine.generate_batch_signals(df) is None
+
+
+def test_concurrent_signals_keep_strategy_order(
+    trading_bot_config: MainConfig,
+) -> None:
+    """
+    Test that a cycle on a thread pool takes about as long as its slowest strategy,
+    and that the signals keep the order of the strategies.
+    """
+    strategies = [
+        SleepingStrategy(f"strategy_{i}", 0.05 - i * 0.002) for i in range(20)
+    ]
+    df = pd.DataFrame({"close": [10000.0]})
+
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        signal_engine = SignalEngine(
+            config=trading_bot_config, strategies=strategies, executor=executor
+        )
+        started_at = time.perf_counter()
+        signals = signal_engine.generate_signals(df)
+        seconds = time.perf_counter() - started_at
+
+    assert [signal.name for signal in signals] == [s.name for s in strategies]
+    assert seconds < sum(s.seconds for s in strategies) / 2
+
+
+def test_late_strategies_are_dropped_and_reported(
+    trading_bot_config: MainConfig,
+) -> None:
+    """
+    Test that a strategy that misses its deadline is dropped, reported, and skipped
+    by the next cycle while it is still running.
+    """
+    slow = SleepingStrategy("slow", 10)
+    fast = SleepingStrategy("fast", 0)
+    event_sink = RecordingEventSink()
+    df = pd.DataFrame({"close": [10000.0]})
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        signal_engine = SignalEngine(
+            config=trading_bot_config,
+            strategies=[slow, fast],
+            executor=executor,
+            strategy_timeout=0.05,
+            event_sink=event_sink,
+        )
+        assert [s.name for s in signal_engine.generate_signals(df)] == ["fast"]
+        assert [s.name for s in signal_engine.generate_signals(df)] == ["fast"]
+        slow.released.set()
+
+    assert signal_engine.late_results == {"slow": 2}
+    assert [fields["Reason"] for _, event, fields in event_sink.events] == [
+        "deadline missed",
+        "still running",
+    ]
+
+
+def test_late_strategies_keep_the_klines_of_their_cycle(
+    trading_bot_config: MainConfig,
+) -> None:
+    """
+    Test that a strategy running past its deadline still sees the klines it was handed,
+    although the live window is a view of a ring buffer that is written meanwhile.
+    """
+    slow = SleepingStrategy("slow", 10)
+    klines = KlineRingBuffer.from_frame(
+        pd.DataFrame({"open_time": [0, 60_000], "close": [10000.0, 10100.0]}), 2
+    )
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        signal_engine = SignalEngine(
+            config=trading_bot_config,
+            strategies=[slow],
+            executor=executor,
+            strategy_timeout=0.05,
+        )
+        assert signal_engine.generate_signals(klines.to_frame()) == []
+
+        # The forming kline is updated while the strategy is still running.
+        klines.overwrite_last({"open_time": 60_000, "close": 1.0})
+        slow.released.set()
+        late_signal, _ = signal_engine._running[0].result()
+
+    assert late_signal.price == Decimal("10100")
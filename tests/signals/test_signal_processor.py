@@ -1,13 +1,25 @@
+from datetime import datetime, tzinfo
 from decimal import Decimal
 
 import pandas as pd
+import pytest
 
 from app.config.config import MainConfig
+from app.interfaces import StrategyProtocol
 from app.position_manager.position_manager import PositionManager
+from app.position_manager.trade_executor import TradeExecutor
 from app.schemas import OrderSide, Signal
+from app.signals import signal_processor as signal_processor_module
 from app.signals.signal_engine import SignalEngine
 from app.signals.signal_processor import SignalProcessor
-from tests.mocked_data import MockMarketData
+from app.simulated_exchange.exchange import SimulatedExchange
+from app.strategies.example_macd_strategy import MACDStrategy
+from app.strategies.example_rsi_strategy import SimpleRsiStrategy
+from tests.mocked_data import (
+    MockMarketData,
+    MockRandomWalkMarketData,
+    MockStreamingMarketData,
+)
 
 
 def test_signal_processor_constructor(signal_processor: SignalProcessor) -> None:
@@ -87,3 +99,269 @@ def test_signal_processor_run(signal_processor: SignalProcessor) -> None:
     signal_processor.config.backtest = True
     signal_processor.run()
     assert signal_processor.position_manager.open_positions > initial_open_positions
+
+
+class PerBarOnly:
+    def __init__(self, strategy: StrategyProtocol) -> None:
+        self.strategy = strategy
+
+    def initialize(self, config: MainConfig) -> None:
+        self.strategy.initialize(config)
+
+    def analyze(self, df: pd.DataFrame) -> Signal | None:
+        return self.strategy.analyze(df)
+
+
+def test_signal_processor_vectorized_backtest_matches_loop(
+    trading_bot_config: MainConfig,
+) -> None:
+    """
+    Test that the vectorized backtest, used when every strategy supports batch analysis,
+    ends in the same state as the bar by bar backtest.
+    """
+    processors = []
+    for wrap in (lambda strategy: strategy, PerBarOnly):
+        config = trading_bot_config.copy(deep=True)
+        trade_executor = TradeExecutor(config=config, crypto_exchange=None)
+        processor = SignalProcessor(
+            config,
+            SignalEngine(
+                config=config,
+                strategies=[wrap(MACDStrategy()), wrap(SimpleRsiStrategy())],
+            ),
+            MockRandomWalkMarketData(),
+            PositionManager(config=config, trade_executor=trade_executor),
+        )
+        processor.run()
+        processors.append(processor)
+
+    vectorized, loop = processors
+    assert vectorized.position_manager.trade_executor.order_count > 0
+    assert vectorized.position_manager.balance == loop.position_manager.balance
+    assert vectorized.position_manager.portfolio == loop.position_manager.portfolio
+    assert (
+        vectorized.position_manager.trade_executor.order_count
+        == loop.position_manager.trade_executor.order_count
+    )
+
+
+def test_signal_processor_backtest_books_the_simulated_fills(
+    trading_bot_config: MainConfig,
+) -> None:
+    """
+    Test that the backtests feed their bars to the simulated exchange, and book the fills it reports:
+    the fees and the partial fills change the final balance, the same way in both backtests.
+    """
+    balances = {}
+    for name, exchange_options in [
+        ("free", {"taker_fee": Decimal(0)}),
+        ("fees", {"taker_fee": Decimal("0.001")}),
+        ("partial", {"taker_fee": Decimal("0.001"), "participation": 0.0002}),
+    ]:
+        for wrap in (lambda strategy: strategy, PerBarOnly):
+            config = trading_bot_config.copy(deep=True)
+            exchange = SimulatedExchange(**exchange_options)
+            position_manager = PositionManager(
+                config=config,
+                trade_executor=TradeExecutor(config=config, crypto_exchange=exchange),
+            )
+            processor = SignalProcessor(
+                config,
+                SignalEngine(
+                    config=config,
+                    strategies=[wrap(MACDStrategy()), wrap(SimpleRsiStrategy())],
+                ),
+                MockRandomWalkMarketData(),
+                position_manager,
+            )
+            processor.run()
+
+            # The books of the position manager are the balances of the exchange.
+            assert float(position_manager.balance) == pytest.approx(
+                float(
+                    config.trading_config.starting_balance + exchange.balances["USDT"]
+                )
+            )
+            assert float(position_manager.portfolio["BTCUSDT"]) == pytest.approx(
+                float(exchange.balances["BTC"])
+            )
+            balances.setdefault(name, []).append(position_manager.balance)
+
+            orders = exchange.get_all_orders()
+            commissions = sum(Decimal(order["commission"]) for order in orders)
+            assert (commissions > 0) == (name != "free")
+            partial = [
+                order
+                for order in orders
+                if order["status"] == "CANCELED" and Decimal(order["executedQty"])
+            ]
+            assert bool(partial) == (name == "partial")
+
+    # The vectorized and the bar by bar backtests book the same fills.
+    assert all(vectorized == loop for vectorized, loop in balances.values())
+    assert balances["free"][0] != balances["fees"][0] != balances["partial"][0]
+
+
+class RecordingStrategy:
+    def __init__(self) -> None:
+        self.open_times: list[int] = []
+        self.closes: list[float] = []
+        self.lengths: list[int] = []
+
+    def initialize(self, config: MainConfig) -> None:
+        pass
+
+    def analyze(self, df: pd.DataFrame) -> Signal | None:
+        self.open_times.append(df["open_time"].iloc[-1])
+        self.closes.append(df["close"].iloc[-1])
+        self.lengths.append(len(df))
+        return None
+
+
+def test_signal_processor_streaming(
+    trading_bot_config: MainConfig, position_manager: PositionManager, monkeypatch
+) -> None:
+    """
+    Test that in streaming mode the strategies are evaluated once per closed kline,
+    and that the klines missed while the stream was lost are fetched again.
+    """
+    monkeypatch.setattr(signal_processor_module, "STREAM_RECONNECT_DELAY", 0)
+    config = trading_bot_config.copy(deep=True)
+    config.backtest = False
+    config.market_data_config.limit = 50
+    strategy = RecordingStrategy()
+    market_data = MockStreamingMarketData(history=100, length=120, lose_stream_at=110)
+    processor = SignalProcessor(
+        config,
+        SignalEngine(config=config, strategies=[strategy]),
+        market_data,
+        position_manager,
+    )
+
+    processor.run()
+
+    expected = MockRandomWalkMarketData(length=120).get_klines("BTCUSDT", "15m", 120)
+    expected_open_times = [
+        open_time
+        for position, open_time in enumerate(expected["open_time"])
+        if position >= 100 and position != 109
+    ]
+    assert strategy.open_times == expected_open_times
+    assert set(strategy.lengths) == {50}
+    pd.testing.assert_frame_equal(
+        processor.df.reset_index(drop=True),
+        expected.tail(50).reset_index(drop=True),
+    )
+
+
+def test_signal_processor_streaming_replaces_the_forming_kline(
+    trading_bot_config: MainConfig, position_manager: PositionManager, monkeypatch
+) -> None:
+    """
+    Test that the closed kline replaces the forming kline returned by the fetches,
+    at startup and after a lost stream, and that the strategies are evaluated on it.
+    """
+    monkeypatch.setattr(signal_processor_module, "STREAM_RECONNECT_DELAY", 0)
+    config = trading_bot_config.copy(deep=True)
+    config.backtest = False
+    config.market_data_config.limit = 50
+    strategy = RecordingStrategy()
+    market_data = MockStreamingMarketData(
+        history=100, length=120, lose_stream_at=110, forming=True
+    )
+    processor = SignalProcessor(
+        config,
+        SignalEngine(config=config, strategies=[strategy]),
+        market_data,
+        position_manager,
+    )
+
+    processor.run()
+
+    expected = MockRandomWalkMarketData(length=120).get_klines("BTCUSDT", "15m", 120)
+    positions = [position for position in range(100, 120) if position != 109]
+    assert strategy.open_times == list(expected["open_time"].iloc[positions])
+    assert strategy.closes == list(expected["close"].iloc[positions])
+    pd.testing.assert_frame_equal(
+        processor.df.reset_index(drop=True),
+        expected.tail(50).reset_index(drop=True),
+    )
+
+
+def freeze_time(monkeypatch: pytest.MonkeyPatch, timestamp: int) -> None:
+    """Makes the signal processor see the given time, in milliseconds, as the current time."""
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz: tzinfo | None = None) -> "FrozenDatetime":  # type: ignore[override]
+            return cls.fromtimestamp(timestamp / 1000, tz=tz)
+
+    monkeypatch.setattr(signal_processor_module, "datetime", FrozenDatetime)
+
+
+def test_signal_processor_refresh_df(
+    trading_bot_config: MainConfig,
+    position_manager: PositionManager,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that `_refresh_df` only fetches the klines from the last one on,
+    replaces the last kline, and trims the window to the limit.
+    """
+    config = trading_bot_config.copy(deep=True)
+    config.market_data_config.limit = 50
+    market_data = MockStreamingMarketData(history=100, length=120)
+    processor = SignalProcessor(
+        config,
+        SignalEngine(config=config, strategies=[]),
+        market_data,
+        position_manager,
+    )
+    expected = MockRandomWalkMarketData(length=120).get_klines("BTCUSDT", "15m", 120)
+
+    market_data.forming = True
+    processor.df = processor._refresh_df()
+    assert market_data.requests[-1] == {"limit": 50, "start_time": None}
+    assert processor.df["close"].iloc[-1] == expected["open"].iloc[100]
+
+    market_data.closed = 103
+    market_data.forming = False
+    freeze_time(monkeypatch, int(expected["open_time"].iloc[103]))
+    processor.df = processor._refresh_df()
+
+    assert market_data.requests[-1]["start_time"] is not None
+    assert len(processor.df) == 50
+    pd.testing.assert_frame_equal(
+        processor.df, expected.iloc[53:103].reset_index(drop=True)
+    )
+
+
+def test_signal_processor_refresh_df_after_a_long_gap(
+    trading_bot_config: MainConfig,
+    position_manager: PositionManager,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that `_refresh_df` fetches the whole window again when more klines opened since the last
+    one than the limit, instead of leaving a gap.
+    """
+    config = trading_bot_config.copy(deep=True)
+    config.market_data_config.limit = 50
+    market_data = MockStreamingMarketData(history=100, length=300)
+    processor = SignalProcessor(
+        config,
+        SignalEngine(config=config, strategies=[]),
+        market_data,
+        position_manager,
+    )
+    expected = MockRandomWalkMarketData(length=300).get_klines("BTCUSDT", "15m", 300)
+    processor.df = processor._refresh_df()
+
+    market_data.closed = 200
+    freeze_time(monkeypatch, int(expected["open_time"].iloc[200]))
+    processor.df = processor._refresh_df()
+
+    assert market_data.requests[-1] == {"limit": 50, "start_time": None}
+    pd.testing.assert_frame_equal(
+        processor.df, expected.iloc[150:200].reset_index(drop=True)
+    )
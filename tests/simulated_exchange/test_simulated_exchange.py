@@ -0,0 +1,173 @@
+from decimal import Decimal
+
+import numpy
+import pytest
+
+from app.config.config import MainConfig
+from app.enums import OrderSide, OrderType, TimeInForce
+from app.position_manager.position_manager import PositionManager
+from app.position_manager.trade_executor import TradeExecutor
+from app.schemas import CreateOrderSchema, Signal
+from app.simulated_exchange.exchange import SimulatedExchange
+
+
+def order(
+    side: OrderSide,
+    quantity: str,
+    order_type: OrderType = OrderType.MARKET,
+    price: str | None = None,
+    stop_price: str | None = None,
+    time_in_force: TimeInForce = TimeInForce.GTC,
+) -> CreateOrderSchema:
+    return CreateOrderSchema(
+        client_order_id=None,
+        symbol="BTCUSDT",
+        side=side,
+        type=order_type,
+        time_in_force=time_in_force,
+        quantity=Decimal(quantity),
+        price=None if price is None else Decimal(price),
+        stop_price=None if stop_price is None else Decimal(stop_price),
+        trailing_delta=None,
+    )
+
+
+def test_market_and_resting_limit_orders() -> None:
+    exchange = SimulatedExchange(maker_fee=Decimal("0.001"), taker_fee=Decimal("0.002"))
+    exchange.on_tick("BTCUSDT", 100.0)
+
+    market = exchange.create_order(order(OrderSide.BUY, "2"))
+    assert market.status == "FILLED"
+    assert market.price == Decimal("100")
+
+    limit = exchange.create_order(order(OrderSide.SELL, "2", OrderType.LIMIT, "110"))
+    assert limit.status == "NEW"
+    assert exchange.bounds("BTCUSDT") == (float("-inf"), 110.0)
+
+    # The bar does not reach the limit, the next one gaps through it and fills at its open.
+    exchange.on_bar("BTCUSDT", 101, 109, 99, 105)
+    assert exchange.get_order_by_id(limit.order_id)["status"] == "NEW"
+    exchange.on_bar("BTCUSDT", 112, 115, 111, 113)
+    filled = exchange.get_order_by_id(limit.order_id)
+    assert filled["status"] == "FILLED"
+    assert Decimal(filled["cummulativeQuoteQty"]) == Decimal("224")
+
+    balances = {
+        balance["asset"]: Decimal(balance["free"])
+        for balance in exchange.get_account()["balances"]
+    }
+    # Bought 2 at 100 as a taker, sold 2 at 112 as a maker.
+    assert balances == {
+        "BTC": Decimal(0),
+        "USDT": Decimal("-200") - Decimal("0.4") + Decimal("224") - Decimal("0.224"),
+    }
+
+
+def test_time_in_force_and_partial_fills() -> None:
+    exchange = SimulatedExchange(participation=0.5)
+    exchange.on_tick("BTCUSDT", 100.0, quantity=4.0)
+
+    fok = exchange.create_order(
+        order(OrderSide.BUY, "3", OrderType.LIMIT, "101", time_in_force=TimeInForce.FOK)
+    )
+    assert (fok.status, fok.executed_qty) == ("EXPIRED", Decimal(0))
+
+    ioc = exchange.create_order(
+        order(OrderSide.BUY, "3", OrderType.LIMIT, "101", time_in_force=TimeInForce.IOC)
+    )
+    assert (ioc.status, ioc.executed_qty) == ("EXPIRED", Decimal(2))
+
+    # A market order larger than the liquidity of a bar fills over the next bars, at their open.
+    market = exchange.create_order(order(OrderSide.BUY, "3"))
+    assert (market.status, market.executed_qty) == ("NEW", Decimal(0))
+    exchange.on_bar("BTCUSDT", 102, 103, 101, 102, volume=4.0)
+    assert exchange.get_order_by_id(market.order_id)["status"] == "PARTIALLY_FILLED"
+    exchange.on_bar("BTCUSDT", 104, 105, 103, 104, volume=4.0)
+    filled = exchange.get_order_by_id(market.order_id)
+    assert filled["status"] == "FILLED"
+    assert Decimal(filled["executedQty"]) == Decimal(3)
+    assert Decimal(filled["cummulativeQuoteQty"]) == 2 * 102 + 1 * 104
+
+
+def test_stop_orders_and_vectorized_bars() -> None:
+    exchange = SimulatedExchange()
+    exchange.on_tick("BTCUSDT", 100.0)
+    stop_loss = exchange.create_order(
+        order(OrderSide.SELL, "1", OrderType.STOP_LOSS, stop_price="90")
+    )
+    take_profit = exchange.create_order(
+        order(
+            OrderSide.SELL,
+            "1",
+            OrderType.TAKE_PROFIT_LIMIT,
+            price="120",
+            stop_price="120",
+        )
+    )
+    cancelled = exchange.create_order(
+        order(OrderSide.BUY, "1", OrderType.LIMIT, price="95")
+    )
+    exchange.cancel_order_by_id(cancelled.order_id)
+    with pytest.raises(ValueError):
+        exchange.cancel_order_by_id(cancelled.order_id)
+
+    closes = numpy.concatenate([numpy.full(1000, 100.0), [95.0, 88.0, 100.0]])
+    exchange.on_bars("BTCUSDT", closes, closes + 1, closes - 1, closes)
+
+    # The stop loss triggers on the bar that opens below it, and fills at its open.
+    filled = exchange.get_order_by_id(stop_loss.order_id)
+    assert filled["status"] == "FILLED"
+    assert Decimal(filled["cummulativeQuoteQty"]) == 88
+    assert exchange.get_order_by_id(take_profit.order_id)["status"] == "NEW"
+    assert exchange.get_order_by_id(cancelled.order_id)["status"] == "CANCELED"
+    assert exchange.bounds("BTCUSDT") == (float("-inf"), 120.0)
+    assert [o["orderId"] for o in exchange.get_all_orders()] == ["1", "2", "3"]
+
+
+def test_only_recent_orders_are_kept_besides_the_open_orders() -> None:
+    exchange = SimulatedExchange(order_history=3)
+    exchange.on_tick("BTCUSDT", 100.0)
+    resting = exchange.create_order(order(OrderSide.BUY, "1", OrderType.LIMIT, "50"))
+
+    for _ in range(100):
+        exchange.create_order(order(OrderSide.BUY, "1"))
+        assert len(exchange.orders) <= 1 + 2 * 3
+
+    exchange.create_order(order(OrderSide.BUY, "1"))
+    assert [o["orderId"] for o in exchange.get_all_orders()][-3:] == [
+        "100",
+        "101",
+        "102",
+    ]
+    assert exchange.get_order_by_id(resting.order_id)["status"] == "NEW"
+    with pytest.raises(KeyError):
+        exchange.get_order_by_id("2")
+
+
+def test_position_manager_trades_on_the_simulated_exchange(
+    trading_bot_config: MainConfig,
+) -> None:
+    # Orders go to a simulated exchange in live mode, and when backtesting.
+    for backtest in [False, True]:
+        config = trading_bot_config.copy(update={"backtest": backtest})
+        exchange = SimulatedExchange(taker_fee=Decimal("0.01"))
+        position_manager = PositionManager(
+            config=config,
+            trade_executor=TradeExecutor(config=config, crypto_exchange=exchange),
+        )
+        for action, price in [(OrderSide.BUY, "100"), (OrderSide.SELL, "110")]:
+            position_manager.handle_signal(
+                Signal(
+                    name="signal",
+                    reason="reason",
+                    symbol="BTCUSDT",
+                    action=action,
+                    price=Decimal(price),
+                )
+            )
+
+        # Bought 1 at 100 and sold it at 110, paying 1% of both as fees.
+        assert position_manager.balance == Decimal("10010") - Decimal("2.1")
+        orders = exchange.get_all_orders()
+        assert [o["status"] for o in orders] == ["FILLED", "FILLED"]
+        assert sum(Decimal(o["commission"]) for o in orders) == Decimal("2.1")
@@ -20,3 +20,12 @@ def test_macd_strategy_analyze_no_signal(macd_strategy):
     signal = macd_strategy.analyze(df)
 
     assert signal is None
+
+
+def test_macd_strategy_analyze_batch_no_signal(macd_strategy):
+    df = pd.DataFrame(SAMPLE_DATA_NO_SIGNAL)
+
+    batch_signals = macd_strategy.analyze_batch(df)
+
+    assert len(batch_signals.action) == len(df)
+    assert not batch_signals.action.any()
@@ -0,0 +1,119 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.__main__ import run_sweep
+from app.config.config import MainConfig
+from app.enums import EventLevel
+from tests.mocked_data import MockRandomWalkMarketData
+
+APP = Path(__file__).resolve().parents[2] / "app"
+
+# Importing the entry point took 600 to 750 ms when every provider was imported eagerly,
+# and about 60 ms since. The budget leaves room for slower machines.
+IMPORT_TIME_BUDGET = 0.3  # seconds
+
+# Only imported by the providers, strategies and bot modules that are used.
+HEAVY_MODULES = ["pandas", "numpy", "ta", "requests", "binance", "websocket"]
+
+MEASURE_IMPORT = """
+import importlib.util, json, os, sys, time
+sys.path.insert(0, {app!r})
+os.environ.update({env!r})
+started_at = time.perf_counter()
+spec = importlib.util.spec_from_file_location("bot_main", os.path.join({app!r}, "__main__.py"))
+main = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(main)
+seconds = time.perf_counter() - started_at
+{then}
+print(json.dumps({{"seconds": seconds, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure_import(then: str = "", env: dict[str, str] | None = None) -> dict:
+    """
+    Imports the entry point in a fresh interpreter, then runs `then`,
+    and returns the import time and the imported modules.
+    """
+    code = MEASURE_IMPORT.format(app=str(APP), env=env or {}, then=then)
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_entry_point_imports_within_budget() -> None:
+    # The best of a few runs, so a busy machine doesn't fail the test.
+    runs = [measure_import() for _ in range(3)]
+
+    assert min(run["seconds"] for run in runs) < IMPORT_TIME_BUDGET
+    modules = set(runs[0]["modules"])
+    assert not modules & set(HEAVY_MODULES)
+
+
+def test_only_the_selected_providers_are_imported() -> None:
+    result = measure_import(
+        then="\n".join(
+            [
+                "main.get_instance_from_mapping(main.CRYPTO_EXCHANGE_MAPPING, 'CRYPTO_EXCHANGE')",
+                "market_data = main.get_instance_from_mapping(main.MARKET_DATA_PROVIDER_MAPPING, 'MARKET_DATA_PROVIDER')",
+                "main.get_strategy_instances(mapping=main.STRATEGY_MAPPING)",
+                "assert market_data._client is None",
+            ]
+        ),
+        env={
+            "CRYPTO_EXCHANGE": "SimulatedExchange",
+            "MARKET_DATA_PROVIDER": "BinanceMarketData",
+            "STRATEGIES": "MACDStrategy",
+        },
+    )
+
+    modules = set(result["modules"])
+    assert {
+        "simulated_exchange.exchange",
+        "binance_exchange.market_data",
+        "strategies.example_macd_strategy",
+    } <= modules
+    assert not modules & {
+        "binance_exchange.exchange",
+        "market_data.synthetic_market_data",
+        "strategies.example_rsi_strategy",
+    }
+
+
+class RecordingEventSink:
+    def __init__(self) -> None:
+        self.events: list[tuple[EventLevel, str, dict]] = []
+
+    def enabled(self, level: EventLevel) -> bool:
+        return True
+
+    def emit(self, level: EventLevel, event: str, fields: dict) -> None:
+        self.events.append((level, event, fields))
+
+    def close(self) -> None:
+        pass
+
+
+def test_sweep_results_go_to_the_event_sink(
+    trading_bot_config: MainConfig,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setenv("MAX_WORKERS", "1")
+    event_sink = RecordingEventSink()
+
+    run_sweep(
+        trading_bot_config,
+        MockRandomWalkMarketData(),
+        json.dumps({"SimpleRsiStrategy": {"window": [7, 14]}}),
+        event_sink,
+    )
+
+    [(level, event, fields)] = event_sink.events
+    assert (level, event) == (EventLevel.SUMMARY, "parameter_sweep_results")
+    assert "SimpleRsiStrategy" in fields["Results"]
+    assert capsys.readouterr().out == ""